@@ -0,0 +1,252 @@
+# aggregate_cube.py
+from atomic_io import read_verified
+from cooccurrence import PairMatrix
+from quantile_sketch import DDSketch
+from schema import METRIC_KEYS
+from serialization import loads
+
+AGGREGATES_PATH = "hsr_aggregates.json"
+
+
+def _cell_key(floor, star_num):
+    return f"{int(floor)}|{int(star_num)}"
+
+
+def _add_totals(cell, char, values):
+    """Add a character's [value_sum, count, ...] into a cell"""
+    totals = cell.get(char)
+    if totals is None:
+        cell[char] = list(values)
+    else:
+        for i, value in enumerate(values):
+            totals[i] += value
+
+
+class AggregateCube:
+    """Sums and counts per (floor, star_num, character) for one game mode"""
+
+    __slots__ = ("mode", "cells", "stages", "nodes", "sketches", "regions")
+
+    def __init__(
+        self, mode, cells=None, stages=None, nodes=None, sketches=None, regions=None
+    ):
+        self.mode = mode
+        # {(floor, star_num): {character: [value_sum, count, value_sumsq]}}
+        self.cells = cells if cells is not None else {}
+        # {(floor, star_num): complete stages}
+        self.stages = stages if stages is not None else {}
+        # {(floor, star_num): {node: {character: [value_sum, count]}}}
+        self.nodes = nodes if nodes is not None else {}
+        # {(floor, star_num): {character: DDSketch of the metric}}
+        self.sketches = sketches if sketches is not None else {}
+        # {(floor, star_num): {region: {"stages": complete stages,
+        #                               "cells": {character: [value_sum, count]}}}}
+        self.regions = regions if regions is not None else {}
+
+    @classmethod
+    def from_frames(
+        cls,
+        mode,
+        cell_frame,
+        stage_counts,
+        node_frame=None,
+        bucket_counts=None,
+        region_frame=None,
+        region_stages=None,
+    ):
+        """Build from grouped sums/counts and per-slice stage totals
+
+        node_frame, when given, has the same columns indexed by
+        (floor, star_num, node, character), and region_frame by
+        (floor, star_num, region, character) with region_stages holding the
+        stage totals per (floor, star_num, region). bucket_counts holds
+        quantile sketch bucket counts indexed by (floor, star_num, character,
+        bucket).
+        """
+        cube = cls(mode)
+        for (floor, star_num, char), value_sum, count, value_sumsq in zip(
+            cell_frame.index,
+            cell_frame["value_sum"],
+            cell_frame["count"],
+            cell_frame["value_sumsq"],
+        ):
+            key = (int(floor), int(star_num))
+            cube.cells.setdefault(key, {})[char] = [
+                float(value_sum),
+                int(count),
+                float(value_sumsq),
+            ]
+        for (floor, star_num), stages in stage_counts.items():
+            cube.stages[(int(floor), int(star_num))] = int(stages)
+        if node_frame is not None:
+            for (floor, star_num, node, char), value_sum, count in zip(
+                node_frame.index, node_frame["value_sum"], node_frame["count"]
+            ):
+                # Rows without a usable node still count towards the pooled cells
+                if node != node:
+                    continue
+                chars = cube.nodes.setdefault((int(floor), int(star_num)), {})
+                chars.setdefault(int(node), {})[char] = [float(value_sum), int(count)]
+        if bucket_counts is not None:
+            for (floor, star_num, char), group in bucket_counts.groupby(
+                level=[0, 1, 2], sort=False
+            ):
+                cube.sketches.setdefault((int(floor), int(star_num)), {})[char] = (
+                    DDSketch.from_counts(
+                        group.index.get_level_values(3), group.to_numpy()
+                    )
+                )
+        if region_frame is not None:
+            for (floor, star_num, region), stages in region_stages.items():
+                cube.regions.setdefault((int(floor), int(star_num)), {})[region] = {
+                    "stages": int(stages),
+                    "cells": {},
+                }
+            for (floor, star_num, region, char), value_sum, count in zip(
+                region_frame.index, region_frame["value_sum"], region_frame["count"]
+            ):
+                cells = cube.regions[(int(floor), int(star_num))][region]["cells"]
+                cells[char] = [float(value_sum), int(count)]
+        return cube
+
+    def slices(self):
+        """All (floor, star_num) slices with at least one complete stage"""
+        return sorted(key for key, stages in self.stages.items() if stages)
+
+    def slice(self, floor, star_num):
+        """Average metric and usage rate per character for one slice"""
+        key = (floor, star_num)
+        stages = self.stages.get(key, 0)
+        if not stages:
+            return {}
+        metric = METRIC_KEYS[self.mode]
+        return {
+            char: {metric: value_sum / count, "usage": count / stages * 100}
+            for char, (value_sum, count, *_) in self.cells.get(key, {}).items()
+        }
+
+    def node_slice(self, floor, star_num):
+        """Average metric and usage rate per character and node for one slice
+
+        Every complete stage has one row per node, so each node's usage is
+        measured against the slice's stage total.
+        """
+        key = (floor, star_num)
+        stages = self.stages.get(key, 0)
+        if not stages:
+            return {}
+        metric = METRIC_KEYS[self.mode]
+        results = {}
+        for node, chars in sorted(self.nodes.get(key, {}).items()):
+            for char, (value_sum, count) in chars.items():
+                results.setdefault(char, {})[str(node)] = {
+                    metric: value_sum / count,
+                    "usage": count / stages * 100,
+                }
+        return results
+
+    def region_slice(self, floor, star_num):
+        """Average metric and usage rate per character and uid region"""
+        metric = METRIC_KEYS[self.mode]
+        results = {}
+        for region, entry in sorted(self.regions.get((floor, star_num), {}).items()):
+            if not entry["stages"]:
+                continue
+            for char, (value_sum, count) in entry["cells"].items():
+                results.setdefault(char, {})[region] = {
+                    metric: value_sum / count,
+                    "usage": count / entry["stages"] * 100,
+                }
+        return results
+
+    def quantile_slice(self, floor, star_num):
+        """p10/p50/p90 of the metric per character for one slice"""
+        return {
+            char: sketch.quantiles()
+            for char, sketch in self.sketches.get((floor, star_num), {}).items()
+        }
+
+    def merge(self, other):
+        """Add another cube's sums and counts into this one"""
+        for key, chars in other.cells.items():
+            cell = self.cells.setdefault(key, {})
+            for char, values in chars.items():
+                _add_totals(cell, char, values)
+        for key, stages in other.stages.items():
+            self.stages[key] = self.stages.get(key, 0) + stages
+        for key, nodes in other.nodes.items():
+            cell_nodes = self.nodes.setdefault(key, {})
+            for node, chars in nodes.items():
+                cell = cell_nodes.setdefault(node, {})
+                for char, values in chars.items():
+                    _add_totals(cell, char, values)
+        for key, regions in other.regions.items():
+            cell_regions = self.regions.setdefault(key, {})
+            for region, entry in regions.items():
+                target = cell_regions.setdefault(region, {"stages": 0, "cells": {}})
+                target["stages"] += entry["stages"]
+                for char, values in entry["cells"].items():
+                    _add_totals(target["cells"], char, values)
+        for key, chars in other.sketches.items():
+            cell = self.sketches.setdefault(key, {})
+            for char, sketch in chars.items():
+                if char in cell:
+                    cell[char].merge(sketch)
+                else:
+                    cell[char] = DDSketch.from_dict(sketch.to_dict())
+        return self
+
+    def to_dict(self):
+        return {
+            "mode": self.mode,
+            "cells": {_cell_key(*key): chars for key, chars in self.cells.items()},
+            "stages": {_cell_key(*key): n for key, n in self.stages.items()},
+            "nodes": {
+                _cell_key(*key): {str(node): chars for node, chars in nodes.items()}
+                for key, nodes in self.nodes.items()
+            },
+            "sketches": {
+                _cell_key(*key): {char: s.to_dict() for char, s in chars.items()}
+                for key, chars in self.sketches.items()
+            },
+            "regions": {
+                _cell_key(*key): regions for key, regions in self.regions.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, raw):
+        def parse(key):
+            floor, star_num = key.split("|")
+            return int(floor), int(star_num)
+
+        return cls(
+            raw["mode"],
+            {parse(key): chars for key, chars in raw["cells"].items()},
+            {parse(key): n for key, n in raw["stages"].items()},
+            # Aggregates written before the node split have no "nodes" table
+            {
+                parse(key): {int(node): chars for node, chars in nodes.items()}
+                for key, nodes in raw.get("nodes", {}).items()
+            },
+            {
+                parse(key): {
+                    char: DDSketch.from_dict(s) for char, s in chars.items()
+                }
+                for key, chars in raw.get("sketches", {}).items()
+            },
+            {parse(key): regions for key, regions in raw.get("regions", {}).items()},
+        )
+
+
+def load_aggregates(path=AGGREGATES_PATH):
+    """Load per-mode aggregates written by update_data"""
+    raw = loads(read_verified(path))
+    aggregates = {}
+    for mode, entries in raw.items():
+        aggregates[mode] = dict(entries)
+        if "cube" in entries:
+            aggregates[mode]["cube"] = AggregateCube.from_dict(entries["cube"])
+        if "pairs" in entries:
+            aggregates[mode]["pairs"] = PairMatrix.from_dict(entries["pairs"])
+    return aggregates
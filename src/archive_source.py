@@ -0,0 +1,125 @@
+# archive_source.py
+import os
+import re
+import tarfile
+
+import requests
+
+from data_processor import (
+    combine_modes,
+    process_moc_data,
+    process_score_data,
+    read_stats_csv,
+)
+
+# Configuration
+ARCHIVE_URL = "https://codeload.github.com/{owner}/{repo}/tar.gz/refs/heads/{branch}"
+# "3.4.1.csv" is Memory of Chaos, "3.4.1_pf.csv" and "3.4.1_as.csv" the others
+CSV_NAME = re.compile(r"^(?P<version>\d+(?:\.\d+)*)(?:_(?P<mode>pf|as))?\.csv$")
+
+
+def parse_csv_name(name):
+    """(version, mode) for a stats CSV file name, or None for other files"""
+    match = CSV_NAME.match(os.path.basename(name))
+    if not match:
+        return None
+    return match.group("version"), match.group("mode") or "moc"
+
+
+def version_key(version):
+    """Sort key that puts 3.10 after 3.9"""
+    return tuple(int(part) for part in version.split("."))
+
+
+def _in_data_dir(member_path, path):
+    # Archive members start with a "<repo>-<branch>/" folder
+    parts = member_path.split("/", 1)
+    inner = parts[1] if len(parts) == 2 else parts[0]
+    return os.path.dirname(inner) == path.strip("/")
+
+
+def iter_archive_csvs(fileobj, path):
+    """Yield (version, mode, file) for each stats CSV in a .tar.gz stream
+
+    The archive is read once, front to back, and decompressed as it goes;
+    nothing is written to disk. Each file must be read before the next one
+    is requested.
+    """
+    with tarfile.open(fileobj=fileobj, mode="r|gz") as archive:
+        for member in archive:
+            if not member.isfile() or not _in_data_dir(member.name, path):
+                continue
+            parsed = parse_csv_name(member.name)
+            if parsed:
+                yield (*parsed, archive.extractfile(member))
+
+
+def iter_clone_csvs(clone_dir, path):
+    """Yield (version, mode, file) for each stats CSV in a local clone"""
+    data_dir = os.path.join(clone_dir, path)
+    for name in sorted(os.listdir(data_dir)):
+        parsed = parse_csv_name(name)
+        if parsed:
+            with open(os.path.join(data_dir, name), "rb") as f:
+                yield (*parsed, f)
+
+
+def process_csvs(csvs, aggregates=None, versions=None, skip=()):
+    """Process (version, mode, file) entries into {version: combined stats}
+
+    Pass a dict as aggregates to collect {version: {mode: aggregates}}.
+    versions, when given, limits processing to those versions, and versions
+    in skip are left out.
+    """
+    by_version = {}
+    for version, mode, f in csvs:
+        if (versions is not None and version not in versions) or version in skip:
+            continue
+        version_aggregates = (
+            aggregates.setdefault(version, {}) if aggregates is not None else None
+        )
+        try:
+            df = read_stats_csv(f)
+            if mode == "moc":
+                results = process_moc_data(df, version_aggregates)
+            else:
+                results = process_score_data(df, mode, version_aggregates)
+        except Exception as e:
+            print(f"Error processing {version} {mode} data: {str(e)}")
+            results = {}
+        by_version.setdefault(version, {})[mode] = results
+
+    return {
+        version: combine_modes(by_version[version])
+        for version in sorted(by_version, key=version_key)
+    }
+
+
+def get_archive_data(
+    source=None,
+    owner="owner",
+    repo="repo",
+    path="path",
+    branch="main",
+    aggregates=None,
+    versions=None,
+    skip=(),
+):
+    """Processed stats for every version in the upstream data directory
+
+    source may be a local clone directory, a local .tar.gz file, or None to
+    stream the repository archive from GitHub in one request.
+    """
+    if source is not None and os.path.isdir(source):
+        return process_csvs(iter_clone_csvs(source, path), aggregates, versions, skip)
+    if source is not None:
+        with open(source, "rb") as f:
+            return process_csvs(iter_archive_csvs(f, path), aggregates, versions, skip)
+
+    url = ARCHIVE_URL.format(owner=owner, repo=repo, branch=branch)
+    print(f"Downloading archive: {url}")
+    with requests.get(url, stream=True) as response:
+        response.raise_for_status()
+        return process_csvs(
+            iter_archive_csvs(response.raw, path), aggregates, versions, skip
+        )
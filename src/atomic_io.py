@@ -0,0 +1,77 @@
+# atomic_io.py
+import hashlib
+import os
+import tempfile
+import time
+
+# Configuration
+CHECKSUM_SUFFIX = ".sha256"
+READ_RETRIES = 5
+READ_RETRY_DELAY = 0.05  # Seconds between attempts while a writer finishes
+
+
+class ChecksumError(ValueError):
+    """A file does not match its checksum sidecar"""
+
+
+def _fsync_dir(directory):
+    """Persist a rename by syncing its directory (not possible on Windows)"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _replace_atomically(path, data):
+    """Write to a temp file in the same directory, fsync it, then rename it over path"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+
+def checksum_line(data, name):
+    """Sidecar contents in the format `sha256sum -c` understands"""
+    return f"{hashlib.sha256(data).hexdigest()}  {name}\n"
+
+
+def atomic_write(path, data, checksum=True):
+    """Replace a file so readers only ever see the old or the new contents"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    _replace_atomically(path, data)
+    if checksum:
+        sidecar = checksum_line(data, os.path.basename(path)).encode("utf-8")
+        _replace_atomically(path + CHECKSUM_SUFFIX, sidecar)
+
+
+def read_verified(path, retries=READ_RETRIES, delay=READ_RETRY_DELAY):
+    """Read a file and check it against its sidecar, if it has one"""
+    sidecar = path + CHECKSUM_SUFFIX
+    for attempt in range(retries):
+        with open(path, "rb") as f:
+            data = f.read()
+        if not os.path.exists(sidecar):
+            return data
+        with open(sidecar) as f:
+            expected = f.read().split()[0]
+        if hashlib.sha256(data).hexdigest() == expected:
+            return data
+        # A writer may have renamed the file but not its sidecar yet
+        time.sleep(delay)
+    raise ChecksumError(f"{path} does not match {sidecar}")
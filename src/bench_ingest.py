@@ -0,0 +1,62 @@
+# bench_ingest.py
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_processor import ROLES_PATH, process_moc_data
+
+BENCH_SEED = 0
+
+
+def synthetic_moc(n_stages, seed=BENCH_SEED):
+    """Raw MoC rows for n_stages random clears, two nodes each"""
+    rng = np.random.default_rng(seed)
+    with open(ROLES_PATH) as f:
+        names = np.array(sorted(json.load(f)), dtype=object)
+    uids = 600000000 + rng.choice(10**8, n_stages, replace=False)
+    floor = np.where(rng.random(n_stages) < 0.8, 12, rng.integers(1, 12, n_stages))
+    star = np.where(floor == 12, 3, rng.integers(1, 4, n_stages))
+    teams = names[rng.integers(0, len(names), (2 * n_stages, 4))]
+    df = pd.DataFrame(
+        {
+            "uid": np.repeat(uids, 2),
+            "floor": np.repeat(floor, 2).astype("int8"),
+            "node": np.tile(np.array([1, 2], dtype="int8"), n_stages),
+            "star_num": np.repeat(star, 2).astype("int8"),
+            "round_num": rng.integers(0, 11, 2 * n_stages).astype("int32"),
+        }
+    )
+    for i in range(4):
+        df[f"ch{i + 1}"] = pd.Categorical(teams[:, i])
+    return df
+
+
+def time_ingest(df, workers, repeats=1):
+    """Best wall time in seconds of process_moc_data over repeats runs"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        process_moc_data(df.copy(), {}, workers=workers)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time MoC ingestion serially and across worker processes"
+    )
+    parser.add_argument("--stages", type=int, default=500_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+
+    df = synthetic_moc(args.stages)
+    serial = time_ingest(df, 1, args.repeats)
+    parallel = time_ingest(df, args.workers, args.repeats)
+    print(f"{len(df)} rows, {os.cpu_count()} CPUs")
+    print(f"workers=1: {serial:.2f}s")
+    print(f"workers={args.workers}: {parallel:.2f}s ({serial / parallel:.2f}x)")
@@ -0,0 +1,180 @@
+# bootstrap.py
+import math
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Configuration
+BOOTSTRAP_SAMPLES = 200
+CONFIDENCE = 0.95
+BOOTSTRAP_SEED = 718  # Fixed so reruns on the same data give the same intervals
+BLOCK_STAGES = 4096  # Stages weighted per matrix product
+BOOTSTRAP_WORKERS = os.cpu_count() or 1
+# P(Poisson(1) <= k) as 64-bit thresholds, for drawing weights from hashes
+_POISSON_THRESHOLDS = np.array(
+    [
+        min(sum(math.exp(-1) / math.factorial(i) for i in range(k + 1)), 1 - 2**-53)
+        * 2.0**64
+        for k in range(20)
+    ],
+    dtype=np.uint64,
+)
+
+
+def _splitmix(x):
+    """splitmix64 finalizer: scramble uint64 values into well-mixed bits"""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def stage_weights(stage_hashes, n_samples=BOOTSTRAP_SAMPLES, seed=BOOTSTRAP_SEED):
+    """Poisson(1) weight of every stage in every resample, (samples, stages)
+
+    A weight depends only on the stage's hash, the resample and the seed,
+    never on which other stages are present or in what order, so any split
+    of the stages into partitions gives the same resamples.
+    """
+    with np.errstate(over="ignore"):
+        resamples = np.arange(n_samples, dtype=np.uint64) + np.uint64(seed << 32)
+        mixed = _splitmix(
+            _splitmix(resamples)[:, None] ^ np.asarray(stage_hashes, np.uint64)
+        )
+    return np.searchsorted(_POISSON_THRESHOLDS, mixed, side="right").astype(
+        np.float64
+    )
+
+
+class ResampleTotals:
+    """Per-resample stage totals and character counts and value sums
+
+    Every resample weights each stage independently (a Poisson bootstrap),
+    so the totals are sums over stages: partitions of the stages can be
+    summarized separately and merged by adding. Counts and sums of whole
+    numbers stay exact, so merged totals match a single pass bit for bit.
+    """
+
+    __slots__ = ("names", "stages", "counts", "sums")
+
+    def __init__(self, names, stages, counts, sums):
+        self.names = list(names)
+        # (samples,) weighted stage totals; (samples, characters) counts and sums
+        self.stages = np.asarray(stages, dtype=np.float64)
+        self.counts = np.asarray(counts, dtype=np.float64).reshape(len(stages), -1)
+        self.sums = np.asarray(sums, dtype=np.float64).reshape(len(stages), -1)
+
+    @classmethod
+    def from_codes(
+        cls,
+        stage_keys,
+        names,
+        codes,
+        values,
+        n_samples=BOOTSTRAP_SAMPLES,
+        seed=BOOTSTRAP_SEED,
+        workers=BOOTSTRAP_WORKERS,
+    ):
+        """Resample totals for rows of (stage key, team codes, value)
+
+        codes is an (n, 4) array indexing names, with -1 for empty slots;
+        rows with the same stage key are resampled together.
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        stage_ids, stage_keys = pd.factorize(np.asarray(stage_keys))
+        hashes = pd.util.hash_array(np.asarray(stage_keys))
+        n_chars = len(names)
+
+        # One (stage, character) cell per filled slot, grouped by stage
+        filled = codes >= 0
+        rows = np.nonzero(filled)[0]
+        cells = stage_ids[rows] * n_chars + codes[filled]
+        order = np.argsort(stage_ids[rows], kind="stable")
+        rows, cells = rows[order], cells[order]
+        bounds = np.searchsorted(
+            stage_ids[rows], np.arange(0, len(stage_keys) + BLOCK_STAGES, BLOCK_STAGES)
+        )
+
+        def run(block):
+            first = block * BLOCK_STAGES
+            count = min(BLOCK_STAGES, len(stage_keys) - first)
+            start, stop = bounds[block], bounds[block + 1]
+            local = cells[start:stop] - first * n_chars
+            size = count * n_chars
+            block_counts = np.bincount(local, minlength=size).reshape(count, -1)
+            block_sums = np.bincount(
+                local, weights=values[rows[start:stop]], minlength=size
+            ).reshape(count, -1)
+            weights = stage_weights(hashes[first : first + count], n_samples, seed)
+            return weights.sum(axis=1), weights @ block_counts, weights @ block_sums
+
+        totals = cls(
+            names,
+            np.zeros(n_samples),
+            np.zeros((n_samples, n_chars)),
+            np.zeros((n_samples, n_chars)),
+        )
+        n_blocks = math.ceil(len(stage_keys) / BLOCK_STAGES)
+        # numpy releases the GIL inside the products, so threads use every core
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for stages, counts, sums in pool.map(run, range(n_blocks)):
+                totals.stages += stages
+                totals.counts += counts
+                totals.sums += sums
+        return totals
+
+    def merge(self, other):
+        """Add another partition's totals into these"""
+        names = sorted(set(self.names) | set(other.names))
+        position = {name: i for i, name in enumerate(names)}
+        counts = np.zeros((len(self.stages), len(names)))
+        sums = np.zeros((len(self.stages), len(names)))
+        for totals in (self, other):
+            columns = [position[name] for name in totals.names]
+            counts[:, columns] += totals.counts
+            sums[:, columns] += totals.sums
+        self.names = names
+        self.stages = self.stages + other.stages
+        self.counts = counts
+        self.sums = sums
+        return self
+
+    def intervals(self, confidence=CONFIDENCE):
+        """{character: {"metric": [low, high], "usage": [low, high]}}"""
+        if not self.names or not self.stages.any():
+            return {}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            usage = self.counts / self.stages[:, None] * 100
+            metric = self.sums / self.counts
+
+        tail = (1 - confidence) / 2 * 100
+        bounds = [tail, 100 - tail]
+        with warnings.catch_warnings():
+            # Characters missing from every resample have no interval
+            warnings.simplefilter("ignore", RuntimeWarning)
+            usage_ci = np.nanpercentile(usage, bounds, axis=0)
+            metric_ci = np.nanpercentile(metric, bounds, axis=0)
+
+        return {
+            name: {
+                "metric": [float(metric_ci[0, i]), float(metric_ci[1, i])],
+                "usage": [float(usage_ci[0, i]), float(usage_ci[1, i])],
+            }
+            for i, name in enumerate(self.names)
+        }
+
+    def to_dict(self):
+        return {
+            "names": self.names,
+            "stages": self.stages.tolist(),
+            "counts": self.counts.tolist(),
+            "sums": self.sums.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, raw):
+        return cls(raw["names"], raw["stages"], raw["counts"], raw["sums"])
+
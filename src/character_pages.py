@@ -0,0 +1,200 @@
+# character_pages.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from urllib.parse import quote
+
+from atomic_io import atomic_write
+from history import TIER_ORDER
+from visual_tierlist import (
+    COLORS,
+    ROLE_TYPES,
+    SITE_URL,
+    build_image_manifest,
+    get_nodes_html,
+    get_partners_html,
+    get_stats_html,
+    get_teams_html,
+    get_trend_html,
+    icon_img_html,
+    sanitize_filename,
+)
+
+# Configuration
+PAGES_DIR = "../public/characters"
+PAGE_WORKERS = os.cpu_count() or 1  # 1 renders in this process
+
+# Set once per worker process by _init_worker
+_context = None
+
+
+def page_path(char):
+    """URL path of a character's page, relative to the site root"""
+    return f"characters/{quote(sanitize_filename(char))}.html"
+
+
+def character_role_tiers(tier_lists):
+    """{char: {mode: {role: tier}}} for every role a character is ranked in"""
+    tiers = {}
+    for mode, roles in tier_lists.items():
+        for role in ROLE_TYPES:
+            for tier, chars in roles.get(role, {}).items():
+                for char in chars:
+                    tiers.setdefault(char, {}).setdefault(mode, {})[role] = tier
+    return tiers
+
+
+def character_page_html(char, context):
+    """Detail page for one character: every mode, its tiers and teammates"""
+    characters_data = context["characters"]
+    role_tiers = context["tiers"].get(char, {})
+    sections = []
+    for mode in context["modes"]:
+        tiers = role_tiers.get(mode, {})
+        badges = "".join(
+            f'<span class="tier tier-{tier}">{escape(role)}: {tier}</span>'
+            for role, tier in tiers.items()
+        )
+        sections.append(
+            f"""
+        <section class="mode">
+            <h2>{mode}</h2>
+            <div class="tiers">{badges or "Not ranked"}</div>
+            <div class="stats">{get_stats_html(char, mode, characters_data)}</div>
+            {get_nodes_html(char, mode, characters_data)}
+            {get_partners_html(char, mode, context["aggregates"])}
+            {get_teams_html(char, mode, characters_data)}
+            {get_trend_html(char, mode, context["history_index"])}
+        </section>"""
+        )
+
+    name = escape(char)
+    roles = ", ".join(context["roles"].get(char, ["N/A"]))
+    tier_colors = "".join(
+        f"        .tier-{tier} {{ background: {COLORS[tier]}; }}\n"
+        for tier in TIER_ORDER
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{name} - Honkai: Star Rail Tier List {context["version"]}</title>
+    <meta name="description" content="{name} tiers, usage and teams in Memory of Chaos, Pure Fiction and Apocalyptic Shadow for Honkai: Star Rail {context["version"]}.">
+    <link rel="canonical" href="{SITE_URL}{page_path(char)}">
+    <link rel="icon" href="../favicon.png" type="image/png">
+    <style>
+        body {{
+            background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
+            color: #e6e6e6;
+            font-family: 'Segoe UI', sans-serif;
+            line-height: 1.6;
+            margin: 0;
+            padding: 20px;
+        }}
+        .container {{ max-width: 900px; margin: 0 auto; }}
+        a {{ color: #4cc9f0; text-decoration: none; }}
+        header {{
+            border-bottom: 2px solid #4cc9f0;
+            padding: 20px 0;
+            text-align: center;
+        }}
+        header img {{ width: 96px; height: 96px; border-radius: 50%; }}
+        h1 {{ color: #4cc9f0; margin: 10px 0 0; }}
+        .mode {{
+            background: rgba(30, 30, 46, 0.8);
+            border-radius: 8px;
+            margin: 20px 0;
+            padding: 15px 20px;
+        }}
+        .mode h2 {{ margin: 0 0 10px; font-size: 1.2rem; }}
+        .tier {{
+            border-radius: 4px;
+            color: #1a1a2e;
+            margin-right: 8px;
+            padding: 2px 8px;
+        }}
+{tier_colors}        .stat-ci {{ color: #a9a9a9; font-size: 0.85em; }}
+        .tooltip-nodes {{ border-collapse: collapse; margin-top: 8px; }}
+        .tooltip-nodes th, .tooltip-nodes td {{
+            padding: 2px 10px 2px 0;
+            text-align: right;
+        }}
+        .tooltip-nodes td:first-child {{ text-align: left; }}
+        .trend-badge {{ margin-left: 8px; font-size: 0.85em; }}
+        .trend-badge.up {{ color: #7fff7f; }}
+        .trend-badge.down {{ color: #ff7f7f; }}
+        footer {{ color: #a9a9a9; font-size: 0.9rem; text-align: center; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <a href="../index.html">&larr; Back to the tier list</a>
+        <header>
+            {icon_img_html(char, context["images"], prefix="../")}
+            <h1>{name}</h1>
+            <div class="roles">Roles: {escape(roles)}</div>
+        </header>
+        {"".join(sections)}
+        <footer>Stats for v{context["version"]}</footer>
+    </div>
+</body>
+</html>
+"""
+
+
+def _init_worker(context):
+    global _context
+    _context = context
+
+
+def _write_page(char):
+    path = os.path.join(_context["pages_dir"], f"{sanitize_filename(char)}.html")
+    atomic_write(path, character_page_html(char, _context), checksum=False)
+    return page_path(char)
+
+
+def render_character_pages(
+    tier_lists,
+    game_version,
+    characters_data,
+    role_data,
+    history_index=None,
+    aggregates=None,
+    pages_dir=PAGES_DIR,
+    workers=PAGE_WORKERS,
+    images=None,
+):
+    """Write a detail page per character, returning their site paths
+
+    Pages are rendered by a process pool over the roster. The dataset and
+    the rest of the context go to each worker once, through the pool
+    initializer, so tasks carry nothing but a character name.
+    """
+    context = {
+        "version": game_version,
+        "characters": characters_data,
+        "roles": role_data,
+        "modes": list(tier_lists),
+        "tiers": character_role_tiers(tier_lists),
+        "history_index": history_index,
+        "aggregates": aggregates,
+        "pages_dir": pages_dir,
+        "images": images if images is not None else build_image_manifest(),
+    }
+    roster = sorted(characters_data)
+    os.makedirs(pages_dir, exist_ok=True)
+
+    if workers <= 1:
+        _init_worker(context)
+        try:
+            return [_write_page(char) for char in roster]
+        finally:
+            _init_worker(None)
+
+    # A few chunks per worker keeps them evenly loaded with little overhead
+    chunksize = max(1, len(roster) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(context,)
+    ) as pool:
+        return list(pool.map(_write_page, roster, chunksize=chunksize))
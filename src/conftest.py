@@ -0,0 +1,44 @@
+# src/conftest.py
+import pandas as pd
+import pytest
+
+import data_processor
+
+COLUMNS = ["uid", "floor", "node", "star_num", "round_num", "ch1", "ch2", "ch3", "ch4"]
+MOC_ROWS = [
+    # uid 1: complete floor 12 clear
+    [1, 12, 1, 3, 4, "Acheron", "Pela", "Jiaoqiu", "Aventurine"],
+    [1, 12, 2, 3, 6, "Kafka", "Black Swan", "Ruan Mei", "Huohuo"],
+    # uid 2: complete floor 12 clear with a messy name
+    [2, 12, 1, 3, 2, " Acheron ", "Pela", "Sparkle", "Fu Xuan"],
+    [2, 12, 2, 3, 8, "Firefly", "Ruan Mei", None, "Lingsha"],
+    # uid 3: only one node, not a complete stage
+    [3, 12, 1, 3, 1, "Acheron", "Pela", "Jiaoqiu", "Aventurine"],
+    # uid 4: complete floor 11 two-star clear
+    [4, 11, 1, 2, 9, "Seele", "Sparkle", "Silver Wolf", "Fu Xuan"],
+    [4, 11, 2, 2, 7, "Acheron", "Pela", "Jiaoqiu", "Aventurine"],
+]
+
+
+@pytest.fixture(autouse=True)
+def quarantine_dir(tmp_path, monkeypatch):
+    # Processing a mode quarantines rejected rows; keep them out of the checkout
+    path = tmp_path / "quarantine"
+    monkeypatch.setattr(data_processor, "QUARANTINE_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def moc_rows():
+    """Raw MoC rows covering the headline slice, a lower slice and a lone node"""
+    return [list(row) for row in MOC_ROWS]
+
+
+@pytest.fixture
+def make_frame():
+    """Build a raw stats frame from rows in CSV column order"""
+
+    def build(rows):
+        return pd.DataFrame(rows, columns=COLUMNS)
+
+    return build
@@ -0,0 +1,109 @@
+# cooccurrence.py
+import numpy as np
+
+# Configuration
+TOP_PARTNERS = 3
+
+
+class PairMatrix:
+    """Sparse upper-triangular character x character co-occurrence counts"""
+
+    __slots__ = ("names", "rows", "cols", "counts", "value_sums", "_partners")
+
+    def __init__(self, names, rows, cols, counts, value_sums):
+        self.names = list(names)
+        self.rows = np.asarray(rows, dtype=np.int32)
+        self.cols = np.asarray(cols, dtype=np.int32)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.value_sums = np.asarray(value_sums, dtype=np.float64)
+        self._partners = None
+
+    @classmethod
+    def from_codes(cls, names, codes, values):
+        """Count every pair inside each team with one vectorized expansion
+
+        codes is an (n, 4) array indexing names (-1 for empty slots) and
+        values holds each team's cycles or score.
+        """
+        codes = np.sort(np.asarray(codes, dtype=np.int64), axis=1)
+        # A member listed twice still pairs once with each teammate
+        codes[:, 1:][codes[:, 1:] == codes[:, :-1]] = -1
+        values = np.asarray(values, dtype=np.float64)
+        first, second = np.triu_indices(codes.shape[1], k=1)
+        a = codes[:, first].ravel()
+        b = codes[:, second].ravel()
+        pair_values = np.repeat(values, len(first))
+        valid = (a >= 0) & (b >= 0) & (a != b)
+        a, b, pair_values = a[valid], b[valid], pair_values[valid]
+
+        size = len(names)
+        keys = np.minimum(a, b) * size + np.maximum(a, b)
+        present, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(present))
+        value_sums = np.bincount(inverse, weights=pair_values, minlength=len(present))
+        return cls(names, present // size, present % size, counts, value_sums)
+
+    def merge(self, other):
+        """Add another matrix's pair counts into this one"""
+        names = sorted(set(self.names) | set(other.names))
+        position = {name: i for i, name in enumerate(names)}
+        size = len(names)
+
+        def remap(matrix):
+            codes = np.array([position[name] for name in matrix.names], dtype=np.int64)
+            a, b = codes[matrix.rows], codes[matrix.cols]
+            return np.minimum(a, b) * size + np.maximum(a, b)
+
+        keys = np.concatenate([remap(self), remap(other)])
+        present, inverse = np.unique(keys, return_inverse=True)
+        self.names = names
+        self.rows = (present // size).astype(np.int32)
+        self.cols = (present % size).astype(np.int32)
+        self.counts = np.bincount(
+            inverse,
+            weights=np.concatenate([self.counts, other.counts]),
+            minlength=len(present),
+        ).astype(np.int64)
+        self.value_sums = np.bincount(
+            inverse,
+            weights=np.concatenate([self.value_sums, other.value_sums]),
+            minlength=len(present),
+        )
+        self._partners = None
+        return self
+
+    def partners(self, char):
+        """(partner, count, average value) for a character, most frequent first"""
+        if self._partners is None:
+            self._partners = {}
+            for i, j, count, value_sum in zip(
+                self.rows, self.cols, self.counts, self.value_sums
+            ):
+                entry = (int(count), float(value_sum) / int(count))
+                self._partners.setdefault(self.names[i], []).append(
+                    (self.names[j],) + entry
+                )
+                self._partners.setdefault(self.names[j], []).append(
+                    (self.names[i],) + entry
+                )
+            for partner_list in self._partners.values():
+                partner_list.sort(key=lambda p: (-p[1], p[0]))
+        return self._partners.get(char, [])
+
+    def top_partners(self, char, k=TOP_PARTNERS):
+        return self.partners(char)[:k]
+
+    def to_dict(self):
+        return {
+            "names": self.names,
+            "rows": self.rows.tolist(),
+            "cols": self.cols.tolist(),
+            "counts": self.counts.tolist(),
+            "value_sums": self.value_sums.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, raw):
+        return cls(
+            raw["names"], raw["rows"], raw["cols"], raw["counts"], raw["value_sums"]
+        )
@@ -1,13 +1,74 @@
 # data_processor.py
+import numpy as np
 import pandas as pd
-from collections import defaultdict
 import requests
-from io import StringIO
+from io import BufferedReader, BytesIO, RawIOBase
+import json
+import os
+import queue
 import re
-
+import threading
+
+from aggregate_cube import AggregateCube
+from atomic_io import atomic_write
+from bootstrap import ResampleTotals
+from cooccurrence import PairMatrix
+from dedup import Deduplicator
+from quantile_sketch import bucket_keys
+from schema import METRIC_KEYS
+from team_stats import TeamSummary
+
+# Optional multi-threaded CSV reader
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
 # Configuration
 BASE_URL = "https://raw.githubusercontent.com/{owner}/{repo}/main/{path}/"
 VERSION = "3.4.1"  # Update this for each new version
+CHAR_COLS = ["ch1", "ch2", "ch3", "ch4"]
+# The (floor, star_num) slice each mode's published stats come from
+HEADLINE_SLICES = {"moc": (12, 3), "pf": (4, 3), "as": (4, 3)}
+MODE_LABELS = {"moc": "MoC", "pf": "pf", "as": "as"}
+# Server region by the uid's leading digit; other digits are grouped as "Other"
+UID_REGIONS = {
+    1: "CN",
+    2: "CN",
+    5: "CN",
+    6: "America",
+    7: "Europe",
+    8: "Asia",
+    9: "TW/HK/MO",
+}
+REGION_NAMES = {digit: UID_REGIONS.get(digit, "Other") for digit in range(10)}
+INGEST_WORKERS = 1  # Above 1, uid partitions are aggregated in worker processes
+# Compact dtypes for the columns the processors use; everything else is skipped
+NUMERIC_DTYPES = {
+    "uid": "int64",
+    "floor": "int8",
+    "node": "int8",
+    "star_num": "int8",
+    "round_num": "int32",
+}
+USECOLS = [*NUMERIC_DTYPES, *CHAR_COLS]
+# Streaming downloads: rows parsed per chunk, and decoded bytes buffered ahead
+STREAM_CHUNK_ROWS = 100_000
+STREAM_BLOCK_BYTES = 64 * 1024
+STREAM_QUEUE_BLOCKS = 64  # Up to 4 MiB waiting between network and parser
+# Row validation: failing rows are set aside in QUARANTINE_DIR, not processed.
+# The bands below hold for the headline slice only; other floors score lower.
+MAX_CYCLES = 30  # A headline MoC stage can't take longer
+SCORE_BANDS = {"pf": (23000, 40000), "as": (3100, 4000)}  # As tierlist clamps
+SCORE_TOLERANCE = 0.5  # Scores this far beyond the band are treated as corrupt
+VALIDATION_RULES = [
+    "round_num_not_numeric",
+    "impossible_cycles",
+    "score_out_of_band",
+]
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROLES_PATH = os.path.join(SCRIPT_DIR, "character_roles.json")
+QUARANTINE_DIR = os.path.join(SCRIPT_DIR, "quarantine")
 
 
 def download_csv(url):
@@ -15,7 +76,220 @@ def download_csv(url):
     print(f"Downloading: {url}")
     response = requests.get(url)
     response.raise_for_status()
-    return StringIO(response.text)
+    return BytesIO(response.content)
+
+
+def _read_csv_arrow(source):
+    """Parse with pyarrow's multi-threaded reader into compact columns
+
+    Blank and NA-like cells become nulls in every column, as with pandas,
+    so empty team slots stay missing rather than turning into "".
+    """
+    column_types = {col: pa.from_numpy_dtype(t) for col, t in NUMERIC_DTYPES.items()}
+    for col in CHAR_COLS:
+        column_types[col] = pa.dictionary(pa.int32(), pa.string())
+    table = pa_csv.read_csv(
+        source,
+        read_options=pa_csv.ReadOptions(use_threads=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=column_types,
+            include_columns=USECOLS,
+            include_missing_columns=False,
+            strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas()
+
+
+def read_stats_csv(source):
+    """Read a stats CSV, keeping only the used columns in compact dtypes
+
+    Character columns come back categorical and numeric columns as small
+    integers, so prepare_frame has nothing left to convert. Files with
+    blank or non-numeric values fall back to a permissive parse.
+    """
+    if hasattr(source, "read"):
+        # Readers may consume the buffer, so keep the bytes for a retry
+        data = source.read()
+        data = data.encode() if isinstance(data, str) else data
+        source = None
+    else:
+        data = None
+
+    def buffer():
+        return BytesIO(data) if data is not None else source
+
+    if pa is not None:
+        try:
+            return _read_csv_arrow(buffer())
+        except (pa.ArrowInvalid, KeyError):
+            pass
+
+    def wanted(col):
+        return col in USECOLS
+
+    dtype = {col: "category" for col in CHAR_COLS}
+    try:
+        return pd.read_csv(buffer(), usecols=wanted, dtype={**NUMERIC_DTYPES, **dtype})
+    except (ValueError, OverflowError):
+        return pd.read_csv(buffer(), usecols=wanted, dtype=dtype, low_memory=False)
+
+
+class PrefetchReader(RawIOBase):
+    """Read a byte stream ahead in a background thread
+
+    A thread keeps pulling blocks from source into a bounded queue while the
+    consumer parses earlier ones, so waiting on the network overlaps with
+    parsing and at most max_blocks blocks are held at once.
+    """
+
+    def __init__(
+        self, source, block_size=STREAM_BLOCK_BYTES, max_blocks=STREAM_QUEUE_BLOCKS
+    ):
+        super().__init__()
+        # read1 hands over whatever has arrived instead of waiting for a full block
+        self._read = getattr(source, "read1", source.read)
+        self._block_size = block_size
+        self._blocks = queue.Queue(max_blocks)
+        self._pending = b""
+        self._done = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fill(self):
+        try:
+            while not self._stop.is_set():
+                block = self._read(self._block_size)
+                if not block:
+                    break
+                if not self._put(block):
+                    return
+            self._put(b"")
+        except Exception as e:  # Re-raised in the consumer
+            self._put(e)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending and not self._done:
+            item = self._blocks.get()
+            if isinstance(item, Exception):
+                self._done = True
+                raise item
+            if not item:
+                self._done = True
+            self._pending = item
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        super().close()
+
+
+def _compact_chunk(chunk):
+    """Shrink a parsed chunk's numeric columns where every value fits
+
+    A column with a value outside the compact dtype's range keeps its
+    parsed (wider) dtype; validate_rows rejects such rows later.
+    """
+    for col, dtype in NUMERIC_DTYPES.items():
+        if col in chunk.columns and pd.api.types.is_integer_dtype(chunk[col]):
+            limits = np.iinfo(dtype)
+            values = chunk[col]
+            if values.empty or (
+                values.min() >= limits.min and values.max() <= limits.max
+            ):
+                chunk[col] = values.astype(dtype)
+    return chunk
+
+
+def _slice_mask(chunk, slices):
+    mask = np.zeros(len(chunk), dtype=bool)
+    for floor, star_num in slices:
+        mask |= ((chunk["floor"] == floor) & (chunk["star_num"] == star_num)).to_numpy()
+    return mask
+
+
+def iter_csv_chunks(source, slices=None, chunk_rows=STREAM_CHUNK_ROWS, dedup=None):
+    """Parse a stats CSV stream incrementally into compact chunks
+
+    Only the used columns are kept, and with slices (a set of
+    (floor, star_num) pairs) only rows in those slices. Blank or
+    non-numeric values leave that chunk's column uncompacted rather than
+    failing the whole stream, the way read_stats_csv falls back. With a
+    Deduplicator, rows already seen in this or an earlier chunk are dropped.
+    """
+
+    def wanted(col):
+        return col in USECOLS
+
+    dtype = {col: "category" for col in CHAR_COLS}
+    with pd.read_csv(
+        source, usecols=wanted, dtype=dtype, chunksize=chunk_rows
+    ) as reader:
+        for chunk in reader:
+            chunk = _compact_chunk(chunk)
+            if slices is not None:
+                chunk = chunk[_slice_mask(chunk, slices)]
+            if dedup is not None:
+                chunk = dedup.filter(chunk)
+            yield chunk
+
+
+def concat_chunks(chunks):
+    """Join parsed chunks, keeping character columns categorical"""
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame(columns=USECOLS)
+    categories = {}
+    for col in CHAR_COLS:
+        if col in chunks[0].columns:
+            union = pd.api.types.union_categoricals(
+                [chunk[col] for chunk in chunks], ignore_order=True
+            )
+            categories[col] = union.categories
+    for chunk in chunks:
+        for col, values in categories.items():
+            chunk[col] = chunk[col].cat.set_categories(values)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def iter_download_chunks(
+    url, slices=None, chunk_rows=STREAM_CHUNK_ROWS, dedup=None
+):
+    """Download a stats CSV and parse it chunk by chunk as the bytes arrive
+
+    The response is gzip-compressed in transit and decompressed as it is
+    read; the full file is never held in memory.
+    """
+    print(f"Streaming: {url}")
+    with requests.get(
+        url, stream=True, headers={"Accept-Encoding": "gzip"}
+    ) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        with PrefetchReader(response.raw) as raw:
+            yield from iter_csv_chunks(BufferedReader(raw), slices, chunk_rows, dedup)
+
+
+def stream_stats_csv(url, slices=None, chunk_rows=STREAM_CHUNK_ROWS, dedup=None):
+    """Download, parse and (with a Deduplicator) deduplicate in one pass"""
+    return concat_chunks(iter_download_chunks(url, slices, chunk_rows, dedup))
 
 
 def normalize_name(name):
@@ -36,156 +310,512 @@ def normalize_name(name):
     return aliases.get(name, name)
 
 
-def process_moc_data(df):
-    """Process Memory of Chaos data"""
-    print(f"Processing MoC data ({len(df)} rows)")
+def normalize_names(values):
+    """Normalize a column of character names, one lookup per distinct value"""
+    uniques = pd.unique(values)
+    mapping = {name: normalize_name(name) for name in uniques}
+    return pd.Series(values).map(mapping).to_numpy()
 
-    # Convert character columns to string
-    char_cols = ["ch1", "ch2", "ch3", "ch4"]
-    for col in char_cols:
-        df[col] = df[col].astype(str)
 
-    # Convert to numeric and filter
-    df["floor"] = pd.to_numeric(df["floor"], errors="coerce")
-    df["star_num"] = pd.to_numeric(df["star_num"], errors="coerce")
-    df["round_num"] = pd.to_numeric(df["round_num"], errors="coerce")
+def prepare_frame(df):
+    """Coerce the raw CSV columns used by the processors"""
+    # Convert character columns to string (read_stats_csv already gives categories)
+    for col in CHAR_COLS:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str)
 
-    # Filter for Floor 12 and 3-star clears
-    filtered = df[(df["floor"] == 12) & (df["star_num"] == 3)]
-    print(f"After filtering: {len(filtered)} rows")
+    # Convert to numeric
+    for col in ("floor", "star_num", "round_num", "node"):
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
 
-    # Group by UID and floor to find complete stages
-    stage_groups = filtered.groupby(["uid", "floor"])
-    complete_stages = stage_groups.filter(
-        lambda x: len(x) == 2
-    )  # Only stages with both nodes
 
-    # Calculate statistics
-    total_stages = len(complete_stages) / 2
-    print(f"Total complete stages: {total_stages}")
+def load_known_names(path=ROLES_PATH):
+    """Character names in the roles file, or None if there isn't one"""
+    try:
+        with open(path) as f:
+            return set(json.load(f))
+    except FileNotFoundError:
+        return None
 
-    if total_stages == 0:
-        print("Warning: No complete stages found!")
-        return {}
 
-    char_stats = defaultdict(lambda: {"cycle_sum": 0, "count": 0})
+def count_unknown_names(df, known_names):
+    """{name: team slots holding it} for names that aren't in known_names
+
+    Rows naming a character the roles file doesn't list yet are kept (a new
+    release shouldn't drop its teams); the names are only reported.
+    """
+    counts = {}
+    if known_names is None:
+        return counts
+    for col in CHAR_COLS:
+        # One lookup per distinct value, not per row
+        per_value = df[col].value_counts()
+        names = normalize_names(per_value.index.to_numpy(dtype=object))
+        for name, count in zip(names, per_value.to_numpy()):
+            if name is not None and count and name not in known_names:
+                counts[name] = counts.get(name, 0) + int(count)
+    return dict(sorted(counts.items()))
+
+
+def validate_rows(df, mode):
+    """Split coerced rows into valid and rejected ones, counting every rule
+
+    Each rule is one mask over whole columns. A row failing several rules
+    counts towards each, and its rule column in the rejected frame names
+    the first. Cycle and score bands only apply to the mode's headline
+    slice.
+    """
+    values = pd.to_numeric(df["round_num"], errors="coerce").to_numpy(np.float64)
+    floor, star_num = HEADLINE_SLICES[mode]
+    headline = ((df["floor"] == floor) & (df["star_num"] == star_num)).to_numpy()
+    checks = {"round_num_not_numeric": np.isnan(values)}
+    if mode == "moc":
+        checks["impossible_cycles"] = (
+            (values < 0) | (values % 1 > 0) | (headline & (values > MAX_CYCLES))
+        )
+    else:
+        low, high = SCORE_BANDS[mode]
+        checks["score_out_of_band"] = headline & (
+            (values < low * (1 - SCORE_TOLERANCE))
+            | (values > high * (1 + SCORE_TOLERANCE))
+        )
+
+    rules = np.full(len(df), None, dtype=object)
+    for rule in reversed(list(checks)):
+        rules[checks[rule]] = rule
+    rejected = rules != None  # noqa: E711
+    counts = {rule: int(mask.sum()) for rule, mask in checks.items()}
+    return df[~rejected], df[rejected].assign(rule=rules[rejected]), counts
+
+
+def write_quarantine(rejected, mode, directory=QUARANTINE_DIR):
+    """Write a mode's rejected rows, with the rule each failed, to one CSV"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{mode}.csv")
+    atomic_write(path, rejected.to_csv(index=False))
+    return path
+
+
+def find_complete_stages(df):
+    """Keep rows whose (uid, floor, star_num) stage has both nodes"""
+    sizes = df.groupby(["uid", "floor", "star_num"])["uid"].transform("size")
+    return df[sizes == 2]
+
+
+def character_codes(stages):
+    """Normalized names and (rows x 4) codes into them, -1 for empty slots
+
+    Each distinct value is normalized once and only integer codes are
+    built per row. Names are sorted and limited to those in use, so
+    partitions agree with a single pass on every name's code order.
+    """
+    columns = []
+    for col in CHAR_COLS:
+        values = stages[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = values.cat.codes.to_numpy()
+            uniques = values.cat.categories.to_numpy(dtype=object)
+        else:
+            codes, uniques = pd.factorize(values.to_numpy(dtype=object))
+        columns.append((codes, normalize_names(uniques)))
+
+    names = sorted(
+        {name for _, normalized in columns for name in normalized if name is not None}
+    )
+    position = {name: i for i, name in enumerate(names)}
+    matrix = np.empty((len(stages), len(CHAR_COLS)), dtype=np.int64)
+    for slot, (codes, normalized) in enumerate(columns):
+        # Code -1 (an empty slot) picks the trailing -1
+        lookup = [position[name] if name is not None else -1 for name in normalized]
+        matrix[:, slot] = np.array([*lookup, -1], dtype=np.int64)[codes]
+
+    filled = matrix >= 0
+    used = np.bincount(matrix[filled], minlength=len(names)) > 0
+    remap = np.full(len(names), -1, dtype=np.int64)
+    remap[used] = np.arange(int(used.sum()))
+    matrix[filled] = remap[matrix[filled]]
+    return [name for name, keep in zip(names, used) if keep], matrix
+
+
+def uid_leading_digits(uids):
+    """Leading decimal digit of each uid (0 for missing or non-positive uids)"""
+    uids = np.nan_to_num(np.asarray(uids, dtype=np.float64)).astype(np.int64)
+    powers = 10 ** np.arange(19, dtype=np.int64)
+    exponents = np.searchsorted(powers, uids, side="right") - 1
+    digits = uids // powers[np.maximum(exponents, 0)]
+    digits[uids <= 0] = 0
+    return digits.astype(np.int8)
+
+
+def explode_characters(stages, codes, regions=None):
+    """One row per character appearance in a complete stage"""
+    columns = {
+        "floor": stages["floor"].to_numpy(),
+        "star_num": stages["star_num"].to_numpy(),
+        "value": stages["round_num"].to_numpy(),
+    }
+    if regions is not None:
+        columns["region"] = regions
+    if "node" in stages.columns:
+        columns["node"] = stages["node"].to_numpy()
+    long = pd.DataFrame(
+        {name: np.tile(values, len(CHAR_COLS)) for name, values in columns.items()}
+    )
+    # Characters stay integer codes into names while grouping
+    long["character"] = codes.T.ravel()
+    return long[long["character"] >= 0]
 
-    for _, row in complete_stages.iterrows():
-        cycles = row["round_num"]
-        for char_col in char_cols:
-            char_name = normalize_name(row[char_col])
-            if not char_name:  # Skip None values
-                continue
-            char_stats[char_name]["cycle_sum"] += cycles
-            char_stats[char_name]["count"] += 1
 
-    # Calculate averages
-    results = {}
-    for char, stats in char_stats.items():
-        avg_cycles = stats["cycle_sum"] / stats["count"]
-        usage_rate = stats["count"] / total_stages * 100
-        results[char] = {"cycles": avg_cycles, "usage": usage_rate}
+def _name_regions(frame):
+    """Replace leading-digit region codes with names, merging shared names"""
+    levels = list(frame.index.names)
+    return frame.rename(index=REGION_NAMES, level="region").groupby(level=levels).sum()
 
-    print(f"Processed {len(results)} characters for MoC")
-    return results
 
+def _name_characters(frame, names):
+    """Replace character codes in a grouped frame's index with names"""
+    return frame.rename(index=dict(enumerate(names)), level="character")
 
-def process_score_data(df, mode):
-    """Process Pure Fiction or Apocalyptic Shadow data"""
-    print(f"Processing {mode} data ({len(df)} rows)")
 
-    # Convert character columns to string
-    char_cols = ["ch1", "ch2", "ch3", "ch4"]
-    for col in char_cols:
-        df[col] = df[col].astype(str)
+def build_cube(stages, names, codes, mode):
+    """Aggregate every (floor, star_num, character) slice in one pass
 
-    # Convert to numeric and filter
-    df["floor"] = pd.to_numeric(df["floor"], errors="coerce")
-    df["star_num"] = pd.to_numeric(df["star_num"], errors="coerce")
-    df["round_num"] = pd.to_numeric(df["round_num"], errors="coerce")
+    The pass groups by uid region and node as well; pooled, per-region and
+    per-node cells are then summed from those small groups. codes index
+    names, as character_codes returns them.
+    """
+    regions = uid_leading_digits(stages["uid"].to_numpy())
+    region_stages = (
+        stages.groupby(
+            [stages["floor"], stages["star_num"], pd.Series(regions, stages.index)]
+        ).size()
+        // 2
+    )
+    region_stages.index.names = ["floor", "star_num", "region"]
+    stage_counts = region_stages.groupby(level=["floor", "star_num"]).sum()
+
+    long = explode_characters(stages, codes, regions)
+    # Quantile sketch bucket counts; missing values have no bucket and drop out
+    long["bucket"] = bucket_keys(long["value"].to_numpy())
+    long["value_sq"] = long["value"].astype(np.float64) ** 2
+    totals = {
+        "value_sum": ("value", "sum"),
+        "count": ("value", "size"),
+        "value_sumsq": ("value_sq", "sum"),
+    }
+    bucket_counts = long.groupby(
+        ["floor", "star_num", "character", "bucket"], sort=False
+    ).size()
+
+    has_node = "node" in long.columns
+    keys = ["floor", "star_num", "region", "node", "character"]
+    if not has_node:
+        keys.remove("node")
+    # dropna=False keeps rows with a missing node in the pooled totals
+    frame = long.groupby(keys, sort=False, dropna=False).agg(**totals)
+
+    cell_frame = frame.groupby(level=["floor", "star_num", "character"]).sum()
+    region_frame = frame.groupby(
+        level=["floor", "star_num", "region", "character"]
+    ).sum()
+    node_frame = None
+    if has_node:
+        node_frame = frame.groupby(
+            level=["floor", "star_num", "node", "character"], dropna=False
+        ).sum()
+    return AggregateCube.from_frames(
+        mode,
+        _name_characters(cell_frame, names),
+        stage_counts,
+        None if node_frame is None else _name_characters(node_frame, names),
+        _name_characters(bucket_counts, names),
+        _name_characters(_name_regions(region_frame), names),
+        _name_regions(region_stages),
+    )
 
-    # Filter for Floor 4 and 3-star clears
-    filtered = df[(df["floor"] == 4) & (df["star_num"] == 3)]
-    print(f"After filtering: {len(filtered)} rows")
 
-    # Group by UID and floor to find complete stages
-    stage_groups = filtered.groupby(["uid", "floor"])
-    complete_stages = stage_groups.filter(
-        lambda x: len(x) == 2
-    )  # Only stages with both nodes
+def aggregate_partition(df, mode):
+    """Mergeable aggregates for deduplicated, coerced rows of one mode
+
+    Every row of a uid must be in the same partition, since complete
+    stages are found within it.
+    """
+    stages = find_complete_stages(df)
+    names, codes = character_codes(stages)
+    cube = build_cube(stages, names, codes, mode)
+
+    floor, star_num = HEADLINE_SLICES[mode]
+    in_headline = (stages["floor"] == floor) & (stages["star_num"] == star_num)
+    headline = in_headline.to_numpy()
+    headline_codes = codes[headline]
+    headline_values = stages["round_num"].to_numpy()[headline]
+    # A uid has one stage in the headline slice, so it names the stage
+    headline_uids = stages["uid"].to_numpy()[headline]
+
+    return {
+        "cube": cube,
+        "pairs": PairMatrix.from_codes(names, headline_codes, headline_values),
+        "teams": TeamSummary.from_codes(names, headline_codes, headline_values),
+        "resamples": ResampleTotals.from_codes(
+            headline_uids, names, headline_codes, headline_values
+        ),
+    }
+
+
+def merge_partials(partials):
+    """Combine aggregate_partition results from disjoint uid partitions
+
+    Team summaries and resample totals are optional (None); if any
+    partition lacks one, the merged result lacks it too.
+    """
+    merged = partials[0]
+    for partial in partials[1:]:
+        merged["cube"].merge(partial["cube"])
+        merged["pairs"].merge(partial["pairs"])
+        for key in ("teams", "resamples"):
+            if merged[key] is None or partial[key] is None:
+                merged[key] = None
+            else:
+                merged[key].merge(partial[key])
+        unknown = merged.setdefault("unknown_names", {})
+        for name, count in partial.get("unknown_names", {}).items():
+            unknown[name] = unknown.get(name, 0) + count
+    return merged
+
+
+def clean_rows(df, mode, deduplicate=True):
+    """Validate and deduplicate coerced rows
+
+    Returns the kept rows, the rejected ones (with the rule each failed),
+    the per-rule counts and how many duplicates were dropped. Nothing is
+    printed or written, so partitions can be cleaned in worker processes.
+    Pass deduplicate=False when duplicates were dropped while streaming.
+    """
+    df, rejected, rule_counts = validate_rows(df, mode)
+    duplicates = 0
+    if deduplicate:
+        # Repeated uploads would inflate counts and break the two-node stage check
+        with Deduplicator() as dedup:
+            df = dedup.filter(df)
+        duplicates = dedup.dropped
+    return df, rejected, rule_counts, duplicates
+
+
+def process_partition(df, mode, known_names=None, deduplicate=True):
+    """Clean and aggregate coerced rows holding every row of their uids
+
+    Names missing from known_names are counted in the partial's
+    "unknown_names", not rejected.
+    """
+    df, rejected, rule_counts, duplicates = clean_rows(df, mode, deduplicate)
+    floor, star_num = HEADLINE_SLICES[mode]
+    in_slice = (df["floor"] == floor) & (df["star_num"] == star_num)
+    partial = aggregate_partition(df, mode)
+    partial["unknown_names"] = count_unknown_names(df, known_names)
+    return {
+        "partial": partial,
+        "rejected": rejected,
+        "rule_counts": rule_counts,
+        "duplicates": duplicates,
+        "rows": len(df),
+        "headline_rows": int(in_slice.sum()),
+    }
+
+
+def combine_partitions(results, mode, duplicates=None):
+    """Merge process_partition results and quarantine their rejected rows
+
+    Returns the merged partial aggregates, the duplicate count (duplicates,
+    when they were already dropped while streaming) and the per-rule
+    counts of rejected rows.
+    """
+    rule_counts = {}
+    for result in results:
+        for rule, count in result["rule_counts"].items():
+            rule_counts[rule] = rule_counts.get(rule, 0) + count
+    rejected = pd.concat([result["rejected"] for result in results]).sort_index()
+    if len(rejected):
+        path = write_quarantine(rejected, mode, QUARANTINE_DIR)
+        print(f"Quarantined {len(rejected)} invalid rows to {path}: {rule_counts}")
+
+    if duplicates is None:
+        duplicates = sum(result["duplicates"] for result in results)
+    print(f"Dropped {duplicates} duplicate rows")
+    print(f"After filtering: {sum(r['headline_rows'] for r in results)} rows")
+    partial = merge_partials([result["partial"] for result in results])
+    return partial, duplicates, rule_counts
+
+
+def summarize_partial(partial, mode, aggregates=None, duplicates=0, rejected=None):
+    """Headline slice stats for a mode from its (merged) partial aggregates
+
+    rejected holds the per-rule counts of quarantined rows.
+    """
+    label = MODE_LABELS[mode]
+    floor, star_num = HEADLINE_SLICES[mode]
+    cube = partial["cube"]
+    unknown = dict(sorted(partial.get("unknown_names", {}).items()))
+    if unknown:
+        print(f"Warning: characters missing from {ROLES_PATH}: {unknown}")
+    if aggregates is not None:
+        aggregates.setdefault(mode, {}).update(
+            cube=cube,
+            duplicates=duplicates,
+            rejected=rejected or {},
+            unknown_names=unknown,
+            pairs=partial["pairs"],
+        )
 
     # Calculate statistics
-    total_stages = len(complete_stages) / 2
+    total_stages = cube.stages.get((floor, star_num), 0)
     print(f"Total complete stages: {total_stages}")
 
     if total_stages == 0:
         print("Warning: No complete stages found!")
         return {}
 
-    char_stats = defaultdict(lambda: {"score_sum": 0, "count": 0})
+    results = cube.slice(floor, star_num)
+    region_results = cube.region_slice(floor, star_num)
+    node_results = cube.node_slice(floor, star_num)
+    quantiles = cube.quantile_slice(floor, star_num)
+
+    # Fewer cycles is better in MoC, a higher score everywhere else
+    char_teams, intervals = {}, {}
+    if partial["teams"] is not None:
+        char_teams = partial["teams"].top_teams(lower_is_better=mode == "moc")
+    if partial["resamples"] is not None:
+        intervals = partial["resamples"].intervals()
+    metric = METRIC_KEYS[mode]
+    for char, stats in results.items():
+        if char in quantiles:
+            stats["quantiles"] = quantiles[char]
+        if char in region_results:
+            stats["regions"] = region_results[char]
+        if char in node_results:
+            stats["nodes"] = node_results[char]
+        if char in char_teams:
+            stats["teams"] = char_teams[char]
+        if char in intervals:
+            stats["ci"] = {
+                metric: intervals[char]["metric"],
+                "usage": intervals[char]["usage"],
+            }
+
+    print(f"Processed {len(results)} characters for {label}")
+    return results
+
 
-    for _, row in complete_stages.iterrows():
-        score = row["round_num"]
-        for char_col in char_cols:
-            char_name = normalize_name(row[char_col])
-            if not char_name:  # Skip None values
-                continue
-            char_stats[char_name]["score_sum"] += score
-            char_stats[char_name]["count"] += 1
+def process_mode_data(
+    df, mode, aggregates=None, workers=INGEST_WORKERS, duplicates=None
+):
+    """Build the mode's aggregate cube and return its headline slice
+
+    With workers above 1 the rows are split into uid-hash partitions that
+    are validated, deduplicated and aggregated in worker processes, then
+    merged; the output is the same. Pass duplicates when the rows were
+    already deduplicated while streaming.
+    """
+    print(f"Processing {MODE_LABELS[mode]} data ({len(df)} rows)")
+    df = prepare_frame(df)
+    known_names = load_known_names(ROLES_PATH)
+    deduplicate = duplicates is None
+    if workers > 1:
+        from parallel_ingest import process_partitions
+
+        results = process_partitions(df, mode, workers, known_names, deduplicate)
+    else:
+        results = [process_partition(df, mode, known_names, deduplicate)]
+    partial, duplicates, rejected = combine_partitions(results, mode, duplicates)
+    return summarize_partial(partial, mode, aggregates, duplicates, rejected)
 
-    # Calculate averages
-    results = {}
-    for char, stats in char_stats.items():
-        avg_score = stats["score_sum"] / stats["count"]
-        usage_rate = stats["count"] / total_stages * 100
-        results[char] = {"score": avg_score, "usage": usage_rate}
 
-    print(f"Processed {len(results)} characters for {mode}")
-    return results
+def process_moc_data(df, aggregates=None, workers=INGEST_WORKERS, duplicates=None):
+    """Process Memory of Chaos data"""
+    return process_mode_data(df, "moc", aggregates, workers, duplicates)
 
 
-def get_processed_data(version=VERSION, owner="owner", repo="repo", path="path"):
-    """Get all processed data from GitHub CSVs"""
-    # Download and process MOC data
-    moc_url = f"{BASE_URL.format(owner=owner, repo=repo, path=path)}{version}.csv"
+def process_score_data(
+    df, mode, aggregates=None, workers=INGEST_WORKERS, duplicates=None
+):
+    """Process Pure Fiction or Apocalyptic Shadow data"""
+    return process_mode_data(df, mode, aggregates, workers, duplicates)
+
+
+def mode_urls(version=VERSION, owner="owner", repo="repo", path="path"):
+    """Raw CSV URL of each mode's stats for a version"""
+    base = BASE_URL.format(owner=owner, repo=repo, path=path)
+    return {
+        "moc": f"{base}{version}.csv",
+        "pf": f"{base}{version}_pf.csv",
+        "as": f"{base}{version}_as.csv",
+    }
+
+
+def get_processed_data(
+    version=VERSION,
+    owner="owner",
+    repo="repo",
+    path="path",
+    aggregates=None,
+    workers=INGEST_WORKERS,
+    strict=False,
+):
+    """Get all processed data from GitHub CSVs
+
+    Pass a dict as aggregates to also collect each mode's aggregate cube.
+    Without it only the headline slice's rows are kept while streaming.
+    A mode that fails is reported and left empty, or with strict, raised.
+    """
+
+    def slices(mode):
+        return None if aggregates is not None else {HEADLINE_SLICES[mode]}
+
+    urls = mode_urls(version, owner, repo, path)
+
+    # Download and process MOC data, dropping duplicate rows as they stream in
     try:
-        moc_df = pd.read_csv(download_csv(moc_url))
-        moc_data = process_moc_data(moc_df)
+        with Deduplicator() as dedup:
+            moc_df = stream_stats_csv(urls["moc"], slices("moc"), dedup=dedup)
+        moc_data = process_moc_data(moc_df, aggregates, workers, dedup.dropped)
     except Exception as e:
         print(f"Error processing MoC data: {str(e)}")
+        if strict:
+            raise
         moc_data = {}
 
     # Download and process Pure Fiction data
-    pf_url = f"{BASE_URL.format(owner=owner, repo=repo, path=path)}{version}_pf.csv"
     try:
-        pf_df = pd.read_csv(download_csv(pf_url))
-        pf_data = process_score_data(pf_df, "pf")
+        with Deduplicator() as dedup:
+            pf_df = stream_stats_csv(urls["pf"], slices("pf"), dedup=dedup)
+        pf_data = process_score_data(pf_df, "pf", aggregates, workers, dedup.dropped)
     except Exception as e:
         print(f"Error processing PF data: {str(e)}")
+        if strict:
+            raise
         pf_data = {}
 
     # Download and process Apocalyptic Shadow data
-    as_url = f"{BASE_URL.format(owner=owner, repo=repo, path=path)}{version}_as.csv"
     try:
-        as_df = pd.read_csv(download_csv(as_url))
-        as_data = process_score_data(as_df, "as")
+        with Deduplicator() as dedup:
+            as_df = stream_stats_csv(urls["as"], slices("as"), dedup=dedup)
+        as_data = process_score_data(as_df, "as", aggregates, workers, dedup.dropped)
     except Exception as e:
         print(f"Error processing AS data: {str(e)}")
+        if strict:
+            raise
         as_data = {}
 
-    # Combine all data
-    all_chars = set(moc_data.keys()) | set(pf_data.keys()) | set(as_data.keys())
-    combined = {}
+    return combine_modes({"moc": moc_data, "pf": pf_data, "as": as_data})
 
-    for char in all_chars:
-        char_data = {}
-        if char in moc_data:
-            char_data["moc"] = moc_data[char]
-        if char in pf_data:
-            char_data["pf"] = pf_data[char]
-        if char in as_data:
-            char_data["as"] = as_data[char]
-        combined[char] = char_data
+
+def combine_modes(mode_data):
+    """Regroup {mode: {character: stats}} into {character: {mode: stats}}"""
+    combined = {}
+    for mode in ("moc", "pf", "as"):
+        for char, stats in mode_data.get(mode, {}).items():
+            combined.setdefault(char, {})[mode] = stats
 
     print(f"Final dataset has {len(combined)} characters")
     return combined
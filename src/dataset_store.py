@@ -0,0 +1,288 @@
+# dataset_store.py
+import math
+import os
+import sqlite3
+
+from schema import MODE_TYPES, CharacterStats
+
+# Configuration
+MAX_SNAPSHOTS = 520  # Roughly ten years of weekly updates
+MAX_STORE_BYTES = 20 * 1024 * 1024  # Oldest snapshots are folded away past this size
+
+# Each (character, mode) only gets a row when its stats change between
+# snapshots. A row with NULL metric and usage marks the character as absent
+# from that snapshot onwards.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    version TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    character TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    snapshot_id INTEGER NOT NULL,
+    metric REAL,
+    usage REAL,
+    PRIMARY KEY (character, mode, snapshot_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS stats_by_snapshot ON stats (snapshot_id);
+"""
+
+
+def open_store(store_path):
+    """Open the snapshot store, creating the schema if needed"""
+    directory = os.path.dirname(store_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(store_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _flatten(characters):
+    """Map (character, mode) to the (metric, usage) pair stored for it"""
+    flat = {}
+    for char, stats in characters.items():
+        for mode, mode_stats in stats.modes():
+            flat[(char, mode)] = (mode_stats.metric, mode_stats.usage)
+    return flat
+
+
+def _state_at(conn, snapshot_id=None):
+    """Reconstruct the (character, mode) state as of a snapshot"""
+    query = """
+        SELECT s.character, s.mode, s.metric, s.usage
+        FROM stats s
+        JOIN (
+            SELECT character, mode, MAX(snapshot_id) AS sid
+            FROM stats
+            WHERE snapshot_id <= ?
+            GROUP BY character, mode
+        ) latest
+        ON s.character = latest.character
+        AND s.mode = latest.mode
+        AND s.snapshot_id = latest.sid
+        WHERE s.metric IS NOT NULL
+    """
+    limit = snapshot_id if snapshot_id is not None else 2**62
+    return {
+        (char, mode): (metric, usage)
+        for char, mode, metric, usage in conn.execute(query, (limit,))
+    }
+
+
+def _unflatten(flat):
+    """Turn (character, mode) pairs back into CharacterStats"""
+    characters = {}
+    for (char, mode), (metric, usage) in flat.items():
+        if char not in characters:
+            characters[char] = CharacterStats(char)
+        characters[char].set_mode(mode, MODE_TYPES[mode](metric, usage))
+    return characters
+
+
+def _store_bytes(conn):
+    """Bytes actually used by the store, ignoring free pages"""
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return page_size * (page_count - free_pages)
+
+
+def _prune_oldest(conn):
+    """Fold the oldest snapshot into the next one"""
+    ids = [
+        row[0]
+        for row in conn.execute("SELECT id FROM snapshots ORDER BY id LIMIT 2")
+    ]
+    if len(ids) < 2:
+        return False
+    oldest, base = ids
+
+    # Rows that were still current at the next snapshot move forward with it
+    conn.execute(
+        """
+        UPDATE stats SET snapshot_id = ?
+        WHERE snapshot_id = ?
+        AND NOT EXISTS (
+            SELECT 1 FROM stats t
+            WHERE t.character = stats.character
+            AND t.mode = stats.mode
+            AND t.snapshot_id = ?
+        )
+        """,
+        (base, oldest, base),
+    )
+    conn.execute("DELETE FROM stats WHERE snapshot_id = ?", (oldest,))
+    # Absence markers carry no information on the first snapshot
+    conn.execute(
+        "DELETE FROM stats WHERE snapshot_id = ? AND metric IS NULL", (base,)
+    )
+    conn.execute("DELETE FROM snapshots WHERE id = ?", (oldest,))
+    return True
+
+
+def enforce_cap(conn, max_snapshots=MAX_SNAPSHOTS, max_bytes=MAX_STORE_BYTES):
+    """Drop the oldest snapshots until the store fits its limits"""
+    count = conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+    excess = max(0, count - max_snapshots)
+
+    used = _store_bytes(conn)
+    if used > max_bytes and count > 1:
+        per_snapshot = used / count
+        excess = max(excess, math.ceil((used - max_bytes) / per_snapshot))
+
+    # Always keep the newest snapshot
+    excess = min(excess, count - 1)
+    if excess <= 0:
+        return 0
+
+    with conn:
+        for _ in range(excess):
+            _prune_oldest(conn)
+    conn.execute("VACUUM")
+    print(f"Pruned {excess} old snapshot(s) from the dataset store")
+    return excess
+
+
+def append_snapshot(
+    store_path,
+    version,
+    timestamp,
+    characters,
+    max_snapshots=MAX_SNAPSHOTS,
+    max_bytes=MAX_STORE_BYTES,
+):
+    """Store a dataset snapshot as a delta against the previous one"""
+    conn = open_store(store_path)
+    try:
+        with conn:
+            previous = _state_at(conn)
+            current = _flatten(characters)
+            cursor = conn.execute(
+                "INSERT INTO snapshots (version, timestamp) VALUES (?, ?)",
+                (version, timestamp),
+            )
+            snapshot_id = cursor.lastrowid
+
+            rows = [
+                (char, mode, snapshot_id, metric, usage)
+                for (char, mode), (metric, usage) in current.items()
+                if previous.get((char, mode)) != (metric, usage)
+            ]
+            rows.extend(
+                (char, mode, snapshot_id, None, None)
+                for char, mode in previous.keys() - current.keys()
+            )
+            conn.executemany("INSERT INTO stats VALUES (?, ?, ?, ?, ?)", rows)
+
+        print(
+            f"Stored snapshot {snapshot_id} ({len(rows)} changed entries "
+            f"of {len(current)})"
+        )
+        enforce_cap(conn, max_snapshots, max_bytes)
+        return snapshot_id
+    finally:
+        conn.close()
+
+
+def list_snapshots(store_path):
+    """List (id, version, timestamp) for every stored snapshot"""
+    if not os.path.exists(store_path):
+        return []
+    conn = open_store(store_path)
+    try:
+        return conn.execute(
+            "SELECT id, version, timestamp FROM snapshots ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def load_snapshot(store_path, snapshot_id=None):
+    """Rebuild a full dataset, defaulting to the newest snapshot"""
+    conn = open_store(store_path)
+    try:
+        if snapshot_id is None:
+            row = conn.execute(
+                "SELECT id, version, timestamp FROM snapshots ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        else:
+            row = conn.execute(
+                "SELECT id, version, timestamp FROM snapshots WHERE id = ?",
+                (snapshot_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "version": row[1],
+            "last_updated": row[2],
+            "characters": _unflatten(_state_at(conn, row[0])),
+        }
+    finally:
+        conn.close()
+
+
+def iter_snapshots(store_path):
+    """Yield ((id, version, timestamp), characters) replaying deltas in order"""
+    conn = open_store(store_path)
+    try:
+        snapshots = conn.execute(
+            "SELECT id, version, timestamp FROM snapshots ORDER BY id"
+        ).fetchall()
+        rows = conn.execute(
+            "SELECT snapshot_id, character, mode, metric, usage "
+            "FROM stats ORDER BY snapshot_id"
+        )
+        state = {}
+        pending = next(rows, None)
+        for snapshot in snapshots:
+            while pending is not None and pending[0] <= snapshot[0]:
+                _, char, mode, metric, usage = pending
+                if metric is None:
+                    state.pop((char, mode), None)
+                else:
+                    state[(char, mode)] = (metric, usage)
+                pending = next(rows, None)
+            yield snapshot, _unflatten(state)
+    finally:
+        conn.close()
+
+
+def character_history(store_path, character):
+    """Stats for one character across every snapshot, oldest first"""
+    conn = open_store(store_path)
+    try:
+        snapshots = conn.execute(
+            "SELECT id, version, timestamp FROM snapshots ORDER BY id"
+        ).fetchall()
+        # Served from the (character, mode, snapshot_id) primary key
+        rows = conn.execute(
+            "SELECT snapshot_id, mode, metric, usage FROM stats "
+            "WHERE character = ? ORDER BY snapshot_id",
+            (character,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    history = []
+    state = {}
+    index = 0
+    for snapshot_id, version, timestamp in snapshots:
+        while index < len(rows) and rows[index][0] <= snapshot_id:
+            _, mode, metric, usage = rows[index]
+            if metric is None:
+                state.pop(mode, None)
+            else:
+                state[mode] = MODE_TYPES[mode](metric, usage)
+            index += 1
+        history.append(
+            {
+                "snapshot": snapshot_id,
+                "version": version,
+                "timestamp": timestamp,
+                "stats": dict(state),
+            }
+        )
+    return history
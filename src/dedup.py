@@ -0,0 +1,113 @@
+# dedup.py
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Configuration
+KEY_COLUMNS = ["uid", "floor", "node", "ch1", "ch2", "ch3", "ch4", "round_num"]
+NUMERIC_KEYS = {"uid", "floor", "node", "round_num"}  # Hashed as float64
+MEMORY_KEYS = 1_000_000  # Hashes held in memory (8 bytes each) before spilling
+
+
+def row_hashes(df, columns=KEY_COLUMNS):
+    """64-bit hash of each row's key columns (columns the frame lacks are skipped)
+
+    Numbers are hashed as float64, so a row hashes the same whether its
+    chunk parsed a column as int8 or, around a blank value, as float64.
+    Non-numeric values in those columns all hash like a blank.
+    """
+    keys = {}
+    for col in columns:
+        if col not in df.columns:
+            continue
+        values = df[col]
+        if col in NUMERIC_KEYS:
+            values = pd.to_numeric(values, errors="coerce").astype(np.float64)
+        keys[col] = values
+    return pd.util.hash_pandas_object(pd.DataFrame(keys), index=False).to_numpy()
+
+
+def _contains(run, keys):
+    """Membership of keys in a sorted array"""
+    if len(run) == 0:
+        return np.zeros(len(keys), dtype=bool)
+    positions = np.searchsorted(run, keys)
+    return run[np.minimum(positions, len(run) - 1)] == keys
+
+
+class Deduplicator:
+    """Drop rows whose key hash has been seen before, across any number of chunks
+
+    Seen hashes stay in one sorted in-memory array until it holds max_keys,
+    then it is written out as a sorted run and memory-mapped, so memory use
+    stays bounded however much data streams through.
+    """
+
+    def __init__(self, max_keys=MEMORY_KEYS, spill_dir=None, columns=KEY_COLUMNS):
+        self.max_keys = max_keys
+        self.spill_dir = spill_dir
+        self.columns = columns
+        self.dropped = 0
+        self.kept = 0
+        self._memory = np.empty(0, dtype=np.uint64)
+        self._runs = []
+        self._tempdir = None
+
+    def seen(self, keys):
+        """Which of these hashes were already recorded"""
+        found = _contains(self._memory, keys)
+        for run in self._runs:
+            found |= _contains(run, keys)
+        return found
+
+    def mask(self, df):
+        """Boolean mask of the rows in df that are new, recording them as seen"""
+        keys = row_hashes(df, self.columns)
+        # First occurrence of each hash inside this chunk
+        unique_keys, first = np.unique(keys, return_index=True)
+        new = ~self.seen(unique_keys)
+
+        keep = np.zeros(len(df), dtype=bool)
+        keep[first[new]] = True
+        self._record(unique_keys[new])
+
+        kept = int(keep.sum())
+        self.kept += kept
+        self.dropped += len(df) - kept
+        return keep
+
+    def filter(self, df):
+        """The rows of df that have not been seen before"""
+        return df[self.mask(df)]
+
+    def _record(self, keys):
+        # keys are unique and sorted, and none are in memory yet
+        if len(keys) == 0:
+            return
+        self._memory = np.union1d(self._memory, keys)
+        if len(self._memory) >= self.max_keys:
+            self._spill()
+
+    def _spill(self):
+        if self._tempdir is None:
+            self._tempdir = tempfile.mkdtemp(prefix="dedup-", dir=self.spill_dir)
+        path = os.path.join(self._tempdir, f"run{len(self._runs)}.npy")
+        np.save(path, self._memory)
+        self._runs.append(np.load(path, mmap_mode="r"))
+        self._memory = np.empty(0, dtype=np.uint64)
+
+    def close(self):
+        """Remove any spilled runs"""
+        self._runs = []
+        if self._tempdir is not None:
+            shutil.rmtree(self._tempdir, ignore_errors=True)
+            self._tempdir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
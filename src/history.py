@@ -0,0 +1,116 @@
+# history.py
+import json
+import os
+
+from atomic_io import atomic_write, read_verified
+from dataset_store import iter_snapshots
+from serialization import dumps, loads
+from tierlist import ROLES_PATH, calculate_scores, generate_role_based_tier_lists
+
+# Configuration
+HISTORY_INDEX_PATH = "history_index.json"
+TIER_ORDER = ["S", "A", "B", "C", "D"]
+MODE_KEYS = {
+    "Memory of Chaos": "moc",
+    "Pure Fiction": "pf",
+    "Apocalyptic Shadow": "as",
+    "General Tier List": "general",
+}
+
+
+def character_tiers(tier_lists, role_data):
+    """Find each character's tier per mode, using their first listed role"""
+    tiers = {}
+    for mode_name, roles in tier_lists.items():
+        mode = MODE_KEYS[mode_name]
+        for role, role_tiers in roles.items():
+            for tier, chars in role_tiers.items():
+                for char in chars:
+                    if role_data.get(char, [None])[0] == role:
+                        tiers.setdefault(char, {})[mode] = tier
+    return tiers
+
+
+def general_usage(stats):
+    """Average usage over the modes a character appears in"""
+    usages = [mode_stats.usage for _, mode_stats in stats.modes()]
+    return sum(usages) / len(usages) if usages else None
+
+
+def build_history_index(store_path, roles_path=ROLES_PATH):
+    """Precompute per-character time series and tier movements from the store"""
+    with open(roles_path) as f:
+        role_data = json.load(f)
+
+    snapshots = []
+    series = {}
+    for position, ((snapshot_id, version, timestamp), characters) in enumerate(
+        iter_snapshots(store_path)
+    ):
+        snapshots.append(
+            {"id": snapshot_id, "version": version, "timestamp": timestamp}
+        )
+        scores = calculate_scores(characters)
+        tier_lists = generate_role_based_tier_lists(characters, scores, role_data)
+        tiers = character_tiers(tier_lists, role_data)
+
+        for char, stats in characters.items():
+            char_series = series.setdefault(char, {})
+            points = {
+                mode: (mode_stats.metric, mode_stats.usage)
+                for mode, mode_stats in stats.modes()
+            }
+            points["general"] = (None, general_usage(stats))
+
+            for mode, (metric, usage) in points.items():
+                mode_series = char_series.setdefault(
+                    mode, {"metric": [], "usage": [], "tier": []}
+                )
+                # Pad snapshots the character was missing from
+                for values in mode_series.values():
+                    values.extend([None] * (position - len(values)))
+                mode_series["metric"].append(metric)
+                mode_series["usage"].append(usage)
+                mode_series["tier"].append(tiers.get(char, {}).get(mode))
+
+    for char_series in series.values():
+        for mode_series in char_series.values():
+            for values in mode_series.values():
+                values.extend([None] * (len(snapshots) - len(values)))
+            mode_series["movement"] = tier_movement(snapshots, mode_series["tier"])
+
+    return {"snapshots": snapshots, "characters": series}
+
+
+def tier_movement(snapshots, tiers):
+    """Tiers gained between the previous version and the latest one"""
+    latest = {}
+    for snapshot, tier in zip(snapshots, tiers):
+        latest[snapshot["version"]] = tier
+    versions = list(latest)
+    if len(versions) < 2:
+        return 0
+    before, after = latest[versions[-2]], latest[versions[-1]]
+    if before is None or after is None:
+        return 0
+    return TIER_ORDER.index(before) - TIER_ORDER.index(after)
+
+
+def write_history_index(
+    store_path, index_path=HISTORY_INDEX_PATH, roles_path=ROLES_PATH
+):
+    """Rebuild the history index and save it next to the dataset"""
+    index = build_history_index(store_path, roles_path)
+    atomic_write(index_path, dumps(index))
+    print(
+        f"History index saved to {index_path} "
+        f"({len(index['snapshots'])} snapshots, {len(index['characters'])} characters)"
+    )
+    return index
+
+
+def load_history_index(index_path=HISTORY_INDEX_PATH):
+    """Load the precomputed history index, if one has been built"""
+    if not os.path.exists(index_path):
+        return None
+    return loads(read_verified(index_path))
@@ -0,0 +1,107 @@
+# parallel_ingest.py
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from data_processor import CHAR_COLS, USECOLS, process_partition
+
+PARTITION_COLUMN = "_partition"
+
+
+def partition_ids(uids, partitions):
+    """Assign every row to a partition by a hash of its uid"""
+    hashes = pd.util.hash_array(np.asarray(uids))
+    return (hashes % np.uint64(partitions)).astype(np.int32)
+
+
+def _share(array):
+    """Copy an array into a new shared memory block"""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block
+
+
+def share_frame(df, partitions):
+    """Put the frame's columns and partition ids in shared memory
+
+    Only the columns the processors use are shared, and character columns
+    travel as integer codes plus a small category list.
+    Returns the blocks (to close and unlink later) and the spec workers use
+    to rebuild their partition.
+    """
+    columns = {PARTITION_COLUMN: (partition_ids(df["uid"], partitions), None)}
+    for col in df.columns.intersection(USECOLS):
+        values = df[col]
+        if col in CHAR_COLS:
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, categories = values.cat.codes, values.cat.categories
+            else:
+                codes, categories = pd.factorize(values)
+            columns[col] = (np.asarray(codes), list(categories))
+        else:
+            columns[col] = (values.to_numpy(), None)
+
+    blocks = []
+    spec = {}
+    for col, (array, categories) in columns.items():
+        block = _share(array)
+        blocks.append(block)
+        spec[col] = (block.name, array.dtype.str, categories)
+    return blocks, {"rows": len(df), "columns": spec}
+
+
+def _partition_frame(spec, partition):
+    """Rebuild one partition's rows from shared memory, labelled by position"""
+    blocks = []
+
+    def view(name, dtype):
+        # Workers share the parent's resource tracker; only the parent unlinks
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        return np.ndarray(spec["rows"], dtype=np.dtype(dtype), buffer=block.buf)
+
+    try:
+        name, dtype, _ = spec["columns"][PARTITION_COLUMN]
+        rows = np.flatnonzero(view(name, dtype) == partition)
+        data = {}
+        for col, (name, dtype, categories) in spec["columns"].items():
+            if col == PARTITION_COLUMN:
+                continue
+            values = view(name, dtype)[rows]
+            if categories is not None:
+                values = pd.Categorical.from_codes(values, categories)
+            data[col] = values
+        return pd.DataFrame(data, index=rows)
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def _process_shared(spec, mode, partition, known_names, deduplicate):
+    frame = _partition_frame(spec, partition)
+    return process_partition(frame, mode, known_names, deduplicate)
+
+
+def process_partitions(df, mode, workers, known_names=None, deduplicate=True):
+    """process_partition for each uid-hash partition, in worker processes
+
+    Rows are partitioned before anything else, so validation, duplicate
+    detection and aggregation all run in the workers. Each sends back only
+    its compact partial aggregates and rejected rows.
+    """
+    blocks, spec = share_frame(df, workers)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    _process_shared, spec, mode, partition, known_names, deduplicate
+                )
+                for partition in range(workers)
+            ]
+            return [future.result() for future in futures]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
@@ -0,0 +1,186 @@
+# partial_aggregates.py
+import argparse
+from io import BytesIO
+
+import numpy as np
+
+from aggregate_cube import AggregateCube
+from atomic_io import atomic_write, read_verified
+from cooccurrence import PairMatrix
+from bootstrap import ResampleTotals
+from dedup import Deduplicator
+from data_processor import (
+    ROLES_PATH,
+    combine_modes,
+    combine_partitions,
+    concat_chunks,
+    iter_csv_chunks,
+    load_known_names,
+    merge_partials,
+    prepare_frame,
+    process_partition,
+    summarize_partial,
+)
+from serialization import dumps, loads
+from team_stats import TeamSummary
+
+PARTIAL_FORMAT = 5
+PARTIAL_SUFFIX = ".partial.npz"
+
+
+def write_partial(
+    path, partial, mode, shard=0, rows=0, duplicates=0, rejected=None, details=True
+):
+    """Write one node's partial aggregates for a mode
+
+    Everything is kept per character, as sums and counts (the cube also
+    keeps sums of squares and quantile sketches), so the file size follows
+    the roster rather than the rows and any number of files can be merged.
+    shard numbers the files, and rows is how many input rows this node
+    kept. rejected holds the per-rule counts of rows the node quarantined.
+    With details=False the team summary and bootstrap totals are left out,
+    and datasets reduced from the file have no teams or intervals.
+    """
+    meta = {
+        "format": PARTIAL_FORMAT,
+        "mode": mode,
+        "shard": shard,
+        "rows": rows,
+        "duplicates": duplicates,
+        "rejected": rejected or {},
+        "unknown_names": partial.get("unknown_names", {}),
+        "details": details,
+        "cube": partial["cube"].to_dict(),
+        "pairs": partial["pairs"].to_dict(),
+    }
+    arrays = {}
+    if details:
+        teams = partial["teams"]
+        resamples = partial["resamples"]
+        meta["team_names"] = teams.names
+        meta["resample_names"] = resamples.names
+        arrays = {
+            "team_chars": teams.chars,
+            "team_keys": teams.keys,
+            "team_counts": teams.counts,
+            "team_sums": teams.value_sums,
+            "team_errors": teams.errors,
+            "resample_stages": resamples.stages,
+            "resample_counts": resamples.counts,
+            "resample_sums": resamples.sums,
+        }
+
+    buffer = BytesIO()
+    np.savez_compressed(
+        buffer,
+        # Full precision, so merged results match single-node processing
+        meta=np.frombuffer(dumps(meta, precision=None), dtype=np.uint8),
+        **arrays,
+    )
+    atomic_write(path, buffer.getvalue())
+
+
+def read_partial(path):
+    """Load a partial aggregate file back into aggregate_partition's form"""
+    with np.load(BytesIO(read_verified(path))) as arrays:
+        meta = loads(arrays["meta"].tobytes())
+        if meta.get("format") != PARTIAL_FORMAT:
+            raise ValueError(f"Unsupported partial aggregate format in {path}")
+        partial = {
+            "cube": AggregateCube.from_dict(meta["cube"]),
+            "pairs": PairMatrix.from_dict(meta["pairs"]),
+            "unknown_names": meta["unknown_names"],
+            "teams": None,
+            "resamples": None,
+        }
+        if meta["details"]:
+            partial["teams"] = TeamSummary(
+                meta["team_names"],
+                arrays["team_chars"],
+                arrays["team_keys"],
+                arrays["team_counts"],
+                arrays["team_sums"],
+                arrays["team_errors"],
+            )
+            partial["resamples"] = ResampleTotals(
+                meta["resample_names"],
+                arrays["resample_stages"],
+                arrays["resample_counts"],
+                arrays["resample_sums"],
+            )
+        return {
+            "mode": meta["mode"],
+            "shard": meta["shard"],
+            "rows": meta["rows"],
+            "duplicates": meta["duplicates"],
+            "rejected": meta.get("rejected", {}),
+            "partial": partial,
+        }
+
+
+def ingest_partial(source, mode, path, shard=0, details=True):
+    """Process one CSV (path or buffer) for a mode into a partial aggregate file
+
+    The CSV is parsed and deduplicated chunk by chunk, with the same reader
+    the main ingest streams downloads through, so the shards' reduced
+    stats match a single-node run.
+    """
+    with Deduplicator() as dedup:
+        df = prepare_frame(concat_chunks(iter_csv_chunks(source, dedup=dedup)))
+    known_names = load_known_names(ROLES_PATH)
+    result = process_partition(df, mode, known_names, deduplicate=False)
+    partial, duplicates, rejected = combine_partitions([result], mode, dedup.dropped)
+    write_partial(
+        path, partial, mode, shard, result["rows"], duplicates, rejected, details
+    )
+    return path
+
+
+def reduce_partials(paths, aggregates=None):
+    """Merge partial aggregate files into per-character stats for the dataset
+
+    The result matches processing the shards' rows as one file, as long as
+    each uid's rows are all in one shard. Duplicates are only detected
+    within a shard.
+    """
+    by_mode = {}
+    for path in paths:
+        entry = read_partial(path)
+        by_mode.setdefault(entry["mode"], []).append(entry)
+
+    mode_data = {}
+    for mode, entries in by_mode.items():
+        entries.sort(key=lambda entry: entry["shard"])
+        shards = [entry["shard"] for entry in entries]
+        if len(set(shards)) != len(shards):
+            raise ValueError(f"Duplicate shard numbers for {mode}: {shards}")
+
+        merged = merge_partials([entry["partial"] for entry in entries])
+        duplicates = sum(entry["duplicates"] for entry in entries)
+        rejected = {}
+        for entry in entries:
+            for rule, count in entry["rejected"].items():
+                rejected[rule] = rejected.get(rule, 0) + count
+        mode_data[mode] = summarize_partial(
+            merged, mode, aggregates, duplicates, rejected
+        )
+    return combine_modes(mode_data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write partial aggregates for one mode CSV"
+    )
+    parser.add_argument("mode", choices=["moc", "pf", "as"])
+    parser.add_argument("csv", help="Path to the mode's raw CSV")
+    parser.add_argument("output", help=f"Output file, e.g. moc-0{PARTIAL_SUFFIX}")
+    parser.add_argument("--shard", type=int, default=0, help="Position of this shard")
+    parser.add_argument(
+        "--no-details",
+        dest="details",
+        action="store_false",
+        help="Leave out team rankings and bootstrap intervals",
+    )
+    args = parser.parse_args()
+    ingest_partial(args.csv, args.mode, args.output, args.shard, args.details)
+    print(f"Wrote {args.output}")
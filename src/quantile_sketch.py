@@ -0,0 +1,110 @@
+# quantile_sketch.py
+import math
+
+import numpy as np
+
+# Configuration
+RELATIVE_ACCURACY = 0.01  # Quantiles are within 1% of the true value
+QUANTILES = {"p10": 0.1, "p50": 0.5, "p90": 0.9}
+ZERO_KEY = -(2**31)  # Bucket key for zero (and negative) values
+
+
+def bucket_keys(values, alpha=RELATIVE_ACCURACY):
+    """Logarithmic bucket key for each value (NaN for missing values)"""
+    values = np.asarray(values, dtype=np.float64)
+    log_gamma = math.log((1 + alpha) / (1 - alpha))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        keys = np.ceil(np.log(values) / log_gamma)
+    keys[values <= 0] = ZERO_KEY
+    return keys
+
+
+class DDSketch:
+    """Mergeable quantile sketch with relative-error guarantees (DDSketch)
+
+    Positive values fall into logarithmic buckets, so any quantile is
+    reported within alpha of its true value. Zeros are counted separately;
+    the cycles and scores this holds are never negative.
+    """
+
+    __slots__ = ("alpha", "bins", "zeros")
+
+    def __init__(self, alpha=RELATIVE_ACCURACY, bins=None, zeros=0):
+        self.alpha = alpha
+        # {bucket key: count}
+        self.bins = bins if bins is not None else {}
+        self.zeros = zeros
+
+    @classmethod
+    def from_counts(cls, keys, counts, alpha=RELATIVE_ACCURACY):
+        """Build from bucket keys (as bucket_keys returns) and their counts"""
+        bins = {}
+        for key, count in zip(keys, counts):
+            bins[int(key)] = bins.get(int(key), 0) + int(count)
+        zeros = bins.pop(ZERO_KEY, 0)
+        return cls(alpha, bins, zeros)
+
+    @classmethod
+    def from_values(cls, values, alpha=RELATIVE_ACCURACY):
+        keys = bucket_keys(values, alpha)
+        unique_keys, counts = np.unique(keys[~np.isnan(keys)], return_counts=True)
+        return cls.from_counts(unique_keys, counts, alpha)
+
+    @property
+    def count(self):
+        return self.zeros + sum(self.bins.values())
+
+    def _gamma(self):
+        return (1 + self.alpha) / (1 - self.alpha)
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1), or None for an empty sketch"""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = self.zeros
+        if seen > rank:
+            return 0.0
+        gamma = self._gamma()
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(key-1), gamma^key]
+                return 2 * gamma**key / (gamma + 1)
+        return 2 * gamma ** max(self.bins) / (gamma + 1)
+
+    def quantiles(self, named=QUANTILES):
+        return {name: self.quantile(q) for name, q in named.items()}
+
+    def merge(self, other):
+        """Add another sketch's counts into this one"""
+        if other.alpha != self.alpha:
+            raise ValueError(
+                f"Cannot merge sketches with accuracy {self.alpha} and {other.alpha}"
+            )
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zeros += other.zeros
+        return self
+
+    def to_dict(self):
+        keys = sorted(self.bins)
+        return {
+            "alpha": self.alpha,
+            "keys": keys,
+            "counts": [self.bins[key] for key in keys],
+            "zeros": self.zeros,
+        }
+
+    @classmethod
+    def from_dict(cls, raw):
+        return cls(
+            raw["alpha"], dict(zip(raw["keys"], raw["counts"])), raw.get("zeros", 0)
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, DDSketch) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"DDSketch(count={self.count}, alpha={self.alpha})"
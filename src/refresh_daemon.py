@@ -0,0 +1,218 @@
+# refresh_daemon.py
+import os
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from atomic_io import atomic_write, read_verified
+from serialization import dumps, loads
+
+# Configuration
+STATE_PATH = "refresh_state.json"
+POLL_SECONDS = 6 * 3600  # Upstream publishes a few times per version
+DEBOUNCE_SECONDS = 30  # Quiet time before a render starts
+BACKOFF_BASE_SECONDS = 60  # First retry delay after a failure, doubled each time
+BACKOFF_MAX_SECONDS = 6 * 3600
+REQUEST_TIMEOUT = 30
+
+
+def backoff_delay(failures, base=BACKOFF_BASE_SECONDS, limit=BACKOFF_MAX_SECONDS):
+    """Seconds to wait after this many consecutive failures"""
+    return min(base * 2 ** max(failures - 1, 0), limit)
+
+
+class ChangeDetector:
+    """Ask whether upstream files changed, using their ETag and Last-Modified
+
+    Each check is a conditional HEAD request per URL, so an unchanged file
+    costs a 304 and no body. Validators are only adopted through commit(),
+    once the change has been ingested.
+    """
+
+    def __init__(self, urls, validators=None, timeout=REQUEST_TIMEOUT):
+        self.urls = list(urls)
+        # {url: {"etag": ..., "last_modified": ...}}
+        self.validators = validators or {}
+        self.timeout = timeout
+
+    def _headers(self, url):
+        known = self.validators.get(url, {})
+        headers = {}
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+        return headers
+
+    def check(self):
+        """New validators for the URLs that changed ({} if none did)
+
+        Raises requests.RequestException for network and HTTP errors.
+        """
+        changed = {}
+        for url in self.urls:
+            response = requests.head(
+                url, headers=self._headers(url), timeout=self.timeout
+            )
+            if response.status_code == 304:
+                continue
+            response.raise_for_status()
+            changed[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+        return changed
+
+    def commit(self, changed):
+        self.validators.update(changed)
+
+
+class Debouncer:
+    """Run func once triggers stop arriving, never two runs at the same time
+
+    A trigger during a run schedules one more run after it finishes.
+    """
+
+    def __init__(self, func, delay=DEBOUNCE_SECONDS):
+        self.func = func
+        self.delay = delay
+        self._timer = None
+        self._generation = 0  # Bumped by every trigger
+        self._finished = 0  # Generation of the last completed run
+        self._lock = threading.Condition()
+        self._running = threading.Lock()
+
+    def trigger(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._generation += 1
+            self._timer = threading.Timer(self.delay, self._fire, [self._generation])
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _fire(self, generation):
+        with self._lock:
+            if generation != self._generation:
+                return  # A later trigger superseded this one
+        with self._running:
+            try:
+                self.func()
+            finally:
+                with self._lock:
+                    self._finished = max(self._finished, generation)
+                    self._lock.notify_all()
+
+    def wait(self, timeout=None):
+        """Block until no run is scheduled or in progress"""
+        with self._lock:
+            return self._lock.wait_for(
+                lambda: self._finished == self._generation, timeout
+            )
+
+
+class RefreshDaemon:
+    """Poll upstream, ingest when it changed, then render (debounced)
+
+    ingest and render are plain callables. They never run at the same
+    time, so a render can't read a half-written dataset. Validators and
+    the last-run timings are kept in state_path, so a restart doesn't
+    re-ingest files it has already seen.
+    """
+
+    def __init__(
+        self,
+        urls,
+        ingest,
+        render,
+        state_path=STATE_PATH,
+        poll_seconds=POLL_SECONDS,
+        debounce_seconds=DEBOUNCE_SECONDS,
+        backoff_base=BACKOFF_BASE_SECONDS,
+        backoff_max=BACKOFF_MAX_SECONDS,
+    ):
+        self.state_path = state_path
+        state = self._load_state()
+        self.detector = ChangeDetector(urls, state.get("validators"))
+        self.timings = state.get("timings", {})
+        self.ingest = ingest
+        self.render = render
+        self.debouncer = Debouncer(self._timed_render, debounce_seconds)
+        self.poll_seconds = poll_seconds
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failures = 0
+        self._stop = threading.Event()
+        self._state_lock = threading.Lock()  # Renders save from their own thread
+        self._work_lock = threading.Lock()  # Held by a running ingest or render
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        return loads(read_verified(self.state_path))
+
+    def _save_state(self):
+        with self._state_lock:
+            state = {"validators": self.detector.validators, "timings": self.timings}
+            atomic_write(self.state_path, dumps(state, compact=False))
+
+    def _set_timings(self, timings):
+        # Renders read and save the state from their own thread
+        with self._state_lock:
+            self.timings.update(timings)
+
+    def _timed(self, name, func):
+        start = time.perf_counter()
+        func()
+        self._set_timings(
+            {
+                f"last_{name}": datetime.now().isoformat(),
+                f"{name}_seconds": round(time.perf_counter() - start, 3),
+            }
+        )
+
+    def _timed_render(self):
+        try:
+            with self._work_lock:
+                self._timed("render", self.render)
+        except Exception as e:
+            print(f"Render failed: {e}")
+        self._save_state()
+
+    def poll_once(self):
+        """One poll (and ingest if needed); returns seconds until the next"""
+        try:
+            self._timed("poll", self._poll)
+        except Exception as e:
+            self.failures += 1
+            delay = backoff_delay(self.failures, self.backoff_base, self.backoff_max)
+            print(f"Refresh failed ({e}); retrying in {delay}s")
+            self._set_timings({"failures": self.failures})
+            self._save_state()
+            return delay
+
+        self.failures = 0
+        self._set_timings({"failures": 0})
+        self._save_state()
+        return self.poll_seconds
+
+    def _poll(self):
+        changed = self.detector.check()
+        if not changed:
+            return
+        print(f"Upstream changed: {', '.join(changed)}")
+        with self._work_lock:
+            self._timed("ingest", self.ingest)
+        with self._state_lock:
+            self.detector.commit(changed)
+        self.debouncer.trigger()
+
+    def run(self):
+        """Poll until stop() is called"""
+        while not self._stop.is_set():
+            self._stop.wait(self.poll_once())
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,175 @@
+# schema.py
+import math
+import numbers
+
+MODE_LABELS = {"moc": "MoC", "pf": "PF", "as": "AS"}
+MODE_ATTRS = {"moc": "moc", "pf": "pf", "as": "as_"}  # "as" is a Python keyword
+
+
+def _number(value):
+    """Coerce a stat to float, rejecting anything that is not a finite number"""
+    if isinstance(value, bool) or not isinstance(value, numbers.Real):
+        raise TypeError(f"Expected a number, got {value!r}")
+    value = float(value)
+    if not math.isfinite(value):
+        # NaN and infinity have no JSON spelling
+        raise TypeError(f"Expected a finite number, got {value!r}")
+    return value
+
+
+class ModeStats:
+    """Usage rate plus one performance metric for a game mode"""
+
+    __slots__ = ("usage", "quantiles", "regions", "nodes", "teams", "ci")
+    metric_name = None
+    # Optional breakdowns, kept only when the processed data provides them
+    optional_fields = ("quantiles", "regions", "nodes", "teams", "ci")
+
+    @property
+    def metric(self):
+        return getattr(self, self.metric_name)
+
+    @classmethod
+    def from_dict(cls, char, mode, raw):
+        """Build and validate stats for one mode of one character"""
+        try:
+            stats = cls(raw[cls.metric_name], raw["usage"])
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Missing data in {MODE_LABELS[mode]} for {char}") from e
+        for field in cls.optional_fields:
+            setattr(stats, field, raw.get(field))
+        return stats
+
+    def to_dict(self):
+        data = {self.metric_name: self.metric, "usage": self.usage}
+        for field in self.optional_fields:
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        return data
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()})"
+
+
+class MocStats(ModeStats):
+    """Memory of Chaos stats, where fewer cycles is better"""
+
+    __slots__ = ("cycles",)
+    metric_name = "cycles"
+
+    def __init__(
+        self,
+        cycles,
+        usage,
+        quantiles=None,
+        regions=None,
+        nodes=None,
+        teams=None,
+        ci=None,
+    ):
+        self.cycles = _number(cycles)
+        self.usage = _number(usage)
+        self.quantiles = quantiles
+        self.regions = regions
+        self.nodes = nodes
+        self.teams = teams
+        self.ci = ci
+
+
+class ScoreStats(ModeStats):
+    """Pure Fiction or Apocalyptic Shadow stats, where a higher score is better"""
+
+    __slots__ = ("score",)
+    metric_name = "score"
+
+    def __init__(
+        self,
+        score,
+        usage,
+        quantiles=None,
+        regions=None,
+        nodes=None,
+        teams=None,
+        ci=None,
+    ):
+        self.score = _number(score)
+        self.usage = _number(usage)
+        self.quantiles = quantiles
+        self.regions = regions
+        self.nodes = nodes
+        self.teams = teams
+        self.ci = ci
+
+
+MODE_TYPES = {"moc": MocStats, "pf": ScoreStats, "as": ScoreStats}
+METRIC_KEYS = {mode: mode_type.metric_name for mode, mode_type in MODE_TYPES.items()}
+
+
+class CharacterStats:
+    """All game mode stats for one character"""
+
+    __slots__ = ("name", "moc", "pf", "as_")
+
+    def __init__(self, name, moc=None, pf=None, as_=None):
+        self.name = name
+        self.moc = moc
+        self.pf = pf
+        self.as_ = as_
+
+    def mode(self, key):
+        """Stats for a mode key ("moc", "pf" or "as"), or None"""
+        return getattr(self, MODE_ATTRS[key])
+
+    def set_mode(self, key, stats):
+        setattr(self, MODE_ATTRS[key], stats)
+
+    def modes(self):
+        """Yield (mode key, stats) for every mode the character appears in"""
+        for key, attr in MODE_ATTRS.items():
+            stats = getattr(self, attr)
+            if stats is not None:
+                yield key, stats
+
+    @classmethod
+    def from_dict(cls, name, raw):
+        """Build and validate a character, ignoring unknown modes"""
+        char = cls(name)
+        for key, mode_type in MODE_TYPES.items():
+            if key in raw:
+                char.set_mode(key, mode_type.from_dict(name, key, raw[key]))
+        return char
+
+    def to_dict(self):
+        return {key: stats.to_dict() for key, stats in self.modes()}
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, CharacterStats)
+            and self.name == other.name
+            and self.to_dict() == other.to_dict()
+        )
+
+    def __repr__(self):
+        return f"CharacterStats({self.name!r}, {self.to_dict()})"
+
+
+def is_missing_name(name):
+    """True for the empty or NaN character names the raw data produces"""
+    if name is None:
+        return True
+    if isinstance(name, float) and math.isnan(name):
+        return True
+    return name == "nan"
+
+
+def characters_from_dict(raw):
+    """Build validated CharacterStats for every named character"""
+    return {
+        name: CharacterStats.from_dict(name, stats)
+        for name, stats in raw.items()
+        if not is_missing_name(name)
+    }
@@ -0,0 +1,149 @@
+# serialization.py
+import json
+from typing import Any, Dict, Optional
+
+from atomic_io import atomic_write, read_verified
+from schema import (
+    MODE_ATTRS,
+    MODE_TYPES,
+    CharacterStats,
+    ModeStats,
+    characters_from_dict,
+    is_missing_name,
+)
+
+# Optional fast backends, in order of preference
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Configuration
+FLOAT_PRECISION = 6  # Decimal places kept in the canonical form
+BACKEND = "orjson" if orjson else "msgspec" if msgspec else "json"
+
+if msgspec:
+    # The dataset schema as msgspec types, so decoding validates as it parses
+    class _MocRecord(msgspec.Struct):
+        cycles: float
+        usage: float
+        quantiles: Optional[Any] = None
+        regions: Optional[Any] = None
+        nodes: Optional[Any] = None
+        teams: Optional[Any] = None
+        ci: Optional[Any] = None
+
+    class _ScoreRecord(msgspec.Struct):
+        score: float
+        usage: float
+        quantiles: Optional[Any] = None
+        regions: Optional[Any] = None
+        nodes: Optional[Any] = None
+        teams: Optional[Any] = None
+        ci: Optional[Any] = None
+
+    class _CharacterRecord(msgspec.Struct, rename={"as_": "as"}):
+        moc: Optional[_MocRecord] = None
+        pf: Optional[_ScoreRecord] = None
+        as_: Optional[_ScoreRecord] = None
+
+    class _DatasetRecord(msgspec.Struct):
+        characters: Dict[str, _CharacterRecord]
+        version: Optional[str] = None
+        last_updated: Optional[str] = None
+
+    _dataset_decoder = msgspec.json.Decoder(type=_DatasetRecord)
+
+
+def round_floats(obj, precision=FLOAT_PRECISION):
+    """Round every float in a nested structure, flattening schema objects"""
+    if hasattr(obj, "to_dict"):
+        obj = obj.to_dict()
+    if isinstance(obj, float):
+        return round(obj, precision) if precision is not None else obj
+    if isinstance(obj, dict):
+        return {key: round_floats(value, precision) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [round_floats(value, precision) for value in obj]
+    return obj
+
+
+def dumps(obj, compact=True, precision=FLOAT_PRECISION):
+    """Encode to JSON bytes with sorted keys and rounded floats"""
+    obj = round_floats(obj, precision)
+
+    if orjson:
+        option = orjson.OPT_SORT_KEYS
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+    if compact:
+        text = json.dumps(obj, sort_keys=True, separators=(",", ":"))
+    else:
+        text = json.dumps(obj, sort_keys=True, indent=2)
+    return text.encode("utf-8")
+
+
+def loads(data):
+    """Decode JSON bytes or text with the fastest available backend"""
+    if orjson:
+        return orjson.loads(data)
+    if msgspec:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def _character_from_record(name, record):
+    char = CharacterStats(name)
+    for key, mode_type in MODE_TYPES.items():
+        raw = getattr(record, MODE_ATTRS[key])
+        if raw is not None:
+            metric = getattr(raw, mode_type.metric_name)
+            optional = {
+                field: getattr(raw, field) for field in ModeStats.optional_fields
+            }
+            char.set_mode(key, mode_type(metric, raw.usage, **optional))
+    return char
+
+
+def _decode_dataset(data):
+    """Typed msgspec decode: parsing and schema checks in a single pass"""
+    record = _dataset_decoder.decode(data)
+    dataset = {
+        key: getattr(record, key)
+        for key in ("version", "last_updated")
+        if getattr(record, key) is not None
+    }
+    dataset["characters"] = {
+        name: _character_from_record(name, char)
+        for name, char in record.characters.items()
+        if not is_missing_name(name)
+    }
+    return dataset
+
+
+def load_dataset(path):
+    """Read a dataset file into validated CharacterStats in one step"""
+    data = read_verified(path)
+    if msgspec:
+        try:
+            return _decode_dataset(data)
+        except msgspec.ValidationError:
+            pass  # Checked again below, for an error naming the character
+    dataset = loads(data)
+    if not isinstance(dataset, dict) or not isinstance(
+        dataset.get("characters"), dict
+    ):
+        raise ValueError(f"Dataset {path} has no character table")
+    dataset["characters"] = characters_from_dict(dataset["characters"])
+    return dataset
+
+
+def save_dataset(path, dataset, compact=True):
+    """Atomically write a dataset in the canonical form"""
+    atomic_write(path, dumps(dataset, compact=compact))
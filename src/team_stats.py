@@ -0,0 +1,256 @@
+# team_stats.py
+import numpy as np
+import pandas as pd
+
+# Configuration
+TOP_TEAMS = 3  # Teams reported per character and ranking
+TEAM_CAPACITY = 256  # Teams tracked per character; counts are exact below this
+TEAM_BLOCK_ROWS = 65536  # Rows counted before truncating to the capacity again
+MIN_TEAM_SAMPLES = 20  # Clears a team needs before it can rank as best performing
+CODE_BITS = 16  # Each member's code takes 16 bits of the 64-bit team key
+TEAM_SIZE = 4
+
+
+def team_keys(teams):
+    """Pack each row's sorted member codes into one int64 key
+
+    Returns the keys and the name list the codes index into (code 0 is an
+    empty slot, code i is names[i - 1]).
+    """
+    teams = np.asarray(teams, dtype=object)
+    flat = teams.ravel()
+    # Empty slots may be None or NaN, and NaN never equals itself
+    filled = (flat == flat) & (flat != None)  # noqa: E711
+    names, inverse = np.unique(flat[filled].astype(str), return_inverse=True)
+    codes = np.zeros(flat.size, dtype=np.int64)
+    codes[filled] = inverse + 1
+    return pack_codes(codes.reshape(teams.shape), len(names)), names.tolist()
+
+
+def pack_codes(codes, n_names):
+    """Team keys for an (n, 4) array of member codes (0 for an empty slot)"""
+    if n_names >= 2**CODE_BITS:
+        raise ValueError(f"Too many characters ({n_names}) for {CODE_BITS}-bit codes")
+    codes = np.sort(codes, axis=1)
+    keys = np.zeros(len(codes), dtype=np.int64)
+    for slot in range(codes.shape[1]):
+        keys = (keys << CODE_BITS) | codes[:, slot]
+    return keys
+
+
+def unpack_keys(keys, width=TEAM_SIZE):
+    """Member codes (ascending, 0 for empty) for each team key"""
+    shifts = np.arange(width - 1, -1, -1, dtype=np.int64) * CODE_BITS
+    return (np.asarray(keys, dtype=np.int64)[:, None] >> shifts) & (
+        2**CODE_BITS - 1
+    )
+
+
+def count_teams(keys, values):
+    """Hash-aggregate team keys into counts and value sums"""
+    inverse, unique_keys = pd.factorize(keys)
+    team_counts = np.bincount(inverse, minlength=len(unique_keys))
+    weights = np.asarray(values, dtype=np.float64)
+    value_sums = np.bincount(inverse, weights=weights, minlength=len(unique_keys))
+    return np.asarray(unique_keys), team_counts, value_sums
+
+
+def _first_per_group(groups, k):
+    """Mask of the first k rows of each run of equal values in sorted groups"""
+    if len(groups) == 0:
+        return np.zeros(0, dtype=bool)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    sizes = np.diff(np.r_[starts, len(groups)])
+    rank = np.arange(len(groups)) - np.repeat(starts, sizes)
+    return rank < k
+
+
+class TeamSummary:
+    """Bounded per-character team counts and value sums, mergeable
+
+    Each row is one (character, team) pair. Only the capacity most used
+    teams of each character are kept, and rows are counted in blocks that
+    are truncated as they go, so memory is proportional to capacity x
+    roster however many distinct teams the data holds. Counts
+    are exact as long as no character ever had more teams than that;
+    errors[i] bounds how many clears names[i]'s kept counts can miss.
+    Team keys pack member codes, where code i is names[i - 1].
+    """
+
+    __slots__ = ("names", "chars", "keys", "counts", "value_sums", "errors")
+
+    def __init__(self, names, chars, keys, counts, value_sums, errors=None):
+        self.names = list(names)
+        self.chars = np.asarray(chars, dtype=np.int64)
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.value_sums = np.asarray(value_sums, dtype=np.float64)
+        if errors is None:
+            errors = np.zeros(len(self.names), dtype=np.int64)
+        self.errors = np.asarray(errors, dtype=np.int64)
+
+    @classmethod
+    def from_teams(cls, teams, values, capacity=TEAM_CAPACITY):
+        """Summarize an (n, 4) array of team names and each team's value"""
+        teams = np.asarray(teams, dtype=object)
+        if len(teams) == 0:
+            return cls([], [], [], [], [])
+        keys, names = team_keys(teams)
+        return cls._from_keys(names, keys, values, capacity)
+
+    @classmethod
+    def from_codes(cls, names, codes, values, capacity=TEAM_CAPACITY):
+        """from_teams for an (n, 4) array of codes into names (-1 when empty)"""
+        keys = pack_codes(np.asarray(codes, dtype=np.int64) + 1, len(names))
+        return cls._from_keys(list(names), keys, values, capacity)
+
+    @classmethod
+    def _from_keys(cls, names, keys, values, capacity, block_rows=TEAM_BLOCK_ROWS):
+        """Count rows a block at a time, truncating after every block
+
+        At most block_rows distinct teams are ever held beyond the kept
+        capacity x roster rows, however many distinct teams there are.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        summary = cls(names, [], [], [], [])
+        for start in range(0, len(keys), block_rows):
+            block = slice(start, start + block_rows)
+            unique_keys, counts, value_sums = count_teams(keys[block], values[block])
+            pairs = cls._pairs(names, unique_keys, counts, value_sums)
+            if start == 0:
+                summary = pairs._truncate(capacity)
+            else:
+                summary.merge(pairs._truncate(capacity), capacity)
+        return summary
+
+    @classmethod
+    def _pairs(cls, names, keys, counts, value_sums, width=TEAM_SIZE):
+        """One row per member of each team, skipping empty and repeated slots"""
+        members = unpack_keys(keys, width)
+        repeated = np.zeros(members.shape, dtype=bool)
+        repeated[:, 1:] = members[:, 1:] == members[:, :-1]
+        slots = (members != 0) & ~repeated
+        rows = np.nonzero(slots)[0]
+        return cls(
+            names, members[slots], keys[rows], counts[rows], value_sums[rows]
+        )
+
+    def _truncate(self, capacity):
+        """Keep each character's capacity most used teams, adding to errors"""
+        # Most used first; ties go to the smaller key so results are deterministic
+        order = np.lexsort((self.keys, -self.counts, self.chars))
+        chars, counts = self.chars[order], self.counts[order]
+        keep = _first_per_group(chars, capacity)
+        if not keep.all():
+            # The most clears any dropped team of each character had
+            dropped = np.zeros(len(self.names) + 1, dtype=np.int64)
+            np.maximum.at(dropped, chars[~keep], counts[~keep])
+            self.errors = self.errors + dropped[1:]
+        order = order[keep]
+        self.chars = self.chars[order]
+        self.keys = self.keys[order]
+        self.counts = self.counts[order]
+        self.value_sums = self.value_sums[order]
+        return self
+
+    def _remapped(self, position):
+        """(chars, keys) with codes moved onto a merged name list"""
+        mapping = np.zeros(len(self.names) + 1, dtype=np.int64)
+        mapping[1:] = [position[name] + 1 for name in self.names]
+        keys = pack_codes(mapping[unpack_keys(self.keys)], len(position))
+        return mapping[self.chars], keys
+
+    def merge(self, other, capacity=TEAM_CAPACITY):
+        """Add another summary's counts into this one"""
+        names = sorted(set(self.names) | set(other.names))
+        position = {name: i for i, name in enumerate(names)}
+        errors = np.zeros(len(names), dtype=np.int64)
+        chars, keys = [], []
+        for summary in (self, other):
+            summary_chars, summary_keys = summary._remapped(position)
+            chars.append(summary_chars)
+            keys.append(summary_keys)
+            errors[[position[name] for name in summary.names]] += summary.errors
+
+        pairs = np.column_stack([np.concatenate(chars), np.concatenate(keys)])
+        unique_pairs, inverse = np.unique(pairs, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        size = len(unique_pairs)
+        self.names = names
+        self.chars = unique_pairs[:, 0]
+        self.keys = unique_pairs[:, 1]
+        self.counts = np.bincount(
+            inverse,
+            weights=np.concatenate([self.counts, other.counts]),
+            minlength=size,
+        ).astype(np.int64)
+        self.value_sums = np.bincount(
+            inverse,
+            weights=np.concatenate([self.value_sums, other.value_sums]),
+            minlength=size,
+        )
+        self.errors = errors
+        return self._truncate(capacity)
+
+    def top_teams(
+        self, lower_is_better=False, k=TOP_TEAMS, min_samples=MIN_TEAM_SAMPLES
+    ):
+        """Most-used and best-performing teams for every character"""
+        averages = self.value_sums / np.maximum(self.counts, 1)
+        sign = -1 if lower_is_better else 1
+
+        # Rows are already most used first within each character
+        most_used = _first_per_group(self.chars, k)
+        ranked = np.flatnonzero(self.counts >= min_samples)
+        ranked = ranked[
+            np.lexsort(
+                (self.keys[ranked], -sign * averages[ranked], self.chars[ranked])
+            )
+        ]
+        best = ranked[_first_per_group(self.chars[ranked], k)]
+
+        lookup = np.array([None] + self.names, dtype=object)
+
+        def entries(rows):
+            teams = {}
+            members = lookup[unpack_keys(self.keys[rows])].tolist()
+            for char, team, count, average in zip(
+                self.chars[rows].tolist(),
+                members,
+                self.counts[rows].tolist(),
+                averages[rows].tolist(),
+            ):
+                team = [name for name in team if name is not None]
+                teams.setdefault(char, []).append([team, count, average])
+            return teams
+
+        most_used, best = entries(np.flatnonzero(most_used)), entries(best)
+        return {
+            self.names[char - 1]: {
+                "most_used": teams,
+                "best": best.get(char, []),
+            }
+            for char, teams in most_used.items()
+        }
+
+    def to_dict(self):
+        return {
+            "names": self.names,
+            "chars": self.chars.tolist(),
+            "keys": self.keys.tolist(),
+            "counts": self.counts.tolist(),
+            "value_sums": self.value_sums.tolist(),
+            "errors": self.errors.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, raw):
+        return cls(
+            raw["names"],
+            raw["chars"],
+            raw["keys"],
+            raw["counts"],
+            raw["value_sums"],
+            raw["errors"],
+        )
+
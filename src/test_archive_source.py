@@ -0,0 +1,121 @@
+# src/test_archive_source.py
+import io
+import tarfile
+
+import pytest
+
+import update_data
+from archive_source import get_archive_data, parse_csv_name
+from dataset_store import list_snapshots
+
+DATA_DIR = "data/raw_csvs"
+
+
+@pytest.fixture
+def archive(tmp_path, make_frame, moc_rows):
+    """Path of a MocStats tarball and of a matching clone directory"""
+
+    def csv_bytes(rows):
+        return make_frame(rows).to_csv(index=False).encode()
+
+    files = {
+        "3.3.0.csv": csv_bytes(moc_rows[:2]),
+        "3.4.1.csv": csv_bytes(moc_rows),
+        "3.4.1_pf.csv": csv_bytes(
+            [
+                [1, 4, 1, 3, 30000, "Jade", "Robin", "Sparkle", "Fu Xuan"],
+                [1, 4, 2, 3, 32000, "Herta", "Robin", "Tribbie", "Huohuo"],
+            ]
+        ),
+        "README.md": b"not a stats file",
+    }
+    archive_path = tmp_path / "MocStats-main.tar.gz"
+    with tarfile.open(archive_path, "w:gz") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(f"MocStats-main/{DATA_DIR}/{name}")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+        # CSVs outside the data directory are ignored
+        info = tarfile.TarInfo("MocStats-main/old/3.0.0.csv")
+        info.size = len(files["3.3.0.csv"])
+        tar.addfile(info, io.BytesIO(files["3.3.0.csv"]))
+
+    clone_dir = tmp_path / "clone" / DATA_DIR
+    clone_dir.mkdir(parents=True)
+    for name, data in files.items():
+        (clone_dir / name).write_bytes(data)
+    return str(archive_path), str(tmp_path / "clone")
+
+
+def test_parse_csv_name():
+    assert parse_csv_name("3.4.1.csv") == ("3.4.1", "moc")
+    assert parse_csv_name("dir/3.4.1_as.csv") == ("3.4.1", "as")
+    assert parse_csv_name("3.4.1_other.csv") is None
+
+
+def test_archive_and_clone_feed_every_version(tmp_path, archive):
+    archive_path, clone_dir = archive
+
+    aggregates = {}
+    from_archive = get_archive_data(archive_path, path=DATA_DIR, aggregates=aggregates)
+    from_clone = get_archive_data(clone_dir, path=DATA_DIR)
+
+    assert list(from_archive) == ["3.3.0", "3.4.1"]
+    assert from_archive == from_clone
+    assert set(from_archive["3.4.1"]["Jade"]) == {"pf"}
+    assert from_archive["3.4.1"]["Kafka"]["moc"]["usage"] == 50.0
+    assert from_archive["3.3.0"]["Kafka"]["moc"]["usage"] == 100.0
+    assert set(aggregates["3.4.1"]) == {"moc", "pf"}
+    # Nothing was extracted next to the archive
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "MocStats-main.tar.gz",
+        "clone",
+    ]
+
+
+def test_backfill_skips_stored_versions_and_keeps_order(
+    tmp_path, monkeypatch, archive
+):
+    archive_path, _ = archive
+    store = str(tmp_path / "history.sqlite")
+    monkeypatch.setattr(update_data, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(update_data, "STORE_PATH", store)
+    monkeypatch.setattr(
+        update_data, "HISTORY_INDEX_PATH", str(tmp_path / "history_index.json")
+    )
+    monkeypatch.setattr(update_data, "UPSTREAM", {"path": DATA_DIR})
+
+    assert update_data.backfill_history(archive_path) == ["3.3.0", "3.4.1"]
+    assert update_data.backfill_history(archive_path) == []
+    snapshots = list_snapshots(store)
+    assert [version for _, version, _ in snapshots] == ["3.3.0", "3.4.1"]
+    assert snapshots[0][2] < snapshots[1][2]
+
+
+def test_backfill_refuses_to_insert_before_newer_versions(
+    tmp_path, monkeypatch, archive
+):
+    archive_path, _ = archive
+    store = str(tmp_path / "history.sqlite")
+    monkeypatch.setattr(update_data, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(update_data, "STORE_PATH", store)
+    monkeypatch.setattr(update_data, "UPSTREAM", {"path": DATA_DIR})
+    update_data.append_snapshot(store, "3.4.1", "t1", {})
+
+    with pytest.raises(ValueError, match="empty store"):
+        update_data.backfill_history(archive_path)
+    assert len(list_snapshots(store)) == 1
+
+
+def test_archive_with_arrow_reader_matches_pandas_reader(monkeypatch, archive):
+    pytest.importorskip("pyarrow")
+    import data_processor
+
+    archive_path, _ = archive
+    with_arrow = get_archive_data(archive_path, path=DATA_DIR)
+    monkeypatch.setattr(data_processor, "pa", None)
+    without_arrow = get_archive_data(archive_path, path=DATA_DIR)
+
+    assert with_arrow == without_arrow
+    # The short Firefly team counts, so Kafka is in half the 3.4.1 stages
+    assert with_arrow["3.4.1"]["Kafka"]["moc"]["usage"] == 50.0
@@ -0,0 +1,34 @@
+# src/test_atomic_io.py
+import os
+
+import pytest
+
+import atomic_io
+from atomic_io import ChecksumError, atomic_write, read_verified
+
+
+def test_write_publishes_file_and_checksum(tmp_path):
+    path = str(tmp_path / "hsr_dataset.json")
+    atomic_write(path, '{"characters": {}}')
+    assert read_verified(path) == b'{"characters": {}}'
+    assert open(path + ".sha256").read().endswith("  hsr_dataset.json\n")
+
+    with open(path, "ab") as f:
+        f.write(b"truncated?")
+    with pytest.raises(ChecksumError):
+        read_verified(path, retries=2, delay=0)
+
+
+def test_failed_write_keeps_previous_contents(tmp_path, monkeypatch):
+    path = str(tmp_path / "index.html")
+    atomic_write(path, "old")
+
+    def crash(src, dst):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(atomic_io.os, "replace", crash)
+    with pytest.raises(KeyboardInterrupt):
+        atomic_write(path, "new")
+
+    assert read_verified(path) == b"old"
+    assert sorted(os.listdir(tmp_path)) == ["index.html", "index.html.sha256"]
@@ -1,8 +1,41 @@
 # src/test_build.py
 import subprocess
 
+RENDER_IMPORT_SECONDS = 1.0  # What render pays to import before doing any work
+RENDER_MODULES = ["tierlist", "visual_tierlist", "character_pages"]
+
 def test_update():
     subprocess.check_call(["python", "update_data.py"])
     
 def test_visualization():
-    subprocess.check_call(["python", "visual_tierlist.py"])
\ No newline at end of file
+    subprocess.check_call(["python", "visual_tierlist.py"])
+
+
+def test_render_cold_start():
+    # render must not pay for the ingest dependencies; nothing is rendered
+    result = subprocess.run(
+        ["python", "-X", "importtime", "-c", f"import {', '.join(RENDER_MODULES)}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, total, name = line.split("|")
+            cumulative[name.strip()] = total.strip()
+    assert "pandas" not in cumulative and "requests" not in cumulative
+    seconds = sum(int(cumulative[name]) for name in RENDER_MODULES) / 1e6
+    assert seconds < RENDER_IMPORT_SECONDS
+
+
+def test_refresh_without_ingest_modules_exits_cleanly():
+    # Like the frozen bundle, which leaves refresh_daemon out
+    script = (
+        "import sys; sys.modules['refresh_daemon'] = None; "
+        "import tierlist; tierlist.main(['refresh', '--status'])"
+    )
+    result = subprocess.run(["python", "-c", script], capture_output=True, text=True)
+    assert result.returncode == 1
+    assert "refresh needs the full install" in result.stdout
+    assert "Traceback" not in result.stderr
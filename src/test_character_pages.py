@@ -0,0 +1,54 @@
+# src/test_character_pages.py
+import os
+
+from character_pages import page_path, render_character_pages
+from schema import characters_from_dict
+from tierlist import calculate_scores, generate_role_based_tier_lists
+from visual_tierlist import sitemap_xml
+
+
+def build_inputs():
+    raw = {
+        name: {
+            "moc": {"cycles": 3.0 + i, "usage": 40.0 - i * 4},
+            "pf": {"score": 30000 + i * 500, "usage": 20.0 + i},
+        }
+        for i, name in enumerate(
+            ["Acheron", "Kafka", "Dan Heng • Imbibitor Lunae", "Robin", "Huohuo"]
+        )
+    }
+    role_data = {
+        "Acheron": ["DPS"],
+        "Kafka": ["DPS", "Sub DPS"],
+        "Dan Heng • Imbibitor Lunae": ["DPS"],
+        "Robin": ["Amplifier"],
+        "Huohuo": ["Sustain"],
+    }
+    characters = characters_from_dict(raw)
+    scores = calculate_scores(characters)
+    tier_lists = generate_role_based_tier_lists(characters, scores, role_data)
+    return tier_lists, "3.4.1", characters, role_data
+
+
+def test_pool_renders_the_same_pages_as_one_process(tmp_path):
+    serial_dir, pool_dir = str(tmp_path / "serial"), str(tmp_path / "pool")
+    serial = render_character_pages(*build_inputs(), pages_dir=serial_dir, workers=1)
+    pooled = render_character_pages(*build_inputs(), pages_dir=pool_dir, workers=2)
+
+    assert serial == pooled
+    assert page_path("Dan Heng • Imbibitor Lunae") in serial
+    # Site pages are deployed as-is, without checksum sidecars
+    assert len(os.listdir(serial_dir)) == len(serial)
+    for name in os.listdir(serial_dir):
+        with open(os.path.join(serial_dir, name), "rb") as a:
+            with open(os.path.join(pool_dir, name), "rb") as b:
+                assert a.read() == b.read()
+
+    with open(os.path.join(serial_dir, "kafka.html"), encoding="utf-8") as f:
+        page = f.read()
+    for expected in ("Memory of Chaos", "Pure Fiction", "DPS: ", "Sub DPS: "):
+        assert expected in page
+
+    sitemap = sitemap_xml(serial, "2025-01-01")
+    assert sitemap.count("<url>") == len(serial) + 1
+    assert "https://my-hsr-tierlist.netlify.app/characters/kafka.html" in sitemap
@@ -0,0 +1,472 @@
+# src/test_data_processor.py
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_processor
+from aggregate_cube import AggregateCube
+from data_processor import process_moc_data, process_score_data
+
+
+def test_moc_headline_slice(make_frame, moc_rows):
+    aggregates = {}
+    results = process_moc_data(make_frame(moc_rows), aggregates)
+    # Breakdowns have their own tests
+    for stats in results.values():
+        for key in ("quantiles", "regions", "nodes", "teams", "ci"):
+            stats.pop(key)
+
+    assert results["Acheron"] == {"cycles": 3.0, "usage": 100.0}
+    assert results["Ruan Mei"] == {"cycles": 7.0, "usage": 100.0}
+    assert results["Kafka"] == {"cycles": 6.0, "usage": 50.0}
+    assert "Seele" not in results and None not in results
+
+    cube = aggregates["moc"]["cube"]
+    assert cube.slices() == [(11, 2), (12, 3)]
+    assert cube.slice(11, 2)["Seele"] == {"cycles": 9.0, "usage": 100.0}
+    assert cube.slice(12, 3) == results
+
+
+def test_cube_round_trips_and_merges(make_frame):
+    aggregates = {}
+    process_score_data(
+        make_frame([[1, 4, 1, 3, 30000, "Herta", "Robin", "Aventurine", "Tribbie"],
+                    [1, 4, 2, 3, 34000, "The Herta", "Anaxa", "Serval", "Huohuo"]]),
+        "pf",
+        aggregates,
+    )
+    cube = aggregates["pf"]["cube"]
+    copy = AggregateCube.from_dict(cube.to_dict())
+    assert copy.slice(4, 3) == cube.slice(4, 3)
+
+    merged = copy.merge(cube).slice(4, 3)
+    assert merged["Herta"] == {"score": 30000.0, "usage": 100.0}
+    assert merged["Anaxa"]["score"] == pytest.approx(34000.0)
+
+
+def test_teammate_pairs_from_headline_slice(make_frame, moc_rows):
+    aggregates = {}
+    process_moc_data(make_frame(moc_rows), aggregates)
+    pairs = aggregates["moc"]["pairs"]
+
+    assert pairs.top_partners("Acheron") == [
+        ("Pela", 2, 3.0),
+        ("Aventurine", 1, 4.0),
+        ("Fu Xuan", 1, 2.0),
+    ]
+    # The floor 11 stage and the incomplete stage are not counted
+    assert ("Seele", 1, 9.0) not in pairs.partners("Sparkle")
+    assert len(pairs.partners("Firefly")) == 2
+
+
+def test_pair_matrix_from_codes_merges_exactly():
+    from cooccurrence import PairMatrix
+
+    names = ["Acheron", "Jiaoqiu", "Pela", "Sparkle"]
+    codes = np.array([[0, 2, 1, -1], [2, 0, 3, 3], [1, 3, -1, -1], [0, 2, 1, 3]])
+    values = [4, 2, 7, 5]
+
+    whole = PairMatrix.from_codes(names, codes, values)
+    # Empty slots and a repeated member don't make pairs
+    assert whole.partners("Acheron") == [
+        ("Pela", 3, pytest.approx(11 / 3)),
+        ("Jiaoqiu", 2, 4.5),
+        ("Sparkle", 2, 3.5),
+    ]
+    halves = PairMatrix.from_codes(names, codes[:2], values[:2])
+    halves.merge(PairMatrix.from_codes(names, codes[2:], values[2:]))
+    assert halves.to_dict() == whole.to_dict()
+
+
+def test_top_teams_are_bounded_and_ranked():
+    from team_stats import TeamSummary
+
+    teams = [["Acheron", "Pela", "Jiaoqiu", "Aventurine"]] * 3 + [
+        ["Pela", "Acheron", "Sparkle", "Fu Xuan"],
+        ["Acheron", "Pela", "Jiaoqiu", None],
+        ["Kafka", "Black Swan", "Ruan Mei", "Huohuo"],
+    ]
+    values = [5, 6, 7, 2, 9, 4]
+    result = TeamSummary.from_teams(teams, values).top_teams(
+        lower_is_better=True, k=2, min_samples=1
+    )
+
+    acheron = result["Acheron"]
+    assert acheron["most_used"][0] == [
+        ["Acheron", "Aventurine", "Jiaoqiu", "Pela"],
+        3,
+        6.0,
+    ]
+    assert len(acheron["most_used"]) == 2
+    assert [team[2] for team in acheron["best"]] == [2.0, 6.0]
+    assert result["Kafka"]["most_used"] == [
+        [["Black Swan", "Huohuo", "Kafka", "Ruan Mei"], 1, 4.0]
+    ]
+
+
+def test_team_summary_is_bounded_and_merges_exactly():
+    from team_stats import TeamSummary, team_keys
+
+    rng = np.random.default_rng(0)
+    names = np.array(["Acheron", "Pela", "Kafka", "Robin", "Huohuo", None], object)
+    teams = names[rng.integers(0, len(names), size=(500, 4))]
+    values = rng.integers(1, 30, size=500)
+
+    summary = TeamSummary.from_teams(teams, values)
+    halves = TeamSummary.from_teams(teams[:250], values[:250])
+    halves.merge(TeamSummary.from_teams(teams[250:], values[250:]))
+    whole = summary.top_teams(min_samples=5)
+    assert halves.top_teams(min_samples=5) == whole
+    assert not halves.errors.any()
+
+    # Counting in small blocks holds a bounded set of teams at any time
+    keys, key_names = team_keys(teams)
+    blocked = TeamSummary._from_keys(key_names, keys, values, 256, block_rows=16)
+    assert blocked.to_dict() == summary.to_dict()
+
+    bounded = TeamSummary.from_teams(teams, values, capacity=4)
+    assert np.bincount(bounded.chars).max() == 4
+    assert bounded.errors.all()
+    # The most used teams survive, with their exact counts
+    assert bounded.top_teams(k=2) == summary.top_teams(k=2)
+
+
+def test_processed_stats_carry_teams(make_frame, moc_rows):
+    results = process_moc_data(make_frame(moc_rows))
+    assert results["Kafka"]["teams"]["most_used"][0][1] == 1
+    # No team has enough clears to be ranked as best performing
+    assert results["Kafka"]["teams"]["best"] == []
+
+
+def test_bootstrap_intervals_bracket_point_estimates(monkeypatch, make_frame):
+    import bootstrap
+    from bootstrap import ResampleTotals
+
+    rows = []
+    for uid in range(200):
+        partner = "Pela" if uid % 4 else "Sparkle"
+        team = ["Acheron", partner, "Jiaoqiu", "Aventurine"]
+        rows.append([uid, 12, 1, 3, uid % 5, *team])
+        rows.append([uid, 12, 2, 3, 3, "Kafka", "Black Swan", "Ruan Mei", "Huohuo"])
+    results = process_moc_data(make_frame(rows))
+
+    for char in ("Acheron", "Sparkle"):
+        low, high = results[char]["ci"]["cycles"]
+        assert low <= results[char]["cycles"] <= high
+        low, high = results[char]["ci"]["usage"]
+        assert low <= results[char]["usage"] <= high
+    # Every stage has Kafka, so resampling cannot move the usage
+    assert results["Kafka"]["ci"]["usage"] == [100.0, 100.0]
+
+    # Blocks of two stages, so threads and partitions split the stages
+    monkeypatch.setattr(bootstrap, "BLOCK_STAGES", 2)
+    names = ["Acheron", "Pela", "Sparkle"]
+    stages = np.array([10, 10, 11, 12, 12, 13, 14])
+    codes = np.array([[0, 1, -1, -1]] * 5 + [[0, 2, -1, -1]] * 2)
+    values = np.array([1, 2, 3, 4, 5, 6, 7])
+    serial = ResampleTotals.from_codes(stages, names, codes, values, workers=1)
+    threaded = ResampleTotals.from_codes(stages, names, codes, values, workers=4)
+    assert threaded.to_dict() == serial.to_dict()
+    halves = ResampleTotals.from_codes(stages[:3], names, codes[:3], values[:3])
+    halves.merge(ResampleTotals.from_codes(stages[3:], names, codes[3:], values[3:]))
+    assert halves.to_dict() == serial.to_dict()
+    assert halves.intervals() == serial.intervals()
+
+
+def test_node_split(make_frame, moc_rows):
+    aggregates = {}
+    results = process_moc_data(make_frame(moc_rows), aggregates)
+
+    assert results["Acheron"]["nodes"] == {"1": {"cycles": 3.0, "usage": 100.0}}
+    assert results["Firefly"]["nodes"] == {"2": {"cycles": 8.0, "usage": 50.0}}
+    assert set(results["Ruan Mei"]["nodes"]) == {"2"}
+
+    cube = aggregates["moc"]["cube"]
+    assert cube.node_slice(11, 2)["Acheron"] == {"2": {"cycles": 7.0, "usage": 100.0}}
+    restored = AggregateCube.from_dict(cube.to_dict())
+    assert restored.node_slice(12, 3) == cube.node_slice(12, 3)
+
+    # Without a node column only the pooled stats are produced
+    pooled = process_moc_data(make_frame(moc_rows).drop(columns="node"))
+    assert "nodes" not in pooled["Acheron"]
+    assert pooled["Acheron"]["cycles"] == results["Acheron"]["cycles"]
+
+
+def test_quantile_sketches_merge_and_stay_accurate():
+    from quantile_sketch import DDSketch
+
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(3, 1, 5000)
+    sketch = DDSketch.from_values(values)
+    for q in (0.1, 0.5, 0.9):
+        assert sketch.quantile(q) == pytest.approx(np.quantile(values, q), rel=0.02)
+
+    halves = DDSketch.from_values(values[:2000])
+    halves.merge(DDSketch.from_values(values[2000:]))
+    assert halves == sketch
+    assert DDSketch.from_values([0, 0, 5]).quantile(0.5) == 0.0
+
+
+def test_quantiles_survive_chunked_ingest(make_frame, moc_rows):
+    aggregates = {}
+    results = process_moc_data(make_frame(moc_rows), aggregates)
+    # Quantiles pick a recorded value rather than interpolating
+    quantiles = results["Acheron"]["quantiles"]
+    assert quantiles["p50"] == pytest.approx(2.0, rel=0.01)
+    assert results["Firefly"]["quantiles"]["p90"] == pytest.approx(8.0, rel=0.01)
+
+    first, second = {}, {}
+    process_moc_data(make_frame(moc_rows[:4]), first)
+    process_moc_data(make_frame(moc_rows[4:]), second)
+    merged = AggregateCube.from_dict(first["moc"]["cube"].to_dict())
+    merged.merge(second["moc"]["cube"])
+    assert merged.sketches == aggregates["moc"]["cube"].sketches
+
+
+def test_read_stats_csv_uses_compact_dtypes(make_frame, moc_rows):
+    from data_processor import read_stats_csv
+
+    text = make_frame(moc_rows).assign(version="3.4.1").to_csv(index=False)
+    df = read_stats_csv(io.StringIO(text))
+
+    assert "version" not in df.columns
+    assert df["floor"].dtype == "int8" and df["round_num"].dtype == "int32"
+    assert isinstance(df["ch1"].dtype, pd.CategoricalDtype)
+    assert process_moc_data(df) == process_moc_data(make_frame(moc_rows))
+
+    # A blank cycle count still parses, just without the strict dtypes
+    messy = text.replace(",4,Acheron", ",,Acheron", 1)
+    assert read_stats_csv(io.BytesIO(messy.encode()))["round_num"].isna().sum() == 1
+
+
+def test_arrow_reader_matches_pandas_reader(monkeypatch, make_frame, moc_rows):
+    pytest.importorskip("pyarrow")
+    from data_processor import read_stats_csv
+
+    rows = [*moc_rows, [5, 12, 1, 3, 3, "Acheron", "NA", "", "Aventurine"]]
+    text = make_frame(rows).assign(version="3.4.1").to_csv(index=False).encode()
+    arrow = read_stats_csv(io.BytesIO(text))
+    monkeypatch.setattr(data_processor, "pa", None)
+    plain = read_stats_csv(io.BytesIO(text))
+
+    assert arrow["ch3"].isna().tolist() == plain["ch3"].isna().tolist()
+    assert arrow["ch2"].isna().sum() == 1
+    pd.testing.assert_frame_equal(
+        arrow.astype({col: object for col in ["ch1", "ch2", "ch3", "ch4"]}),
+        plain.astype({col: object for col in ["ch1", "ch2", "ch3", "ch4"]}),
+    )
+    assert process_moc_data(arrow) == process_moc_data(plain)
+
+
+def test_parallel_partitions_match_serial(make_frame):
+    rows = []
+    for uid in range(60):
+        floor = 12 if uid % 3 else 11
+        team = ["Acheron", "Pela", "Jiaoqiu", "Aventurine"]
+        rows.append([uid, floor, 1, 3, uid % 7, *team])
+        rows.append([uid, floor, 2, 3, 5, "Kafka", "Black Swan", "Ruan Mei", None])
+    rows.append([60, 12, 1, 3, 4, "Seele", "Sparkle", "Silver Wolf", "Fu Xuan"])
+    frame = make_frame(rows).sample(frac=1, random_state=0)
+
+    serial, parallel = {}, {}
+    expected = process_moc_data(frame.copy(), serial)
+    assert process_moc_data(frame.copy(), parallel, workers=2) == expected
+    assert parallel["moc"]["cube"].to_dict() == serial["moc"]["cube"].to_dict()
+    assert parallel["moc"]["pairs"].to_dict() == serial["moc"]["pairs"].to_dict()
+
+
+def test_region_breakdown_from_uid_leading_digit(make_frame):
+    from data_processor import uid_leading_digits
+
+    assert uid_leading_digits([600000001, 800000002, 7, 0, 100]).tolist() == [
+        6,
+        8,
+        7,
+        0,
+        1,
+    ]
+
+    rows = [
+        [600000001, 12, 1, 3, 4, "Acheron", "Pela", "Jiaoqiu", "Aventurine"],
+        [600000001, 12, 2, 3, 6, "Kafka", "Black Swan", "Ruan Mei", "Huohuo"],
+        [800000002, 12, 1, 3, 2, "Acheron", "Pela", "Sparkle", "Fu Xuan"],
+        [800000002, 12, 2, 3, 8, "Firefly", "Ruan Mei", None, "Lingsha"],
+        [800000003, 12, 1, 3, 6, "Seele", "Sparkle", "Silver Wolf", "Fu Xuan"],
+        [800000003, 12, 2, 3, 4, "Kafka", "Black Swan", "Ruan Mei", "Huohuo"],
+    ]
+    aggregates = {}
+    results = process_moc_data(make_frame(rows), aggregates)
+
+    assert results["Acheron"]["regions"] == {
+        "America": {"cycles": 4.0, "usage": 100.0},
+        "Asia": {"cycles": 2.0, "usage": 50.0},
+    }
+    assert results["Ruan Mei"]["regions"]["Asia"] == {"cycles": 6.0, "usage": 100.0}
+    cube = aggregates["moc"]["cube"]
+    assert AggregateCube.from_dict(cube.to_dict()).region_slice(12, 3) == (
+        cube.region_slice(12, 3)
+    )
+
+
+def test_streamed_chunks_keep_values_that_overflow_compact_dtypes(make_frame):
+    import io
+
+    from data_processor import concat_chunks, iter_csv_chunks
+
+    rows = [
+        [1, 12, 1, 3, 5, "Acheron", "Pela", "Jiaoqiu", "Aventurine"],
+        [1, 12, 2, 3, 6, "Kafka", "Black Swan", "Ruan Mei", "Huohuo"],
+        [2, 300, 1, 3, 70000, "Acheron", "Pela", "Jiaoqiu", "Aventurine"],
+        [2, 300, 2, 3, 4, "Kafka", "Black Swan", "Ruan Mei", "Huohuo"],
+    ]
+    text = make_frame(rows).to_csv(index=False)
+    chunks = list(iter_csv_chunks(io.StringIO(text), chunk_rows=2))
+
+    assert chunks[0]["floor"].dtype == "int8"
+    # 300 doesn't fit int8, so that chunk's floors stay wide instead of wrapping
+    assert chunks[1]["floor"].dtype == "int64"
+    df = concat_chunks(chunks)
+    assert df["floor"].tolist() == [12, 12, 300, 300]
+    assert df["round_num"].tolist() == [5, 6, 70000, 4]
+
+
+def test_streamed_download_matches_buffered_parse(make_frame):
+    import gzip
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from data_processor import iter_download_chunks, read_stats_csv, stream_stats_csv
+
+    teams = [
+        ["Acheron", "Pela", "Jiaoqiu", "Aventurine"],
+        ["Kafka", "Black Swan", "Ruan Mei", "Huohuo"],
+        ["Firefly", "Ruan Mei", None, "Lingsha"],
+    ]
+    rows = []
+    for uid in range(6000):
+        floor = 12 if uid % 4 else 11
+        rows.append([600000000 + uid, floor, 1, 3, uid % 9, *teams[uid % 3]])
+        rows.append([600000000 + uid, floor, 2, 3, uid % 5, *teams[(uid + 1) % 3]])
+    text = make_frame(rows).assign(version="3.4.1").to_csv(index=False).encode()
+    body = gzip.compress(text)
+    sent = []
+
+    class Throttled(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            # About 1 MB/s
+            for start in range(0, len(body), 4096):
+                self.wfile.write(body[start : start + 4096])
+                self.wfile.flush()
+                sent.append(min(start + 4096, len(body)))
+                time.sleep(0.004)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Throttled)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{httpd.server_port}/3.4.1.csv"
+    try:
+        # Parsing starts before the download has finished
+        chunks = iter_download_chunks(url, chunk_rows=500)
+        next(chunks)
+        assert sent[-1] < len(body)
+        chunks.close()
+
+        streamed = stream_stats_csv(url, chunk_rows=500)
+        headline = stream_stats_csv(url, {(12, 3)}, chunk_rows=500)
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+    buffered = read_stats_csv(io.BytesIO(text))
+    assert streamed["floor"].dtype == "int8"
+    assert isinstance(streamed["ch1"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(
+        streamed.astype({col: object for col in ["ch1", "ch2", "ch3", "ch4"]}),
+        buffered.astype({col: object for col in ["ch1", "ch2", "ch3", "ch4"]}),
+    )
+    assert set(headline["floor"]) == {12}
+    # Dropping other slices leaves the headline stats unchanged
+    assert process_moc_data(headline) == process_moc_data(buffered)
+
+
+def test_invalid_rows_are_quarantined_with_rule_counts(
+    tmp_path, monkeypatch, quarantine_dir, make_frame, moc_rows
+):
+    import json
+
+    from data_processor import validate_rows
+
+    rows = [
+        *moc_rows[:4],
+        [5, 12, 1, 3, "abc", "Acheron", "Pela", "Jiaoqiu", "Aventurine"],
+        [5, 12, 2, 3, 99, "Kafka", "Black Swan", "Ruan Mei", "Huohuo"],
+        [6, 12, 1, 3, 2.5, "Acheron", "Pela", "Jiaoqiu", "Aventurine"],
+        [6, 12, 2, 3, 3, "Kafka", "Black Swan", "Ruan Mei", "Nobody"],
+    ]
+    frame = make_frame(rows)
+    frame["round_num"] = pd.to_numeric(frame["round_num"], errors="coerce")
+    known = {name.strip() for row in moc_rows for name in row[5:] if name}
+    valid, rejected, counts = validate_rows(frame, "moc")
+
+    assert counts == {"round_num_not_numeric": 1, "impossible_cycles": 2}
+    assert len(valid) == 5
+    assert rejected["rule"].tolist() == [
+        "round_num_not_numeric",
+        "impossible_cycles",
+        "impossible_cycles",
+    ]
+
+    # Scores far outside the band, but not merely outside it
+    scores = make_frame(
+        [
+            [1, 4, 1, 3, 41000, "Jade", "Robin", "Sparkle", "Fu Xuan"],
+            [1, 4, 2, 3, 900000, "Herta", "Robin", "Tribbie", "Huohuo"],
+        ]
+    )
+    _, rejected, counts = validate_rows(scores, "pf")
+    assert counts == {"round_num_not_numeric": 0, "score_out_of_band": 1}
+    assert rejected["uid"].tolist() == [1]
+
+    # Bands come from the headline slice, so lower slices aren't held to them
+    lower = make_frame(
+        [
+            [7, 11, 1, 2, 40, "Acheron", "Pela", "Jiaoqiu", "Aventurine"],
+            [7, 11, 2, 2, -1, "Kafka", "Black Swan", "Ruan Mei", "Huohuo"],
+        ]
+    )
+    _, rejected, _ = validate_rows(lower, "moc")
+    assert rejected["round_num"].tolist() == [-1]
+    lower_scores = make_frame(
+        [[1, 2, 1, 3, 8000, "Jade", "Robin", "Sparkle", "Fu Xuan"]]
+    )
+    assert validate_rows(lower_scores, "pf")[1].empty
+
+    roles_path = tmp_path / "character_roles.json"
+    roles_path.write_text(json.dumps(sorted(known)))
+    monkeypatch.setattr(data_processor, "ROLES_PATH", str(roles_path))
+    aggregates = {}
+    results = process_moc_data(make_frame(rows), aggregates)
+
+    assert results == process_moc_data(make_frame(moc_rows[:4]))
+    assert aggregates["moc"]["rejected"]["impossible_cycles"] == 2
+    quarantined = pd.read_csv(quarantine_dir / "moc.csv")
+    assert len(quarantined) == 3 and "rule" in quarantined.columns
+
+    # A character missing from the roles file is reported, but its teams count
+    assert aggregates["moc"]["unknown_names"] == {"Nobody": 1}
+    new_release = [
+        [8, 12, 1, 3, 4, "Acheron", "Pela", "Jiaoqiu", "Aventurine"],
+        [8, 12, 2, 3, 5, "Kafka", "Black Swan", "Ruan Mei", "Nobody"],
+    ]
+    results = process_moc_data(make_frame([*moc_rows[:4], *new_release]))
+    assert "Nobody" in results
+    assert results["Kafka"]["usage"] == pytest.approx(200 / 3)
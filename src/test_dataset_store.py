@@ -0,0 +1,56 @@
+# src/test_dataset_store.py
+import sqlite3
+
+from dataset_store import (
+    append_snapshot,
+    character_history,
+    iter_snapshots,
+    list_snapshots,
+    load_snapshot,
+)
+from schema import characters_from_dict
+
+
+def make_characters(cycles, pf_usage=None):
+    chars = {"Acheron": {"moc": {"cycles": cycles, "usage": 40.0}}}
+    if pf_usage is not None:
+        chars["Robin"] = {"pf": {"score": 36000.0, "usage": pf_usage}}
+    return characters_from_dict(chars)
+
+
+def test_snapshots_only_store_changes(tmp_path):
+    store = str(tmp_path / "history.sqlite")
+    append_snapshot(store, "3.4", "t1", make_characters(6.5, 30.0))
+    append_snapshot(store, "3.4", "t2", make_characters(6.5, 31.0))
+    append_snapshot(store, "3.5", "t3", make_characters(6.0))
+
+    conn = sqlite3.connect(store)
+    rows = conn.execute("SELECT COUNT(*) FROM stats").fetchone()[0]
+    conn.close()
+    # Two initial rows, one Robin change, one Acheron change, one Robin removal
+    assert rows == 5
+
+    assert load_snapshot(store, 1)["characters"] == make_characters(6.5, 30.0)
+    assert load_snapshot(store)["characters"] == make_characters(6.0)
+    replayed = [chars for _, chars in iter_snapshots(store)]
+    assert replayed[1] == make_characters(6.5, 31.0)
+
+    history = character_history(store, "Robin")
+    assert [h["stats"]["pf"].usage if "pf" in h["stats"] else None for h in history] == [
+        30.0,
+        31.0,
+        None,
+    ]
+
+
+def test_cap_folds_oldest_snapshots(tmp_path):
+    store = str(tmp_path / "history.sqlite")
+    for i in range(5):
+        append_snapshot(
+            store, "3.4", f"t{i}", make_characters(6.0 + i, 30.0), max_snapshots=3
+        )
+
+    assert [s[2] for s in list_snapshots(store)] == ["t2", "t3", "t4"]
+    oldest = load_snapshot(store, list_snapshots(store)[0][0])
+    # Robin's stats never changed, so the first row must survive the folding
+    assert oldest["characters"] == make_characters(8.0, 30.0)
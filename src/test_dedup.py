@@ -0,0 +1,57 @@
+# src/test_dedup.py
+import pandas as pd
+
+from data_processor import process_moc_data
+from dedup import Deduplicator
+
+
+def test_drops_repeats_within_and_across_chunks(make_frame, moc_rows):
+    df = make_frame(moc_rows + moc_rows[:2])
+    with Deduplicator() as dedup:
+        first = dedup.filter(df)
+        second = dedup.filter(make_frame(moc_rows[2:4]))
+
+    assert len(first) == len(moc_rows)
+    assert second.empty
+    assert dedup.dropped == 4 and dedup.kept == len(moc_rows)
+
+
+def test_spilled_runs_still_match(tmp_path):
+    rows = pd.DataFrame({"uid": range(100), "floor": 12, "round_num": 5})
+    with Deduplicator(max_keys=16, spill_dir=tmp_path) as dedup:
+        for start in range(0, 100, 10):
+            dedup.filter(rows.iloc[start : start + 10])
+        assert len(dedup._runs) > 1
+        assert dedup.filter(rows).empty
+        assert len(dedup.filter(rows.assign(round_num=6))) == 100
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_duplicate_upload_keeps_stage_complete(make_frame, moc_rows):
+    aggregates = {}
+    results = process_moc_data(make_frame(moc_rows + moc_rows[:2]), aggregates)
+
+    assert aggregates["moc"]["duplicates"] == 2
+    assert results["Kafka"]["usage"] == 50.0
+
+
+def test_streamed_chunks_are_deduplicated_across_dtypes(make_frame, moc_rows):
+    import io
+
+    from data_processor import concat_chunks, iter_csv_chunks
+    from dedup import row_hashes
+
+    rows = moc_rows[:4] + moc_rows[:2]
+    text = make_frame(rows).to_csv(index=False)
+    # A blank in the last chunk makes it parse round_num as float64
+    text += "7,12,1,3,,Seele,Sparkle,Silver Wolf,Fu Xuan\n"
+    with Deduplicator() as dedup:
+        chunks = list(iter_csv_chunks(io.StringIO(text), chunk_rows=4, dedup=dedup))
+    assert chunks[0]["round_num"].dtype == "int32"
+    assert chunks[1]["round_num"].dtype == "float64"
+    assert dedup.dropped == 2
+    assert len(concat_chunks(chunks)) == 5
+
+    frame = make_frame(moc_rows)
+    floats = frame.astype({"round_num": "float64", "floor": "float64"})
+    assert (row_hashes(frame) == row_hashes(floats)).all()
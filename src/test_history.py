@@ -0,0 +1,35 @@
+# src/test_history.py
+import json
+
+from dataset_store import append_snapshot
+from history import build_history_index
+from schema import characters_from_dict
+from visual_tierlist import get_trend_html
+
+
+def test_index_tracks_series_and_tier_movement(tmp_path):
+    roles = tmp_path / "roles.json"
+    roles.write_text(json.dumps({name: ["DPS"] for name in "ABCDEFGHIJ"}))
+    store = str(tmp_path / "history.sqlite")
+
+    def snapshot(order):
+        # Earlier letters in the order get lower cycles and so higher tiers
+        return characters_from_dict(
+            {
+                name: {"moc": {"cycles": 5.0 + rank * 0.5, "usage": 10.0}}
+                for rank, name in enumerate(order)
+            }
+        )
+
+    append_snapshot(store, "3.3", "t1", snapshot("ABCDEFGHIJ"))
+    append_snapshot(store, "3.4", "t2", snapshot("JBCDEFGHIA"))
+
+    index = build_history_index(store, str(roles))
+    assert [s["version"] for s in index["snapshots"]] == ["3.3", "3.4"]
+    assert index["characters"]["J"]["moc"]["tier"] == ["D", "S"]
+    assert index["characters"]["J"]["moc"]["movement"] == 4
+    assert index["characters"]["A"]["moc"]["movement"] == -4
+
+    html = get_trend_html("J", "Memory of Chaos", index)
+    assert "Rose 4 tiers" in html
+    assert get_trend_html("J", "Memory of Chaos", None) == ""
@@ -0,0 +1,75 @@
+# src/test_partial_aggregates.py
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_processor import combine_modes, process_moc_data, read_stats_csv
+from partial_aggregates import PARTIAL_SUFFIX, ingest_partial, reduce_partials
+from schema import characters_from_dict
+from serialization import dumps
+
+NAMES = ["Acheron", "Pela", "Jiaoqiu", "Aventurine", "Kafka", "Black Swan", None]
+
+
+def synthetic_rows(n_uids, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for uid in range(n_uids):
+        floor = 12 if uid % 4 else 11
+        for node in (1, 2):
+            team = [NAMES[i] for i in rng.choice(len(NAMES), 4, replace=False)]
+            rows.append([uid, floor, node, 3, int(rng.integers(0, 15)), *team])
+    return rows
+
+
+def test_reduced_partials_match_single_node(tmp_path, make_frame):
+    frame = make_frame(synthetic_rows(90))
+    frame = pd.concat([frame, frame.iloc[:3]])  # a duplicate upload
+    csv_paths = []
+    # Three nodes, each with its own uid range
+    for shard, uids in enumerate([range(0, 30), range(30, 60), range(60, 90)]):
+        path = tmp_path / f"moc-{shard}.csv"
+        frame[frame["uid"].isin(uids)].to_csv(path, index=False)
+        csv_paths.append(path)
+    whole = tmp_path / "moc.csv"
+    pd.concat(pd.read_csv(path) for path in csv_paths).to_csv(whole, index=False)
+
+    outputs = [str(tmp_path / f"moc-{shard}{PARTIAL_SUFFIX}") for shard in range(3)]
+    with ProcessPoolExecutor(max_workers=3) as pool:
+        list(pool.map(ingest_partial, csv_paths, ["moc"] * 3, outputs, range(3)))
+
+    # Shards can be given in any order
+    reduced_aggregates, single_aggregates = {}, {}
+    reduced = reduce_partials(outputs[::-1], reduced_aggregates)
+    single = combine_modes(
+        {"moc": process_moc_data(read_stats_csv(whole), single_aggregates)}
+    )
+
+    assert dumps(characters_from_dict(reduced), precision=None) == dumps(
+        characters_from_dict(single), precision=None
+    )
+    assert dumps(reduced_aggregates) == dumps(single_aggregates)
+    assert reduced_aggregates["moc"]["duplicates"] == 3
+
+
+def test_partial_size_follows_roster_not_rows(tmp_path, make_frame):
+    sizes = {}
+    for n_uids in (100, 5000):
+        csv = tmp_path / f"moc-{n_uids}.csv"
+        make_frame(synthetic_rows(n_uids)).to_csv(csv, index=False)
+        for details in (True, False):
+            path = tmp_path / f"moc-{n_uids}-{details}{PARTIAL_SUFFIX}"
+            ingest_partial(csv, "moc", str(path), details=details)
+            sizes[n_uids, details] = path.stat().st_size
+    assert sizes[5000, True] < 1.5 * sizes[100, True]
+    assert sizes[5000, False] < sizes[5000, True]
+
+    # Without details the stats come through, minus teams and intervals
+    full = reduce_partials([str(tmp_path / f"moc-5000-True{PARTIAL_SUFFIX}")])
+    bare = reduce_partials([str(tmp_path / f"moc-5000-False{PARTIAL_SUFFIX}")])
+    assert bare.keys() == full.keys()
+    for char, stats in bare.items():
+        assert {"teams", "ci"} <= full[char]["moc"].keys()
+        assert not {"teams", "ci"} & stats["moc"].keys()
+        assert stats["moc"]["usage"] == full[char]["moc"]["usage"]
@@ -0,0 +1,182 @@
+# src/test_refresh_daemon.py
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from refresh_daemon import Debouncer, RefreshDaemon, backoff_delay
+
+
+@pytest.fixture
+def upstream():
+    # Stand-in for the raw CSV host: {"status": forced status, "etag": current}
+    state = {"status": None, "etag": '"v1"', "requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            state["requests"] += 1
+            if state["status"]:
+                status = state["status"]
+            elif self.headers.get("If-None-Match") == state["etag"]:
+                status = 304
+            else:
+                status = 200
+            self.send_response(status)
+            self.send_header("ETag", state["etag"])
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield state, f"http://127.0.0.1:{httpd.server_port}/3.4.1.csv"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_ingests_only_on_change_and_backs_off(upstream, tmp_path):
+    state, url = upstream
+    calls = []
+    state_path = str(tmp_path / "refresh_state.json")
+
+    def make_daemon():
+        return RefreshDaemon(
+            [url],
+            ingest=lambda: calls.append("ingest"),
+            render=lambda: calls.append("render"),
+            state_path=state_path,
+            poll_seconds=100,
+            debounce_seconds=0.01,
+            backoff_base=5,
+            backoff_max=12,
+        )
+
+    daemon = make_daemon()
+    assert daemon.poll_once() == 100
+    daemon.debouncer.wait(5)
+    assert calls == ["ingest", "render"]
+    assert {"poll_seconds", "ingest_seconds", "render_seconds"} <= set(daemon.timings)
+
+    # Unchanged upstream: a 304 and nothing else, even after a restart
+    daemon = make_daemon()
+    assert daemon.poll_once() == 100
+    assert calls == ["ingest", "render"]
+
+    state["status"] = 503
+    assert [daemon.poll_once() for _ in range(3)] == [5, 10, 12]
+    assert daemon.timings["failures"] == 3
+
+    state["status"], state["etag"] = None, '"v2"'
+    assert daemon.poll_once() == 100
+    daemon.debouncer.wait(5)
+    assert calls == ["ingest", "render"] * 2
+    assert daemon.timings["failures"] == 0
+
+
+def test_failed_ingest_is_retried(upstream, tmp_path):
+    state, url = upstream
+    attempts = []
+
+    def ingest():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream CSV was truncated")
+
+    daemon = RefreshDaemon(
+        [url],
+        ingest,
+        render=lambda: None,
+        state_path=str(tmp_path / "state.json"),
+        debounce_seconds=0.01,
+        backoff_base=1,
+    )
+    assert daemon.poll_once() == 1
+    # The change wasn't recorded, so the next poll ingests again
+    assert daemon.poll_once() == daemon.poll_seconds
+    assert len(attempts) == 2
+
+
+def test_debounced_runs_never_overlap():
+    running, runs = [], []
+
+    def render():
+        running.append(1)
+        # Runs happen on timer threads, so record overlap instead of asserting
+        runs.append(len(running))
+        time.sleep(0.05)
+        running.pop()
+
+    debouncer = Debouncer(render, delay=0.01)
+    for _ in range(5):
+        debouncer.trigger()
+    assert debouncer.wait(5)
+    assert len(runs) == 1
+
+    # A trigger during a run queues exactly one more run
+    debouncer.trigger()
+    time.sleep(0.03)
+    debouncer.trigger()
+    assert debouncer.wait(5)
+    assert runs == [1, 1, 1]
+    assert backoff_delay(1, base=60) == 60 and backoff_delay(20) == 6 * 3600
+
+
+def test_empty_or_failed_ingest_is_not_committed(upstream, tmp_path, monkeypatch):
+    import data_processor
+    import update_data
+
+    state, url = upstream
+    dataset = tmp_path / "hsr_dataset.json"
+    monkeypatch.setattr(update_data, "DATASET_PATH", str(dataset))
+    monkeypatch.setattr(update_data, "get_processed_data", lambda **kwargs: {})
+    daemon = RefreshDaemon(
+        [url],
+        lambda: update_data.main([], raise_errors=True),
+        render=lambda: None,
+        state_path=str(tmp_path / "state.json"),
+        backoff_base=1,
+    )
+
+    # Nothing was processed, so nothing is saved and the change stays pending
+    assert daemon.poll_once() == 1
+    assert not dataset.exists()
+    assert daemon.detector.validators == {}
+    update_data.main([])  # Without raise_errors the failure is only printed
+
+    def unreachable(*args, **kwargs):
+        raise OSError("connection reset")
+
+    monkeypatch.setattr(data_processor, "stream_stats_csv", unreachable)
+    assert data_processor.get_processed_data() == {}
+    with pytest.raises(OSError):
+        data_processor.get_processed_data(strict=True)
+
+
+def test_render_never_overlaps_ingest(upstream, tmp_path):
+    state, url = upstream
+    running, overlaps = [], []
+
+    def work(seconds):
+        overlaps.append(len(running))
+        running.append(1)
+        time.sleep(seconds)
+        running.pop()
+
+    daemon = RefreshDaemon(
+        [url],
+        ingest=lambda: work(0.2),
+        render=lambda: work(0.2),
+        state_path=str(tmp_path / "state.json"),
+        debounce_seconds=0.01,
+    )
+    daemon.poll_once()
+    # The first render is still running when the next change arrives
+    state["etag"] = '"v2"'
+    time.sleep(0.05)
+    daemon.poll_once()
+    daemon.debouncer.wait(timeout=5)
+
+    assert overlaps and max(overlaps) == 0
+    assert {"last_ingest", "last_render"} <= daemon.timings.keys()
@@ -0,0 +1,54 @@
+# src/test_serialization.py
+import pytest
+
+from serialization import dumps, load_dataset, loads, save_dataset
+
+
+def test_canonical_form_is_compact_and_rounded(tmp_path):
+    dataset = {
+        "version": "3.4.1",
+        "characters": {"Anaxa": {"moc": {"usage": 16.691650915727042, "cycles": 6.351034752049981}}},
+    }
+    encoded = dumps(dataset)
+    assert b" " not in encoded
+    assert b"6.351035" in encoded
+    assert encoded.index(b'"cycles"') < encoded.index(b'"usage"')
+
+    path = tmp_path / "dataset.json"
+    save_dataset(str(path), dataset)
+    assert load_dataset(str(path))["characters"]["Anaxa"].moc.usage == 16.691651
+    assert loads(dumps(dataset, compact=False)) == loads(encoded)
+
+
+def test_schema_rejects_incomplete_modes(tmp_path):
+    path = tmp_path / "dataset.json"
+    save_dataset(str(path), {"characters": {"Robin": {"pf": {"usage": 30.0}}}})
+    with pytest.raises(ValueError, match="Missing data in PF for Robin"):
+        load_dataset(str(path))
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), -float("inf")])
+def test_schema_rejects_non_finite_numbers(value):
+    from schema import characters_from_dict
+
+    with pytest.raises(ValueError, match="Missing data in PF for Robin"):
+        characters_from_dict({"Robin": {"pf": {"score": value, "usage": 30.0}}})
+
+
+def test_schema_objects_drop_nan_names_and_coerce_numbers():
+    import numpy as np
+
+    from schema import CharacterStats, characters_from_dict
+
+    chars = characters_from_dict(
+        {
+            "nan": {"moc": {"cycles": 1, "usage": 1}},
+            "Misha": {"as": {"score": np.int64(3200), "usage": 0.006}, "xx": {}},
+        }
+    )
+    assert list(chars) == ["Misha"]
+    misha = chars["Misha"]
+    assert isinstance(misha, CharacterStats)
+    assert misha.as_.score == 3200.0 and misha.moc is None
+    assert [mode for mode, _ in misha.modes()] == ["as"]
+    assert not hasattr(misha, "__dict__")
@@ -0,0 +1,76 @@
+# src/test_tierlist_server.py
+import gzip
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from serialization import save_dataset
+from tierlist_server import TierListService, make_server
+
+
+@pytest.fixture
+def server(tmp_path):
+    dataset = tmp_path / "hsr_dataset.json"
+    roles = tmp_path / "roles.json"
+    characters = {
+        name: {"moc": {"cycles": 5.0 + i, "usage": 40.0 - i * 5}}
+        for i, name in enumerate(["Acheron", "Kafka", "Seele", "Blade"])
+    }
+    save_dataset(str(dataset), {"version": "3.4.1", "characters": characters})
+    roles.write_text(json.dumps({name: ["DPS"] for name in characters}))
+
+    service = TierListService(str(dataset), str(roles))
+    httpd = make_server(service, port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield service, f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(url, headers=None):
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+def test_tierlist_is_cached_and_revalidated(server):
+    service, base = server
+    status, headers, body = get(f"{base}/tierlist", {"Accept-Encoding": "gzip"})
+    assert status == 200
+    if headers.get("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    tiers = json.loads(body)["tier_lists"]["Memory of Chaos"]["DPS"]
+    assert tiers["S"] == ["Acheron"]
+
+    status, _, _ = get(f"{base}/tierlist", {"If-None-Match": headers["ETag"]})
+    assert status == 304
+    assert service.cache.hits == 1 and service.cache.misses == 1
+
+
+def test_custom_parameters_and_errors(server):
+    _, base = server
+    _, _, body = get(f"{base}/scores?performance=0&usage=1&min_usage=0")
+    scores = json.loads(body)["scores"]["moc"]
+    assert scores["Acheron"] == pytest.approx(0.4)
+
+    status, _, body = get(f"{base}/tierlist?S=0.9&A=0.5")
+    assert status == 400 and b"Tier ratios" in body
+    for query in ("S=nan", "performance=inf", "min_usage=-Infinity"):
+        status, _, body = get(f"{base}/tierlist?{query}")
+        assert status == 400 and b"finite" in body
+    assert get(f"{base}/nope")[0] == 404
+
+
+def test_unreadable_dataset_is_unavailable(server):
+    service, base = server
+    with open(service.dataset_path, "w") as f:
+        f.write("{")
+    status, _, body = get(f"{base}/tierlist")
+    assert status == 503 and b"Dataset unavailable" in body
@@ -0,0 +1,73 @@
+# src/test_visual_tierlist.py
+from schema import characters_from_dict
+from tierlist import calculate_scores, generate_role_based_tier_lists
+from visual_tierlist import (
+    build_image_manifest,
+    build_region_payload,
+    character_card_html,
+    get_stats_html,
+    icon_img_html,
+    missing_icons,
+)
+
+
+def test_icons_resolve_through_the_manifest(tmp_path):
+    (tmp_path / "acheron_icon.png").write_bytes(b"png")
+    (tmp_path / "placeholder_icon.svg").write_text("<svg/>")
+    images = build_image_manifest(str(tmp_path))
+
+    assert icon_img_html("Acheron", images) == (
+        '<img src="images/acheron_icon.png" alt="Acheron" width="60" height="60" '
+        'loading="lazy" decoding="async">'
+    )
+    assert 'src="../images/placeholder_icon.svg"' in icon_img_html(
+        "The Herta", images, prefix="../"
+    )
+    assert missing_icons(["The Herta", "Acheron", "Aglaea"], images) == [
+        "Aglaea",
+        "The Herta",
+    ]
+    assert build_image_manifest(str(tmp_path / "missing")) == frozenset()
+
+    characters = characters_from_dict({"Aglaea": {"moc": {"cycles": 5, "usage": 9}}})
+    card = character_card_html(
+        "Aglaea", "Memory of Chaos", "3.4.1", characters, {}, images=images
+    )
+    assert "images/placeholder_icon.svg" in card
+    assert "aglaea_icon.png" not in card
+
+
+def test_region_payload_carries_regional_tooltip_stats():
+    characters = characters_from_dict(
+        {
+            "Acheron": {
+                "moc": {
+                    "cycles": 6.25,
+                    "usage": 40.0,
+                    "regions": {
+                        "Asia": {"cycles": 5.1234, "usage": 55.5},
+                        "Europe": {"cycles": 7.0, "usage": 20.0},
+                    },
+                }
+            },
+            "Robin": {"pf": {"score": 36000.4, "usage": 70.0}},
+        }
+    )
+    roles = {"Acheron": ["DPS"], "Robin": ["Amplifier"]}
+    tier_lists = generate_role_based_tier_lists(
+        characters, calculate_scores(characters), roles
+    )
+    payload = build_region_payload(tier_lists, characters, roles)
+
+    assert payload["stats"]["Asia"]["moc"]["Acheron"] == {
+        "metric": "5.123",
+        "usage": "55.5",
+    }
+    assert payload["stats"]["Europe"]["general"]["Acheron"] == {"usage": "20"}
+    # Robin has no regional breakdown, so there is nothing to swap in
+    assert "Robin" not in payload["stats"]["Asia"]["pf"]
+
+    # The pooled figures sit in the spans the region filter rewrites
+    html = get_stats_html("Acheron", "Memory of Chaos", characters)
+    assert '<span class="stat-value" data-stat="metric">6.25</span>' in html
+    assert '<span class="stat-value" data-stat="usage">40</span>' in html
@@ -0,0 +1,88 @@
+# src/test_watch.py
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from serialization import save_dataset
+from tierlist import calculate_scores, generate_role_based_tier_lists
+from watch import EVENTS_PATH, EventLog, SiteState, Watcher, make_server
+
+
+@pytest.fixture
+def site(tmp_path):
+    dataset = tmp_path / "hsr_dataset.json"
+    roles = tmp_path / "roles.json"
+    characters = {
+        name: {"moc": {"cycles": 3.0 + i, "usage": 40.0 - i * 4}}
+        for i, name in enumerate(["Acheron", "Kafka", "Seele", "Blade", "Tingyun"])
+    }
+    save_dataset(str(dataset), {"version": "3.4.1", "characters": characters})
+    role_data = {name: ["DPS"] for name in characters}
+    role_data["Tingyun"] = ["Amplifier"]
+    roles.write_text(json.dumps(role_data))
+    return SiteState(str(dataset), str(roles)), roles, role_data
+
+
+def edit_roles(path, role_data):
+    path.write_text(json.dumps(role_data))
+    # Make sure the change shows even on coarse filesystem timestamps
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def without_timestamp(page):
+    return re.sub(r"Generated on [\d\- :]+", "", page)
+
+
+def test_role_edit_recomputes_only_affected_roles(site):
+    state, roles, role_data = site
+    role_data["Kafka"] = ["DPS", "Sub DPS"]
+    edit_roles(roles, role_data)
+
+    fragments = state.update_roles()
+
+    # DPS and Sub DPS, 5 tiers each, in each of the 4 tabs
+    assert {fragment["role"] for fragment in fragments} == {0, 1}
+    assert len(fragments) == 2 * 5 * 4
+    scores = calculate_scores(state.characters)
+    assert state.tier_lists == generate_role_based_tier_lists(
+        state.characters, scores, role_data
+    )
+    sub_dps = [f["html"] for f in fragments if f["role"] == 1 and f["tab"] == "moc"]
+    assert any('data-char="Kafka"' in html for html in sub_dps)
+    assert without_timestamp(state.page()) == without_timestamp(
+        SiteState(state.dataset_path, state.roles_path).page()
+    )
+
+
+def test_watcher_pushes_fragments_to_the_preview(site, tmp_path):
+    state, roles, role_data = site
+    events, lock = EventLog(), threading.Lock()
+    httpd = make_server(state, events, lock, port=0, directory=str(tmp_path))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_port}"
+    watcher = Watcher(state, events, lock, templates=[])
+    try:
+        with urllib.request.urlopen(f"{base}/") as response:
+            assert EVENTS_PATH in response.read().decode("utf-8")
+
+        with urllib.request.urlopen(f"{base}{EVENTS_PATH}", timeout=5) as stream:
+            role_data["Seele"] = ["Sub DPS"]
+            edit_roles(roles, role_data)
+            start = time.perf_counter()
+            assert watcher.check() == {"roles"}
+            line = stream.readline().decode("utf-8")
+            elapsed = time.perf_counter() - start
+
+        event = json.loads(line[len("data: ") :])
+        assert event["type"] == "fragments"
+        assert elapsed < 1
+        assert watcher.check() == set()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
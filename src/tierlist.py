@@ -1,7 +1,10 @@
+import argparse
 import json
 import os
 from datetime import datetime
 
+from serialization import load_dataset
+
 # Configuration
 TIER_RATIOS = {"S": 0.1, "A": 0.2, "B": 0.3, "C": 0.3}  # D-tier gets remainder
 WEIGHTS = {"performance": 0.7, "usage": 0.3}
@@ -13,50 +16,54 @@ MIN_USAGE = 0.5
 USAGE_CAP = 95
 
 
-def calculate_scores(data):
+def calculate_scores(data, weights=None, min_usage=None, usage_cap=None):
+    # Module settings are the defaults; callers may override them per call
+    weights = weights if weights is not None else WEIGHTS
+    min_usage = min_usage if min_usage is not None else MIN_USAGE
+    usage_cap = usage_cap if usage_cap is not None else USAGE_CAP
     scores = {"moc": {}, "pf": {}, "as": {}, "general": {}}
 
     for char, stats in data.items():
         # Process MoC
-        if "moc" in stats:
-            moc_stats = stats["moc"]
-            cycles = min(moc_stats["cycles"], 10)
+        if stats.moc is not None:
+            moc_stats = stats.moc
+            cycles = min(moc_stats.cycles, 10)
             perf_moc = (10 - cycles) / 10
 
             # Apply usage threshold and cap
-            usage = max(min(moc_stats["usage"], USAGE_CAP), MIN_USAGE)
+            usage = max(min(moc_stats.usage, usage_cap), min_usage)
             usage_moc = usage / 100
 
-            scores["moc"][char] = (WEIGHTS["performance"] * perf_moc) + (
-                WEIGHTS["usage"] * usage_moc
+            scores["moc"][char] = (weights["performance"] * perf_moc) + (
+                weights["usage"] * usage_moc
             )
 
         # Process Pure Fiction
-        if "pf" in stats:
-            pf_stats = stats["pf"]
-            score_val = max(23000, min(pf_stats["score"], 40000))
+        if stats.pf is not None:
+            pf_stats = stats.pf
+            score_val = max(23000, min(pf_stats.score, 40000))
             perf_pf = score_val / 40000
 
             # Apply usage threshold and cap
-            usage = max(min(pf_stats["usage"], USAGE_CAP), MIN_USAGE)
+            usage = max(min(pf_stats.usage, usage_cap), min_usage)
             usage_pf = usage / 100
 
-            scores["pf"][char] = (WEIGHTS["performance"] * perf_pf) + (
-                WEIGHTS["usage"] * usage_pf
+            scores["pf"][char] = (weights["performance"] * perf_pf) + (
+                weights["usage"] * usage_pf
             )
 
         # Process Apocalyptic Shadow
-        if "as" in stats:
-            as_stats = stats["as"]
-            score_val = max(3100, min(as_stats["score"], 4000))
+        if stats.as_ is not None:
+            as_stats = stats.as_
+            score_val = max(3100, min(as_stats.score, 4000))
             perf_as = score_val / 4000
 
             # Apply usage threshold and cap
-            usage = max(min(as_stats["usage"], USAGE_CAP), MIN_USAGE)
+            usage = max(min(as_stats.usage, usage_cap), min_usage)
             usage_as = usage / 100
 
-            scores["as"][char] = (WEIGHTS["performance"] * perf_as) + (
-                WEIGHTS["usage"] * usage_as
+            scores["as"][char] = (weights["performance"] * perf_as) + (
+                weights["usage"] * usage_as
             )
 
         # General Score Calculation
@@ -71,17 +78,19 @@ def calculate_scores(data):
     return scores
 
 
-def assign_tiers(score_dict, data=None):
+def assign_tiers(score_dict, data=None, tier_ratios=None, min_usage=None):
     """Assign tiers based on score distribution"""
+    tier_ratios = tier_ratios if tier_ratios is not None else TIER_RATIOS
+    min_usage = min_usage if min_usage is not None else MIN_USAGE
+
     # If data is provided, filter out non-viable characters
     if data is not None:
         viable_chars = {
             char: score
             for char, score in score_dict.items()
-            if any(
-                mode in data.get(char, {})
-                and data[char][mode].get("usage", 0) >= MIN_USAGE
-                for mode in ["moc", "pf", "as"]
+            if char in data
+            and any(
+                mode_stats.usage >= min_usage for _, mode_stats in data[char].modes()
             )
         }
     else:
@@ -93,7 +102,7 @@ def assign_tiers(score_dict, data=None):
     # Calculate tier counts
     counts = {}
     cumulative = 0
-    for tier, ratio in TIER_RATIOS.items():
+    for tier, ratio in tier_ratios.items():
         count = max(1, round(n_chars * ratio))
         cumulative += count
         counts[tier] = count
@@ -114,14 +123,17 @@ def assign_tiers(score_dict, data=None):
     return tiers
 
 
-def generate_role_based_tier_lists(data, scores):
+def generate_role_based_tier_lists(
+    data, scores, role_data=None, tier_ratios=None, min_usage=None
+):
     """Generate tier lists for each role and game mode"""
-    try:
-        with open(ROLES_PATH) as f:
-            role_data = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: Role file {ROLES_PATH} not found!")
-        return {}
+    if role_data is None:
+        try:
+            with open(ROLES_PATH) as f:
+                role_data = json.load(f)
+        except FileNotFoundError:
+            print(f"Error: Role file {ROLES_PATH} not found!")
+            return {}
 
     # Create the tier list structure
     tier_lists = {
@@ -153,21 +165,22 @@ def generate_role_based_tier_lists(data, scores):
 
             # Only create tier list if there are characters in this role
             if role_scores:
-                tier_lists[mode_name][role] = assign_tiers(role_scores, data)
+                tier_lists[mode_name][role] = assign_tiers(
+                    role_scores, data, tier_ratios, min_usage
+                )
 
     return tier_lists
 
 
-# Example Usage
-if __name__ == "__main__":
+def print_tier_lists(dataset_path=DATASET_PATH):
+    """Print the role-based tier lists for the current dataset"""
     # Load dataset (example structure shown below)
     try:
-        with open(DATASET_PATH) as f:
-            data = json.load(f)
+        data = load_dataset(dataset_path)["characters"]
     except FileNotFoundError:
-        print(f"Error: Dataset file {DATASET_PATH} not found!")
+        print(f"Error: Dataset file {dataset_path} not found!")
         print("Please run update_data.py first to create a dataset.")
-        exit(1)
+        raise SystemExit(1)
 
     # Calculate scores
     scores = calculate_scores(data)
@@ -184,3 +197,102 @@ if __name__ == "__main__":
             for tier, chars in tiers.items():
                 if chars:  # Only print if there are characters
                     print(f"  {tier}-tier: {', '.join(chars)}")
+
+
+def refresh_upstream(interval=None, status_only=False):
+    """Run the refresh daemon against the upstream CSVs until interrupted"""
+    try:
+        import refresh_daemon
+    except ImportError as e:
+        # The frozen bundle leaves out the daemon and its requests dependency
+        print(f"Error: refresh needs the full install ({e})")
+        raise SystemExit(1)
+
+    if status_only:
+        daemon = refresh_daemon.RefreshDaemon([], None, None)
+        if not daemon.timings:
+            print("No refresh has run yet")
+        for name, value in sorted(daemon.timings.items()):
+            print(f"{name}: {value}")
+        return
+
+    import update_data
+    import visual_tierlist
+    from data_processor import mode_urls
+
+    daemon = refresh_daemon.RefreshDaemon(
+        mode_urls(update_data.VERSION, **update_data.UPSTREAM).values(),
+        # Raising keeps the change uncommitted, so the next poll retries
+        ingest=lambda: update_data.main([], raise_errors=True),
+        render=visual_tierlist.main,
+        poll_seconds=interval or refresh_daemon.POLL_SECONDS,
+    )
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        daemon.stop()
+
+
+def main(argv=None):
+    """tierlist command line: ingest, score, render, serve, watch or refresh
+
+    Each subcommand imports what it needs when it runs, so rendering and
+    serving never load pandas or requests. Without a subcommand the tier
+    lists are printed, as before.
+    """
+    parser = argparse.ArgumentParser(
+        prog="tierlist", description="Build and serve the HSR tier list"
+    )
+    commands = parser.add_subparsers(dest="command")
+    ingest = commands.add_parser("ingest", help="Fetch the stats, update the dataset")
+    ingest.add_argument(
+        "args", nargs=argparse.REMAINDER, help="Options for update_data.py"
+    )
+    commands.add_parser("score", help="Print the tier lists")
+    commands.add_parser("render", help="Write the static site to ../public")
+    serve = commands.add_parser("serve", help="Run the tier list JSON API")
+    serve.add_argument("--host", help="Address to bind")
+    serve.add_argument("--port", type=int, help="Port to listen on")
+    watcher = commands.add_parser(
+        "watch", help="Preview with live reload while editing roles or templates"
+    )
+    watcher.add_argument("--port", type=int, help="Port to listen on")
+    refresh = commands.add_parser(
+        "refresh", help="Poll upstream; ingest and render when it changes"
+    )
+    refresh.add_argument("--interval", type=float, help="Seconds between polls")
+    refresh.add_argument(
+        "--status", action="store_true", help="Print the last-run timings and exit"
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        try:
+            import update_data
+        except ImportError as e:
+            # The frozen bundle leaves out the ingest dependencies
+            print(f"Error: ingest needs the full install ({e})")
+            raise SystemExit(1)
+        update_data.main(args.args)
+    elif args.command == "render":
+        import visual_tierlist
+
+        visual_tierlist.main()
+    elif args.command == "serve":
+        import tierlist_server
+
+        tierlist_server.serve(
+            args.host or tierlist_server.HOST, args.port or tierlist_server.PORT
+        )
+    elif args.command == "watch":
+        import watch
+
+        watch.watch(port=args.port or watch.PORT)
+    elif args.command == "refresh":
+        refresh_upstream(args.interval, args.status)
+    else:
+        print_tier_lists()
+
+
+if __name__ == "__main__":
+    main()
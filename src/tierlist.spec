@@ -0,0 +1,44 @@
+# -*- mode: python ; coding: utf-8 -*-
+# PyInstaller build of the tierlist CLI: pyinstaller tierlist.spec
+#
+# The bundle is for render, score and serve. Ingesting needs pandas and
+# requests, which are left out along with the modules that import them;
+# run "tierlist ingest" from a source checkout instead.
+
+INGEST_MODULES = [
+    "archive_source",
+    "data_processor",
+    "dedup",
+    "parallel_ingest",
+    "partial_aggregates",
+    "refresh_daemon",
+    "update_data",
+]
+
+a = Analysis(
+    ["tierlist.py"],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    # Imported inside main(), per subcommand
+    hiddenimports=["visual_tierlist", "character_pages", "tierlist_server", "watch"],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=["pandas", "requests", "pyarrow", *INGEST_MODULES],
+    noarchive=False,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    a.binaries,
+    a.datas,
+    [],
+    name="tierlist",
+    debug=False,
+    strip=False,
+    upx=True,
+    console=True,
+)
@@ -0,0 +1,256 @@
+# tierlist_server.py
+import gzip
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import tierlist
+from serialization import dumps, load_dataset
+
+# Configuration
+HOST = "127.0.0.1"
+PORT = 8718
+CACHE_SIZE = 128  # Distinct parameter sets kept in memory
+GZIP_MIN_BYTES = 512  # Smaller responses are not worth compressing
+ENDPOINTS = ("/scores", "/tierlist")
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache"""
+
+    def __init__(self, max_size=CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def _float_param(query, name, default):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = float(values[-1])
+    except ValueError:
+        raise ValueError(f"Parameter {name} must be a number")
+    # float() also accepts "nan" and "inf", which no scoring step can use
+    if not math.isfinite(value):
+        raise ValueError(f"Parameter {name} must be a finite number")
+    return value
+
+
+def parse_params(query):
+    """Resolve query parameters against the tierlist defaults"""
+    weights = {
+        key: _float_param(query, key, default)
+        for key, default in tierlist.WEIGHTS.items()
+    }
+    tier_ratios = {
+        tier: _float_param(query, tier, default)
+        for tier, default in tierlist.TIER_RATIOS.items()
+    }
+    if any(value < 0 for value in list(weights.values()) + list(tier_ratios.values())):
+        raise ValueError("Weights and tier ratios must not be negative")
+    if sum(tier_ratios.values()) > 1:
+        raise ValueError("Tier ratios must not add up to more than 1")
+
+    return {
+        "weights": weights,
+        "tier_ratios": tier_ratios,
+        "min_usage": _float_param(query, "min_usage", tierlist.MIN_USAGE),
+        "usage_cap": _float_param(query, "usage_cap", tierlist.USAGE_CAP),
+    }
+
+
+def cache_key(endpoint, params):
+    """Hashable key for a fully resolved request"""
+    return (
+        endpoint,
+        tuple(sorted(params["weights"].items())),
+        tuple(sorted(params["tier_ratios"].items())),
+        params["min_usage"],
+        params["usage_cap"],
+    )
+
+
+class TierListService:
+    """Keeps the dataset resident and caches computed responses"""
+
+    def __init__(
+        self,
+        dataset_path=tierlist.DATASET_PATH,
+        roles_path=tierlist.ROLES_PATH,
+        cache_size=CACHE_SIZE,
+    ):
+        self.dataset_path = dataset_path
+        self.roles_path = roles_path
+        self.cache = LRUCache(cache_size)
+        self.lock = threading.Lock()
+        self.mtimes = None
+        self.reload_if_changed()
+
+    def _current_mtimes(self):
+        return (
+            os.stat(self.dataset_path).st_mtime_ns,
+            os.stat(self.roles_path).st_mtime_ns,
+        )
+
+    def reload_if_changed(self):
+        """Reload inputs only when a file on disk has been replaced"""
+        mtimes = self._current_mtimes()
+        if mtimes == self.mtimes:
+            return
+        with self.lock:
+            if mtimes == self.mtimes:
+                return
+            dataset = load_dataset(self.dataset_path)
+            with open(self.roles_path) as f:
+                role_data = json.load(f)
+            self.version = dataset.get("version", "Unknown")
+            self.characters = dataset["characters"]
+            self.role_data = role_data
+            self.mtimes = mtimes
+            self.cache.clear()
+            print(f"Loaded dataset v{self.version} ({len(self.characters)} characters)")
+
+    def compute(self, endpoint, params):
+        """Run the scoring pipeline for one parameter set"""
+        scores = tierlist.calculate_scores(
+            self.characters,
+            weights=params["weights"],
+            min_usage=params["min_usage"],
+            usage_cap=params["usage_cap"],
+        )
+        payload = {"version": self.version, "params": params}
+        if endpoint == "/scores":
+            payload["scores"] = scores
+        else:
+            payload["tier_lists"] = tierlist.generate_role_based_tier_lists(
+                self.characters,
+                scores,
+                self.role_data,
+                params["tier_ratios"],
+                params["min_usage"],
+            )
+        return payload
+
+    def response(self, endpoint, params):
+        """Cached (body, gzipped body, etag) for a request"""
+        self.reload_if_changed()
+        key = cache_key(endpoint, params) + (self.mtimes,)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        body = dumps(self.compute(endpoint, params))
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        gzipped = gzip.compress(body) if len(body) >= GZIP_MIN_BYTES else None
+        entry = (body, gzipped, etag)
+        self.cache.put(key, entry)
+        return entry
+
+
+class TierListHandler(BaseHTTPRequestHandler):
+    """JSON API over a shared TierListService"""
+
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            return self._send_json(200, {"status": "ok"})
+        if url.path not in ENDPOINTS:
+            return self._send_json(404, {"error": f"Unknown endpoint {url.path}"})
+
+        try:
+            params = parse_params(parse_qs(url.query))
+        except ValueError as e:
+            return self._send_json(400, {"error": str(e)})
+
+        try:
+            body, gzipped, etag = self.service.response(url.path, params)
+        except (OSError, ValueError) as e:
+            # The dataset or roles file is missing or unreadable right now
+            return self._send_json(503, {"error": f"Dataset unavailable: {e}"})
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        use_gzip = gzipped is not None and "gzip" in self.headers.get(
+            "Accept-Encoding", ""
+        )
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+            body = gzipped
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}")
+
+
+def make_server(service, host=HOST, port=PORT):
+    """Create a threaded HTTP server bound to a service"""
+    handler = type("BoundTierListHandler", (TierListHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(host=HOST, port=PORT, dataset_path=None, roles_path=None):
+    """Run the tier list service until interrupted"""
+    service = TierListService(
+        dataset_path or tierlist.DATASET_PATH, roles_path or tierlist.ROLES_PATH
+    )
+    server = make_server(service, host, port)
+    print(f"Serving tier lists on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
@@ -1,12 +1,17 @@
 # update_data.py
-import json
+import argparse
 import os
-from datetime import datetime
-import pandas as pd
-import shutil  # Add this import
+from datetime import datetime, timedelta
 
 # Remove: from tierlist import DATASET_PATH
+from archive_source import get_archive_data, version_key
 from data_processor import get_processed_data
+from atomic_io import atomic_write
+from dataset_store import append_snapshot, list_snapshots
+from history import write_history_index
+from partial_aggregates import reduce_partials
+from schema import characters_from_dict
+from serialization import dumps, load_dataset, save_dataset
 
 # Get the directory of this script
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -14,101 +19,176 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 # Define paths relative to script location
 ARCHIVE_DIR = os.path.join(SCRIPT_DIR, "dataset_archive")
 DATASET_PATH = os.path.join(SCRIPT_DIR, "hsr_dataset.json")  # Define locally
+STORE_PATH = os.path.join(ARCHIVE_DIR, "history.sqlite")
+HISTORY_INDEX_PATH = os.path.join(SCRIPT_DIR, "history_index.json")
+AGGREGATES_PATH = os.path.join(SCRIPT_DIR, "hsr_aggregates.json")
+ROLES_PATH = os.path.join(SCRIPT_DIR, "character_roles.json")
 VERSION = "3.4.1"
+UPSTREAM = {"owner": "LvlUrArti", "repo": "MocStats", "path": "data/raw_csvs"}
 
 
 def clean_dataset(data):
-    """Remove NaN characters and invalid entries"""
-    cleaned = {}
-    for char, stats in data.items():
-        # Skip NaN characters
-        if pd.isna(char) or char == "nan":
-            continue
-
-        # Create a clean entry
-        clean_stats = {}
-        for mode, mode_stats in stats.items():
-            if mode == "moc":
-                clean_stats["moc"] = {
-                    "cycles": float(mode_stats.get("cycles", 10)),
-                    "usage": float(mode_stats.get("usage", 0)),
-                }
-            elif mode in ["pf", "as"]:
-                clean_stats[mode] = {
-                    "score": float(mode_stats.get("score", 0)),
-                    "usage": float(mode_stats.get("usage", 0)),
-                }
-        cleaned[char] = clean_stats
-    return cleaned
+    """Drop NaN characters and build validated stats objects"""
+    return characters_from_dict(data)
+
+
+def archive_snapshot(dataset):
+    """Append a dataset snapshot to the versioned store"""
+    append_snapshot(
+        STORE_PATH,
+        dataset.get("version", "unknown"),
+        dataset.get("last_updated", datetime.now().isoformat()),
+        dataset.get("characters", {}),
+    )
+
+
+def migrate_legacy_archives():
+    """Move timestamped JSON copies and the current dataset into the store"""
+    if list_snapshots(STORE_PATH):
+        return
+
+    legacy = sorted(
+        name
+        for name in os.listdir(ARCHIVE_DIR)
+        if name.startswith("dataset_") and name.endswith(".json")
+    )
+    for name in legacy:
+        path = os.path.join(ARCHIVE_DIR, name)
+        archive_snapshot(load_dataset(path))
+        os.remove(path)
+        print(f"Migrated {name} into the dataset store")
+
+    if os.path.exists(DATASET_PATH):
+        archive_snapshot(load_dataset(DATASET_PATH))
 
 
 def update_dataset(new_data):
     """Update dataset with versioning"""
+    if not new_data:
+        # An empty ingest would wipe the published tier lists
+        raise ValueError("No characters were processed; keeping the current dataset")
+
     # Create archive directory if it doesn't exist
     os.makedirs(ARCHIVE_DIR, exist_ok=True)
 
-    # Archive current dataset if exists
-    if os.path.exists(DATASET_PATH):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        archive_filename = f"dataset_{VERSION}_{timestamp}.json"
-        archive_path = os.path.join(ARCHIVE_DIR, archive_filename)
-
-        # Copy instead of rename to avoid cross-device issues
-        shutil.copy2(DATASET_PATH, archive_path)
-        print(f"Archived current dataset to {archive_path}")
+    # Keep the history of earlier datasets before replacing it
+    migrate_legacy_archives()
 
     new_data = {
         "version": VERSION,
         "last_updated": datetime.now().isoformat(),
         "characters": new_data,  # Your existing character data
     }
-    # Save new dataset
-    with open(DATASET_PATH, "w") as f:
-        json.dump(new_data, f, indent=2)
+    archive_snapshot(new_data)
+    write_history_index(STORE_PATH, HISTORY_INDEX_PATH, ROLES_PATH)
 
+    # Save new dataset in the compact canonical form
+    save_dataset(DATASET_PATH, new_data)
 
-def validate_data(data):
-    """Ensure data has required structure"""
-    for char, stats in data.items():
-        for mode in ["moc", "pf", "as"]:
-            if mode in stats:
-                if mode == "moc":
-                    if "cycles" not in stats[mode] or "usage" not in stats[mode]:
-                        raise ValueError(f"Missing data in MoC for {char}")
-                else:
-                    if "score" not in stats[mode] or "usage" not in stats[mode]:
-                        raise ValueError(f"Missing data in {mode.upper()} for {char}")
 
+def backfill_history(source=None):
+    """Add a snapshot for every upstream version the store lacks, oldest first
 
-if __name__ == "__main__":
-    try:
-        # Fetch and process data from GitHub
-        print("Fetching and processing data from GitHub...")
-        new_data = get_processed_data(
-            version=VERSION,  # Update version as needed
-            owner="LvlUrArti",  # GitHub owner
-            repo="MocStats",  # Repository name
-            path="data/raw_csvs",  # Path to CSV files
+    source is a local clone or .tar.gz of the upstream repository; without
+    one the archive is streamed from GitHub in a single request. Snapshots
+    are read back in insertion order, so versions older than one already
+    stored can only be backfilled into an empty store.
+    """
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    stored = {version for _, version, _ in list_snapshots(STORE_PATH)}
+    all_versions = get_archive_data(source, skip=stored, **UPSTREAM)
+    missing = sorted(all_versions, key=version_key)
+    newest = max(
+        (version_key(v) for v in stored if v.replace(".", "").isdigit()),
+        default=None,
+    )
+    if missing and newest is not None and version_key(missing[0]) < newest:
+        raise ValueError(
+            f"Cannot backfill {missing[0]} after newer stored versions; "
+            f"move {STORE_PATH} aside and backfill into an empty store"
         )
 
-        # Clean the dataset
-        new_data = clean_dataset(new_data)
+    # One second apart, so timestamps follow the version order
+    start = datetime.now().replace(microsecond=0)
+    for i, version in enumerate(missing):
+        timestamp = (start + timedelta(seconds=i)).isoformat()
+        append_snapshot(
+            STORE_PATH, version, timestamp, clean_dataset(all_versions[version])
+        )
+    write_history_index(STORE_PATH, HISTORY_INDEX_PATH, ROLES_PATH)
+    return missing
+
+
+def save_aggregates(aggregates):
+    """Save the per-mode aggregates (cubes) alongside the dataset"""
+    atomic_write(AGGREGATES_PATH, dumps(aggregates))
+    print(f"Saved aggregates for {', '.join(aggregates)} to {AGGREGATES_PATH}")
+
+
+def main(argv=None, raise_errors=False):
+    """Fetch (or reduce) the stats and update the dataset
+
+    Failures are reported and swallowed, unless raise_errors is set (for
+    callers such as the refresh daemon that must know the update failed).
+    """
+    parser = argparse.ArgumentParser(description="Update the tier list dataset")
+    parser.add_argument(
+        "partials", nargs="*", help="Partial aggregate files to merge instead"
+    )
+    parser.add_argument(
+        "--backfill",
+        nargs="?",
+        const="",
+        metavar="SOURCE",
+        help="Snapshot every upstream version (from a clone, a .tar.gz or GitHub)",
+    )
+    args = parser.parse_args(argv)
 
-        # Validate before updating
-        validate_data(new_data)
+    try:
+        if args.backfill is not None:
+            # Rebuild the history from every upstream version, then stop
+            backfilled = backfill_history(args.backfill or None)
+            print(f"Backfilled {len(backfilled)} version(s): {', '.join(backfilled)}")
+            return
+
+        aggregates = {}
+        if args.partials:
+            # Merge partial aggregate files written by ingest nodes
+            print(f"Reducing {len(args.partials)} partial aggregate file(s)...")
+            new_data = reduce_partials(args.partials, aggregates)
+        else:
+            # Fetch and process data from GitHub
+            print("Fetching and processing data from GitHub...")
+            new_data = get_processed_data(
+                version=VERSION,  # Update version as needed
+                aggregates=aggregates,
+                strict=raise_errors,
+                **UPSTREAM,  # GitHub owner, repository and CSV directory
+            )
+
+        # Clean and validate the dataset in a single pass
+        new_data = clean_dataset(new_data)
 
         # Perform update
         update_dataset(new_data)
+        save_aggregates(aggregates)
         print(f"Dataset updated successfully! Processed {len(new_data)} characters.")
 
         # Print archive info
-        if os.path.exists(ARCHIVE_DIR):
-            archives = os.listdir(ARCHIVE_DIR)
-            if archives:
-                print(f"Previous version archived as: {archives[-1]}")
+        snapshots = list_snapshots(STORE_PATH)
+        if snapshots:
+            print(f"Dataset store holds {len(snapshots)} snapshot(s)")
     except ValueError as e:
         print(f"Validation Error: {e}")
         print("Update aborted. Please fix data format.")
+        if raise_errors:
+            raise
     except Exception as e:
         print(f"Unexpected Error: {e}")
         print("Update failed. Check the GitHub URL or data format.")
+        if raise_errors:
+            raise
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
 import json
 import os
 from datetime import datetime
+from html import escape
 import shutil
 
+from aggregate_cube import AGGREGATES_PATH, load_aggregates
+from atomic_io import atomic_write
+from history import HISTORY_INDEX_PATH, MODE_KEYS, TIER_ORDER, load_history_index
+from schema import characters_from_dict
+from serialization import load_dataset
+
 # Configuration
 DATASET_PATH = "hsr_dataset.json"
 ROLES_PATH = "character_roles.json"
@@ -15,7 +22,13 @@ COLORS = {
     "D": "#7fbfff",  # Blue
 }
 ROLE_TYPES = ["DPS", "Sub DPS", "Amplifier", "Sustain"]  # Define role types
+SPARKLINE_SIZE = (120, 24)
+NODE_LABELS = {"1": "First half", "2": "Second half"}
 GITHUB_REPO_URL = "https://github.com/eve718/honkai-tier-list/tree/main"
+SITE_URL = "https://my-hsr-tierlist.netlify.app/"
+IMAGES_DIR = "../public/images"
+PLACEHOLDER_ICON = "placeholder_icon.svg"  # Shown for characters without an icon
+ICON_SIZE = 60  # Matches .character img, so the layout doesn't shift on load
 
 
 def sanitize_filename(name):
@@ -37,8 +50,52 @@ def sanitize_filename(name):
     return name.strip().lower().replace(" ", "_")
 
 
-def generate_html(tier_lists, game_version, characters_data, role_data):
-    """Generate a visually appealing HTML tier list with tabbed interface and horizontal roles"""
+def build_image_manifest(images_dir=IMAGES_DIR):
+    """Names of the files in the images directory, listed once per build"""
+    try:
+        return frozenset(os.listdir(images_dir))
+    except FileNotFoundError:
+        return frozenset()
+
+
+def icon_path(char, images):
+    """The character's icon if the manifest has it, else the shared placeholder"""
+    name = f"{sanitize_filename(char)}_icon.png"
+    return f"images/{name if name in images else PLACEHOLDER_ICON}"
+
+
+def icon_img_html(char, images, prefix=""):
+    """Sized, lazily loaded <img> for a character icon; prefix is the path to /"""
+    return (
+        f'<img src="{prefix}{icon_path(char, images)}" alt="{escape(char)}" '
+        f'width="{ICON_SIZE}" height="{ICON_SIZE}" loading="lazy" decoding="async">'
+    )
+
+
+def missing_icons(chars, images):
+    """Characters that fall back to the placeholder, sorted"""
+    placeholder = f"images/{PLACEHOLDER_ICON}"
+    return sorted(char for char in chars if icon_path(char, images) == placeholder)
+
+
+def generate_html(
+    tier_lists,
+    game_version,
+    characters_data,
+    role_data,
+    history_index=None,
+    aggregates=None,
+    region_payload=None,
+    output_file=OUTPUT_FILE,
+    images=None,
+):
+    """Generate a visually appealing HTML tier list with tabbed interface and horizontal roles
+
+    The page is written to output_file (unless it is None) and returned.
+    images is the manifest from build_image_manifest; by default it is built.
+    """
+    if images is None:
+        images = build_image_manifest()
 
     collapsible_methodology = """
     <div class="methodology-collapsible">
@@ -449,6 +506,60 @@ def generate_html(tier_lists, game_version, characters_data, role_data):
             line-height: 1.4;
             margin-bottom: 8px;
         }}
+        .stat-ci {{
+            color: #aaa;
+            font-size: 0.75rem;
+        }}
+        .region-filter {{
+            text-align: center;
+            margin: 0 auto 20px;
+        }}
+        .region-filter select {{
+            background: var(--tab-inactive);
+            color: #e6e6e6;
+            border: none;
+            border-radius: 5px;
+            padding: 6px 12px;
+            font-size: 1rem;
+        }}
+        .tooltip-nodes {{
+            width: 100%;
+            font-size: 0.8rem;
+            color: #ddd;
+            border-collapse: collapse;
+            margin-bottom: 8px;
+        }}
+        .tooltip-nodes th, .tooltip-nodes td {{
+            padding: 1px 4px;
+            text-align: right;
+        }}
+        .tooltip-nodes td:first-child {{
+            text-align: left;
+        }}
+        .tooltip-partners {{
+            font-size: 0.8rem;
+            color: #ddd;
+            margin-bottom: 8px;
+        }}
+        .tooltip-teams {{
+            font-size: 0.8rem;
+            color: #ddd;
+            margin-bottom: 8px;
+        }}
+        .tooltip-trend {{
+            font-size: 0.8rem;
+            margin-bottom: 8px;
+        }}
+        .tooltip-trend svg {{
+            display: block;
+            margin: 0 auto 4px;
+        }}
+        .trend-badge.up {{
+            color: #7fff7f;
+        }}
+        .trend-badge.down {{
+            color: #ff7f7f;
+        }}
         .tooltip-footer {{
             font-size: 0.8rem;
             color: #aaa;
@@ -570,21 +681,34 @@ def generate_html(tier_lists, game_version, characters_data, role_data):
             <button class="tab-button" data-tab="as">Apocalyptic Shadow</button>
             <button class="tab-button" data-tab="general">General Tier List</button>
         </div>
+        {get_region_filter_html(region_payload)}
 """
 
     # Add tier lists for each game mode as tab content
-    tab_ids = {
-        "Memory of Chaos": "moc",
-        "Pure Fiction": "pf",
-        "Apocalyptic Shadow": "as",
-        "General Tier List": "general",
-    }
-
     for mode, role_data_tier in tier_lists.items():
-        tab_id = tab_ids.get(mode)
+        tab_id = MODE_KEYS.get(mode)
         if not tab_id:
             continue
 
+        tier_rows = "".join(
+            tier_row_html(
+                tier,
+                [
+                    role_container_html(
+                        role_data_tier.get(role, {}).get(tier, []),
+                        mode,
+                        game_version,
+                        characters_data,
+                        role_data,
+                        history_index,
+                        aggregates,
+                        images=images,
+                    )
+                    for role in ROLE_TYPES
+                ],
+            )
+            for tier in TIER_ORDER
+        )
         html += f"""
         <div id="{tab_id}" class="tab-content{' active' if tab_id == 'moc' else ''}">
             <h2 class="mode-header" style="text-align: center; margin-bottom: 20px;">{mode}</h2>
@@ -598,134 +722,7 @@ def generate_html(tier_lists, game_version, characters_data, role_data):
                     </div>
                 </div>
                 
-                <!-- S Tier -->
-                <div class="tier-row-container">
-                    <div class="tier-label tier-label-S">S</div>
-                    <div class="role-containers" data-tier="S">
-                        {"".join([f'<div class="mobile-role-header">{role}</div>' +
-                                    '<div class="role-container">' + 
-                            ''.join([f'''
-                            <div class="character">
-                                <img src="images/{sanitize_filename(char)}_icon.png" alt="{char}">
-                                <div class="tooltip">
-                                    <div class="tooltip-name">{char}</div>
-                                    <div class="tooltip-roles">Roles: {", ".join(role_data.get(char, ["N/A"]))}</div>
-                                    <div class="tooltip-stats">
-                                        {get_stats_html(char, mode, characters_data)}
-                                    </div>
-                                    <div class="tooltip-footer">Stats for v{game_version}</div>
-                                </div>
-                                <span>{char}</span>
-                            </div>
-                            ''' 
-                            for char in role_data_tier.get(role, {}).get('S', [])]) + 
-                            '</div>' 
-                        for role in ROLE_TYPES])}
-                    </div>
-                </div>
-                
-                <!-- A Tier -->
-                <div class="tier-row-container">
-                    <div class="tier-label tier-label-A">A</div>
-                    <div class="role-containers" data-tier="A">
-                        {"".join([f'<div class="mobile-role-header">{role}</div>' +
-                                    '<div class="role-container">' +  
-                            ''.join([f'''
-                            <div class="character">
-                                <img src="images/{sanitize_filename(char)}_icon.png" alt="{char}">
-                                <div class="tooltip">
-                                    <div class="tooltip-name">{char}</div>
-                                    <div class="tooltip-roles">Roles: {", ".join(role_data.get(char, ["N/A"]))}</div>
-                                    <div class="tooltip-stats">
-                                        {get_stats_html(char, mode, characters_data)}
-                                    </div>
-                                    <div class="tooltip-footer">Stats for v{game_version}</div>
-                                </div>
-                                <span>{char}</span>
-                            </div>
-                            ''' 
-                            for char in role_data_tier.get(role, {}).get('A', [])]) + 
-                            '</div>' 
-                        for role in ROLE_TYPES])}
-                    </div>
-                </div>
-                
-                <!-- B Tier -->
-                <div class="tier-row-container">
-                    <div class="tier-label tier-label-B">B</div>
-                    <div class="role-containers" data-tier="B">
-                        {"".join([f'<div class="mobile-role-header">{role}</div>' + 
-                                    '<div class="role-container">' + 
-                            ''.join([f'''
-                            <div class="character">
-                                <img src="images/{sanitize_filename(char)}_icon.png" alt="{char}">
-                                <div class="tooltip">
-                                    <div class="tooltip-name">{char}</div>
-                                    <div class="tooltip-roles">Roles: {", ".join(role_data.get(char, ["N/A"]))}</div>
-                                    <div class="tooltip-stats">
-                                        {get_stats_html(char, mode, characters_data)}
-                                    </div>
-                                    <div class="tooltip-footer">Stats for v{game_version}</div>
-                                </div>
-                                <span>{char}</span>
-                            </div>
-                            ''' 
-                            for char in role_data_tier.get(role, {}).get('B', [])]) + 
-                            '</div>' 
-                        for role in ROLE_TYPES])}
-                    </div>
-                </div>
-                
-                <!-- C Tier -->
-                <div class="tier-row-container">
-                    <div class="tier-label tier-label-C">C</div>
-                    <div class="role-containers" data-tier="C">
-                        {"".join([f'<div class="mobile-role-header">{role}</div>' +  
-                                    '<div class="role-container">' +  
-                            ''.join([f'''
-                            <div class="character">
-                                <img src="images/{sanitize_filename(char)}_icon.png" alt="{char}">
-                                <div class="tooltip">
-                                    <div class="tooltip-name">{char}</div>
-                                    <div class="tooltip-roles">Roles: {", ".join(role_data.get(char, ["N/A"]))}</div>
-                                    <div class="tooltip-stats">
-                                        {get_stats_html(char, mode, characters_data)}
-                                    </div>
-                                    <div class="tooltip-footer">Stats for v{game_version}</div>
-                                </div>
-                                <span>{char}</span>
-                            </div>
-                            ''' 
-                            for char in role_data_tier.get(role, {}).get('C', [])]) + 
-                            '</div>' 
-                        for role in ROLE_TYPES])}
-                    </div>
-                </div>
-                
-                <div class="tier-row-container">
-                    <div class="tier-label tier-label-D">D</div>
-                    <div class="role-containers" data-tier="D">
-                        {"".join([f'<div class="mobile-role-header">{role}</div>' + 
-                                    '<div class="role-container">' + 
-                            ''.join([f'''
-                            <div class="character">
-                                <img src="images/{sanitize_filename(char)}_icon.png" alt="{char}">
-                                <div class="tooltip">
-                                    <div class="tooltip-name">{char}</div>
-                                    <div class="tooltip-roles">Roles: {", ".join(role_data.get(char, ["N/A"]))}</div>
-                                    <div class="tooltip-stats">
-                                        {get_stats_html(char, mode, characters_data)}
-                                    </div>
-                                    <div class="tooltip-footer">Stats for v{game_version}</div>
-                                </div>
-                                <span>{char}</span>
-                            </div>
-                            ''' 
-                            for char in role_data_tier.get(role, {}).get('D', [])]) + 
-                            '</div>' 
-                        for role in ROLE_TYPES])}
-                    </div>
-                </div>
+                {tier_rows}
             </div>
         </div>
 """
@@ -744,6 +741,7 @@ def generate_html(tier_lists, game_version, characters_data, role_data):
             </footer>
     </div>
     
+    {region_payload_script(region_payload)}
     <script>
         // Tab switching functionality
         document.querySelectorAll('.tab-button').forEach(button => {{
@@ -768,78 +766,432 @@ def generate_html(tier_lists, game_version, characters_data, role_data):
                 collapsible.classList.toggle('collapsed');
             }});
         }}
-        document.querySelectorAll('img').forEach(img => {{
-            img.onerror = () => {{
-            img.alt = "Image missing!";
-            img.style.border = "2px dashed red";
-            }};
-        }});
+        // Region filter: move cards between tiers using the precomputed lists
+        const regionFilter = document.getElementById('region-filter');
+        const regionData = document.getElementById('region-data');
+        if (regionFilter && regionData) {{
+            const payload = JSON.parse(regionData.textContent);
+            regionFilter.addEventListener('change', () => {{
+                const lists = payload.regions[regionFilter.value];
+                Object.entries(lists).forEach(([tabId, roles]) => {{
+                    const tab = document.getElementById(tabId);
+                    if (!tab) return;
+                    const cards = {{}};
+                    tab.querySelectorAll('.role-containers').forEach(row => {{
+                        row.querySelectorAll(':scope > .role-container').forEach((container, roleIndex) => {{
+                            container.querySelectorAll('.character').forEach(card => {{
+                                cards[roleIndex + '|' + card.dataset.char] = card;
+                                card.style.display = 'none';
+                            }});
+                        }});
+                    }});
+                    payload.roles.forEach((role, roleIndex) => {{
+                        Object.entries(roles[role] || {{}}).forEach(([tier, chars]) => {{
+                            const row = tab.querySelector(`.role-containers[data-tier="${{tier}}"]`);
+                            const container = row && row.querySelectorAll(':scope > .role-container')[roleIndex];
+                            chars.forEach(char => {{
+                                const card = cards[roleIndex + '|' + char];
+                                if (card && container) {{
+                                    container.appendChild(card);
+                                    card.style.display = '';
+                                }}
+                            }});
+                        }});
+                    }});
+                }});
+                // Usage and cycles/score follow the region; the rest stays pooled
+                const region = regionFilter.value;
+                const stats = region === 'all' ? null : payload.stats[region];
+                document.querySelectorAll('.tab-content').forEach(tab => {{
+                    const tabStats = (stats && stats[tab.id]) || {{}};
+                    tab.querySelectorAll('.character').forEach(card => {{
+                        const values = tabStats[card.dataset.char];
+                        card.querySelectorAll('.stat-value').forEach(el => {{
+                            if (!('pooled' in el.dataset)) el.dataset.pooled = el.textContent;
+                            el.textContent = values ? values[el.dataset.stat] : el.dataset.pooled;
+                        }});
+                        card.querySelectorAll('.stat-ci').forEach(el => {{
+                            el.style.display = stats ? 'none' : '';
+                        }});
+                        const scope = card.querySelector('.stat-scope');
+                        if (scope) {{
+                            scope.textContent = stats ? ` · ${{region}} (other figures: all regions)` : '';
+                        }}
+                    }});
+                }});
+            }});
+        }}
     </script>
 </body>
 </html>
 """
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        f.write(html)
-    print(f"Visual tier list saved to {OUTPUT_FILE}")
+    if output_file:
+        # Site files are deployed as-is, so they get no checksum sidecar
+        atomic_write(output_file, html, checksum=False)
+        print(f"Visual tier list saved to {output_file}")
+    return html
+
+
+def format_number(value, decimals):
+    """Round for display, trimming trailing zeros ("N/A" passes through)"""
+    if value == "N/A":
+        return "N/A"
+    rounded = round(value, decimals)
+    if rounded.is_integer():
+        return str(int(rounded))
+    return str(rounded)  # Python automatically trims trailing zeros
+
+
+def stat_values(character, mode, characters_data):
+    """{"metric": ..., "usage": ...} display strings for a card's stats
+
+    The region filter swaps these into the tooltip, so they are formatted
+    exactly like get_stats_html formats the pooled figures.
+    """
+    char_data = characters_data.get(character)
+    if char_data is None:
+        return None
+    if mode == "General Tier List":
+        all_usage = [stats.usage for _, stats in char_data.modes()]
+        if not all_usage:
+            return None
+        return {"usage": format_number(round(sum(all_usage) / len(all_usage), 2), 2)}
+    data = char_data.mode(MODE_KEYS[mode])
+    if data is None:
+        return None
+    metric = (data.cycles, 3) if mode == "Memory of Chaos" else (data.score, 0)
+    return {"metric": format_number(*metric), "usage": format_number(data.usage, 2)}
+
+
+def _stat_span(stat, text):
+    return f'<span class="stat-value" data-stat="{stat}">{text}</span>'
 
 
 def get_stats_html(character, mode, characters_data):
     """Generate HTML for character stats based on game mode"""
-    char_data = characters_data.get(character, {})
+    char_data = characters_data.get(character)
 
-    # Helper function to format numbers conditionally
-    def format_number(value, decimals):
-        if value == "N/A":
-            return "N/A"
-        rounded = round(value, decimals)
-        if rounded.is_integer():
-            return str(int(rounded))
-        return str(rounded)  # Python automatically trims trailing zeros
+    def mode_stats(mode_key):
+        return char_data.mode(mode_key) if char_data is not None else None
+
+    # Bootstrap confidence interval, when the dataset has one
+    def format_interval(data, field, decimals, suffix=""):
+        if data is None or not data.ci or field not in data.ci:
+            return ""
+        low, high = data.ci[field]
+        return (
+            f' <span class="stat-ci" title="95% confidence interval">'
+            f"[{format_number(low, decimals)}–{format_number(high, decimals)}{suffix}]"
+            f"</span>"
+        )
 
     if mode == "Memory of Chaos":
-        moc_data = char_data.get("moc", {})
-        cycles = moc_data.get("cycles", "N/A")
-        usage = moc_data.get("usage", "N/A")
+        moc_data = mode_stats("moc")
+        cycles = moc_data.cycles if moc_data else "N/A"
+        usage = moc_data.usage if moc_data else "N/A"
         return f"""
-            Average Cycles: {format_number(cycles, 3)}<br>
-            Usage Rate: {format_number(usage, 2)}%
+            Average Cycles: {_stat_span("metric", format_number(cycles, 3))}{format_interval(moc_data, "cycles", 2)}<br>
+            Usage Rate: {_stat_span("usage", format_number(usage, 2))}%{format_interval(moc_data, "usage", 2, "%")}
         """
     elif mode in ["Pure Fiction", "Apocalyptic Shadow"]:
         mode_key = "pf" if mode == "Pure Fiction" else "as"
-        mode_data = char_data.get(mode_key, {})
-        score = mode_data.get("score", "N/A")
-        usage = mode_data.get("usage", "N/A")
+        mode_data = mode_stats(mode_key)
+        score = mode_data.score if mode_data else "N/A"
+        usage = mode_data.usage if mode_data else "N/A"
         return f"""
-            Average Score: {format_number(score, 0)}<br>
-            Usage Rate: {format_number(usage, 2)}%
+            Average Score: {_stat_span("metric", format_number(score, 0))}{format_interval(mode_data, "score", 0)}<br>
+            Usage Rate: {_stat_span("usage", format_number(usage, 2))}%{format_interval(mode_data, "usage", 2, "%")}
         """
     elif mode == "General Tier List":
         # Aggregate usage for all modes
         all_usage = []
-        for mode_key in ["moc", "pf", "as"]:
-            usage = char_data.get(mode_key, {}).get("usage")
-            if usage is not None:
-                all_usage.append(usage)
+        if char_data is not None:
+            all_usage = [stats.usage for _, stats in char_data.modes()]
 
         if not all_usage:
             return "Average Usage: N/A"
 
         avg_usage = round(sum(all_usage) / len(all_usage), 2)
-        return f"Average Usage: {format_number(avg_usage, 2)}%"
+        return f"Average Usage: {_stat_span('usage', format_number(avg_usage, 2))}%"
 
     return "Stats not available"
 
 
-if __name__ == "__main__":
+def tier_row_html(tier, containers):
+    """One tier's row: its label, then each role's container in ROLE_TYPES order"""
+    cells = "".join(
+        f'<div class="mobile-role-header">{role}</div>{container}'
+        for role, container in zip(ROLE_TYPES, containers)
+    )
+    return f"""
+                <div class="tier-row-container">
+                    <div class="tier-label tier-label-{tier}">{tier}</div>
+                    <div class="role-containers" data-tier="{tier}">
+                        {cells}
+                    </div>
+                </div>
+"""
+
+
+def role_container_html(
+    chars,
+    mode,
+    game_version,
+    characters_data,
+    role_data,
+    history_index=None,
+    aggregates=None,
+    *,
+    images,
+):
+    """The cards of one role in one tier, the unit watch mode re-renders
+
+    images is the manifest from build_image_manifest, built once per render.
+    """
+    cards = "".join(
+        character_card_html(
+            char,
+            mode,
+            game_version,
+            characters_data,
+            role_data,
+            history_index,
+            aggregates,
+            images=images,
+        )
+        for char in chars
+    )
+    return f'<div class="role-container">{cards}</div>'
+
+
+def character_card_html(
+    char,
+    mode,
+    game_version,
+    characters_data,
+    role_data,
+    history_index=None,
+    aggregates=None,
+    *,
+    images,
+):
+    """Generate the icon and hover tooltip for one character"""
+    return f'''
+                            <div class="character" data-char="{escape(char)}">
+                                {icon_img_html(char, images)}
+                                <div class="tooltip">
+                                    <div class="tooltip-name">{char}</div>
+                                    <div class="tooltip-roles">Roles: {", ".join(role_data.get(char, ["N/A"]))}</div>
+                                    <div class="tooltip-stats">
+                                        {get_stats_html(char, mode, characters_data)}
+                                    </div>
+                                    {get_nodes_html(char, mode, characters_data)}
+                                    {get_partners_html(char, mode, aggregates)}
+                                    {get_teams_html(char, mode, characters_data)}
+                                    {get_trend_html(char, mode, history_index)}
+                                    <div class="tooltip-footer">Stats for v{game_version}<span class="stat-scope"></span></div>
+                                </div>
+                                <span>{char}</span>
+                            </div>
+                            '''
+
+
+def build_region_payload(tier_lists, characters_data, role_data):
+    """Tier lists for every uid region, keyed by tab id, for the region filter
+
+    Regional stats come from each mode's "regions" breakdown and are scored
+    exactly like the pooled data; "stats" carries each region's formatted
+    usage and cycles/score per tab for the tooltips. Returns None when the
+    dataset has none.
+    """
+    from tierlist import calculate_scores, generate_role_based_tier_lists
+
+    regional = {}
+    for char, char_data in characters_data.items():
+        for mode_key, mode_data in char_data.modes():
+            for region, stats in (mode_data.regions or {}).items():
+                regional.setdefault(region, {}).setdefault(char, {})[mode_key] = stats
+    if not regional:
+        return None
+
+    def by_tab(lists):
+        return {MODE_KEYS[mode]: roles for mode, roles in lists.items()}
+
+    regions = {"all": by_tab(tier_lists)}
+    stats = {}
+    for region, raw in sorted(regional.items()):
+        data = characters_from_dict(raw)
+        scores = calculate_scores(data)
+        regions[region] = by_tab(generate_role_based_tier_lists(data, scores, role_data))
+        # The region's own usage and cycles/score, for the card tooltips
+        stats[region] = {
+            MODE_KEYS[mode]: {
+                char: values
+                for char in data
+                if (values := stat_values(char, mode, data)) is not None
+            }
+            for mode in tier_lists
+        }
+    return {"roles": ROLE_TYPES, "regions": regions, "stats": stats}
+
+
+def get_region_filter_html(region_payload):
+    """Region selector, shown only when the dataset has a region breakdown"""
+    if not region_payload:
+        return ""
+    options = "".join(
+        f'<option value="{escape(region)}">{escape(region)}</option>'
+        for region in region_payload["regions"]
+        if region != "all"
+    )
+    return (
+        '<div class="region-filter"><label for="region-filter">Region:</label> '
+        '<select id="region-filter"><option value="all">All regions</option>'
+        f"{options}</select></div>"
+    )
+
+
+def region_payload_script(region_payload):
+    """Embed the precomputed regional tier lists as inline JSON"""
+    if not region_payload:
+        return ""
+    # "</" would end the script element early
+    payload = json.dumps(region_payload, separators=(",", ":")).replace("</", "<\\/")
+    return f'<script id="region-data" type="application/json">{payload}</script>'
+
+
+def sparkline_svg(values, size=SPARKLINE_SIZE):
+    """Draw a small inline SVG line for a series, skipping missing points"""
+    width, height = size
+    points = [(i, v) for i, v in enumerate(values) if v is not None]
+    if len(points) < 2:
+        return ""
+
+    low = min(v for _, v in points)
+    high = max(v for _, v in points)
+    spread = (high - low) or 1
+    step = width / (len(values) - 1)
+    coords = " ".join(
+        f"{i * step:.1f},{height - 2 - (v - low) / spread * (height - 4):.1f}"
+        for i, v in points
+    )
+    return (
+        f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+        f'<polyline points="{coords}" fill="none" stroke="#4cc9f0" stroke-width="1.5"/>'
+        f"</svg>"
+    )
+
+
+def get_nodes_html(character, mode, characters_data):
+    """Split a character's stats between the first and second half of a stage"""
+    char_data = characters_data.get(character)
+    mode_key = MODE_KEYS.get(mode)
+    if char_data is None or mode_key == "general":
+        return ""
+    mode_data = char_data.mode(mode_key)
+    if mode_data is None or not mode_data.nodes:
+        return ""
+
+    if mode_key == "moc":
+        label, decimals = "Cycles", 2
+    else:
+        label, decimals = "Score", 0
+    rows = "".join(
+        f"<tr><td>{NODE_LABELS.get(node, f'Node {node}')}</td>"
+        f"<td>{round(stats[mode_data.metric_name], decimals):g}</td>"
+        f"<td>{stats['usage']:.2f}%</td></tr>"
+        for node, stats in sorted(mode_data.nodes.items())
+    )
+    return (
+        f'<table class="tooltip-nodes"><tr><th></th><th>{label}</th>'
+        f"<th>Usage</th></tr>{rows}</table>"
+    )
+
+
+def get_partners_html(character, mode, aggregates):
+    """List the teammates a character is most often played with in a mode"""
+    pairs = (aggregates or {}).get(MODE_KEYS.get(mode), {}).get("pairs")
+    if pairs is None:
+        return ""
+    partners = pairs.top_partners(character)
+    if not partners:
+        return ""
+    names = ", ".join(name for name, _, _ in partners)
+    return f'<div class="tooltip-partners">Top partners: {names}</div>'
+
+
+def get_teams_html(character, mode, characters_data):
+    """Show the character's most used team in a mode"""
+    char_data = characters_data.get(character)
+    mode_key = MODE_KEYS.get(mode)
+    if char_data is None or mode_key == "general":
+        return ""
+    mode_data = char_data.mode(mode_key)
+    if mode_data is None or not mode_data.teams or not mode_data.teams["most_used"]:
+        return ""
+    members, count, _ = mode_data.teams["most_used"][0]
+    return (
+        f'<div class="tooltip-teams">Top team: {" / ".join(members)} '
+        f"({count} clears)</div>"
+    )
+
+
+def get_trend_html(character, mode, history_index):
+    """Generate the usage sparkline and tier movement badge from the history index"""
+    if not history_index:
+        return ""
+    mode_series = (
+        history_index["characters"].get(character, {}).get(MODE_KEYS.get(mode))
+    )
+    if not mode_series:
+        return ""
+
+    sparkline = sparkline_svg(mode_series["usage"])
+    movement = mode_series["movement"]
+    badge = ""
+    if movement:
+        direction = "up" if movement > 0 else "down"
+        verb = "Rose" if movement > 0 else "Fell"
+        plural = "s" if abs(movement) > 1 else ""
+        badge = (
+            f'<span class="trend-badge {direction}">'
+            f"{verb} {abs(movement)} tier{plural}</span>"
+        )
+    if not sparkline and not badge:
+        return ""
+    return f'<div class="tooltip-trend">{sparkline}{badge}</div>'
+
+
+def sitemap_xml(pages, lastmod):
+    """Sitemap with the tier list first, then each page path under SITE_URL"""
+    entries = [("", "1.0")] + [(page, "0.6") for page in pages]
+    urls = "".join(
+        f"""
+    <url>
+        <loc>{escape(SITE_URL + path)}</loc>
+        <lastmod>{lastmod}</lastmod>
+        <changefreq>weekly</changefreq>
+        <priority>{priority}</priority>
+    </url>"""
+        for path, priority in entries
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}\n'
+        "</urlset>\n"
+    )
+
+
+def main():
+    """Render the static site into ../public"""
     # Load dataset
     try:
-        with open(DATASET_PATH) as f:
-            data = json.load(f)
+        data = load_dataset(DATASET_PATH)
     except FileNotFoundError:
         print(f"Error: Dataset file {DATASET_PATH} not found!")
         print("Please run update_data.py first to create a dataset.")
-        exit(1)
+        raise SystemExit(1)
 
     # Extract game version
     game_version = data.get("version", "Unknown")
@@ -851,16 +1203,39 @@ if __name__ == "__main__":
             role_data = json.load(f)
     except FileNotFoundError:
         print(f"Error: Role file {ROLES_PATH} not found!")
-        exit(1)
+        raise SystemExit(1)
 
     # Calculate scores (using your existing function from tierlist.py)
     from tierlist import calculate_scores, generate_role_based_tier_lists
 
     scores = calculate_scores(characters_data)
     tier_lists = generate_role_based_tier_lists(characters_data, scores)
+    region_payload = build_region_payload(tier_lists, characters_data, role_data)
+
+    # Trends come from the precomputed index, never from the snapshots
+    history_index = load_history_index(HISTORY_INDEX_PATH)
+    aggregates = (
+        load_aggregates(AGGREGATES_PATH) if os.path.exists(AGGREGATES_PATH) else None
+    )
+
+    # Index the icons once, so no page links to an image that doesn't exist
+    images = build_image_manifest()
+    missing = missing_icons(set(characters_data) | set(role_data), images)
+    if missing:
+        print(f"Missing icons ({len(missing)}), using the placeholder:")
+        print(f"  {', '.join(missing)}")
 
     # Generate the visual tier list
-    generate_html(tier_lists, game_version, characters_data, role_data)
+    generate_html(
+        tier_lists,
+        game_version,
+        characters_data,
+        role_data,
+        history_index,
+        aggregates,
+        region_payload,
+        images=images,
+    )
 
     # Copy favicon to public directory
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -873,25 +1248,34 @@ if __name__ == "__main__":
     else:
         print(f"Warning: favicon.png not found at {favicon_src}")
 
-    # Add this after generating HTML in visual_tierlist.py
-    SITEMAP = """<?xml version="1.0" encoding="UTF-8"?>
-    <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
-        <url>
-            <loc>https://my-hsr-tierlist.netlify.app/</loc>
-            <lastmod>{date}</lastmod>
-            <changefreq>weekly</changefreq>
-            <priority>1.0</priority>
-        </url>
-    </urlset>
-    """.format(
-        date=datetime.now().strftime("%Y-%m-%d")
+    # A static page per character, rendered in parallel
+    from character_pages import render_character_pages
+
+    pages = render_character_pages(
+        tier_lists,
+        game_version,
+        characters_data,
+        role_data,
+        history_index,
+        aggregates,
+        images=images,
     )
+    print(f"Wrote {len(pages)} character pages")
 
-    with open("../public/sitemap.xml", "w") as f:
-        f.write(SITEMAP)
+    # The sitemap lists the tier list and every character page
+    atomic_write(
+        "../public/sitemap.xml",
+        sitemap_xml(pages, datetime.now().strftime("%Y-%m-%d")),
+        checksum=False,
+    )
 
     # Add this to your script
-    with open("../public/robots.txt", "w") as f:
-        f.write(
-            "User-agent: *\nAllow: /\n\nSitemap: https://my-hsr-tierlist.netlify.app/sitemap.xml"
-        )
+    atomic_write(
+        "../public/robots.txt",
+        "User-agent: *\nAllow: /\n\nSitemap: https://my-hsr-tierlist.netlify.app/sitemap.xml",
+        checksum=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+# watch.py
+import importlib
+import json
+import os
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import visual_tierlist
+from aggregate_cube import AGGREGATES_PATH, load_aggregates
+from history import HISTORY_INDEX_PATH, MODE_KEYS, TIER_ORDER, load_history_index
+from serialization import load_dataset
+from tierlist import ROLE_TYPES, calculate_scores, generate_role_based_tier_lists
+
+# Configuration
+HOST = "127.0.0.1"
+PORT = 8719
+POLL_SECONDS = 0.1  # How often file modification times are checked
+PUBLIC_DIR = "../public"  # Images and other assets are served from here
+EVENTS_PATH = "/__watch"
+# Appended to the served page: swaps in re-rendered fragments, or reloads
+LIVE_RELOAD_SCRIPT = """
+<script>
+    new EventSource("%s").onmessage = (message) => {
+        const event = JSON.parse(message.data);
+        const filter = document.getElementById('region-filter');
+        if (event.type === 'reload' || (filter && filter.value !== 'all')) {
+            location.reload();
+            return;
+        }
+        event.fragments.forEach(({tab, tier, role, html}) => {
+            const row = document.querySelector(
+                `#${tab} .role-containers[data-tier="${tier}"]`
+            );
+            const containers = row && row.querySelectorAll(':scope > .role-container');
+            const container = containers && containers[role];
+            if (container) container.outerHTML = html;
+        });
+        const regionData = document.getElementById('region-data');
+        if (regionData && event.regions) regionData.textContent = event.regions;
+    };
+</script>
+""" % EVENTS_PATH
+
+
+def changed_roles(old_roles, new_roles):
+    """Every role that a character whose roles differ was or now is in"""
+    characters = {
+        char
+        for char in set(old_roles) | set(new_roles)
+        if old_roles.get(char) != new_roles.get(char)
+    }
+    roles = {
+        role
+        for char in characters
+        for role in old_roles.get(char, []) + new_roles.get(char, [])
+    }
+    return [role for role in ROLE_TYPES if role in roles]
+
+
+class SiteState:
+    """The page's inputs and computed tier lists, kept between edits"""
+
+    def __init__(
+        self,
+        dataset_path=visual_tierlist.DATASET_PATH,
+        roles_path=visual_tierlist.ROLES_PATH,
+    ):
+        self.dataset_path = dataset_path
+        self.roles_path = roles_path
+        self.load()
+
+    def _read_roles(self):
+        with open(self.roles_path) as f:
+            return json.load(f)
+
+    def load(self):
+        """Load everything and compute all tier lists"""
+        dataset = load_dataset(self.dataset_path)
+        self.version = dataset.get("version", "Unknown")
+        self.characters = dataset.get("characters", {})
+        self.role_data = self._read_roles()
+        # Scores don't depend on roles, so role edits reuse them
+        self.scores = calculate_scores(self.characters)
+        self.tier_lists = generate_role_based_tier_lists(
+            self.characters, self.scores, self.role_data
+        )
+        self.history_index = load_history_index(HISTORY_INDEX_PATH)
+        self.aggregates = (
+            load_aggregates(AGGREGATES_PATH)
+            if os.path.exists(AGGREGATES_PATH)
+            else None
+        )
+        self.region_payload = visual_tierlist.build_region_payload(
+            self.tier_lists, self.characters, self.role_data
+        )
+        self.images = visual_tierlist.build_image_manifest()
+
+    def page(self):
+        return visual_tierlist.generate_html(
+            self.tier_lists,
+            self.version,
+            self.characters,
+            self.role_data,
+            self.history_index,
+            self.aggregates,
+            self.region_payload,
+            output_file=None,
+            images=self.images,
+        )
+
+    def update_roles(self):
+        """Re-read the roles file and recompute only the roles it touched
+
+        Returns the re-rendered role containers as
+        {"tab", "tier", "role" (index in ROLE_TYPES), "html"} fragments.
+        """
+        new_roles = self._read_roles()
+        roles = changed_roles(self.role_data, new_roles)
+        self.role_data = new_roles
+        if not roles:
+            return []
+
+        # Tier lists are ranked per role, so the other roles can't change
+        subset = {
+            char: [role for role in char_roles if role in roles]
+            for char, char_roles in new_roles.items()
+        }
+        updated = generate_role_based_tier_lists(self.characters, self.scores, subset)
+        fragments = []
+        for mode, by_role in updated.items():
+            for role in roles:
+                tiers = by_role.get(role, {})
+                self.tier_lists[mode][role] = tiers
+                for tier in TIER_ORDER:
+                    html = visual_tierlist.role_container_html(
+                        tiers.get(tier, []),
+                        mode,
+                        self.version,
+                        self.characters,
+                        self.role_data,
+                        self.history_index,
+                        self.aggregates,
+                        images=self.images,
+                    )
+                    fragments.append(
+                        {
+                            "tab": MODE_KEYS[mode],
+                            "tier": tier,
+                            "role": ROLE_TYPES.index(role),
+                            "html": html,
+                        }
+                    )
+        self.region_payload = visual_tierlist.build_region_payload(
+            self.tier_lists, self.characters, self.role_data
+        )
+        return fragments
+
+
+class EventLog:
+    """Events for live-reload clients, which wait for ones they haven't seen"""
+
+    def __init__(self):
+        self.events = []
+        self.condition = threading.Condition()
+
+    def publish(self, event):
+        with self.condition:
+            self.events.append(event)
+            self.condition.notify_all()
+
+    def wait(self, seen, timeout=None):
+        """Events after the first `seen`, once there are any (or on timeout)"""
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.events) > seen, timeout)
+            return self.events[seen:]
+
+
+class WatchHandler(SimpleHTTPRequestHandler):
+    """The in-memory page with live reload, plus static files from ../public"""
+
+    state = None
+    events = None
+    lock = None
+
+    def do_GET(self):
+        if self.path in ("/", "/index.html"):
+            with self.lock:
+                page = self.state.page()
+            body = page.replace("</body>", LIVE_RELOAD_SCRIPT + "</body>")
+            return self._send(body.encode("utf-8"), "text/html; charset=utf-8")
+        if self.path == EVENTS_PATH:
+            return self._stream_events()
+        return super().do_GET()
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_events(self):
+        # Counted before the headers go out, so no later event can be missed
+        seen = len(self.events.events)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        try:
+            while True:
+                new = self.events.wait(seen, timeout=15)
+                seen += len(new)
+                # An empty comment keeps idle connections open
+                chunk = "".join(f"data: {json.dumps(event)}\n\n" for event in new)
+                self.wfile.write((chunk or ":\n\n").encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(state, events, lock, host=HOST, port=PORT, directory=PUBLIC_DIR):
+    """Threaded HTTP server for the watched page"""
+    attributes = {"state": state, "events": events, "lock": lock}
+    handler = type("BoundWatchHandler", (WatchHandler,), attributes)
+    return ThreadingHTTPServer((host, port), partial(handler, directory=directory))
+
+
+class Watcher:
+    """Poll the roles file, dataset and templates; update the page on change"""
+
+    def __init__(self, state, events, lock, templates=None):
+        self.state = state
+        self.events = events
+        self.lock = lock
+        # The page markup lives in visual_tierlist.py itself
+        self.templates = templates or [visual_tierlist.__file__]
+        self.mtimes = self._mtimes()
+
+    def _paths(self):
+        return {
+            "roles": [self.state.roles_path],
+            "dataset": [self.state.dataset_path, HISTORY_INDEX_PATH, AGGREGATES_PATH],
+            "templates": self.templates,
+        }
+
+    def _mtimes(self):
+        mtimes = {}
+        for kind, paths in self._paths().items():
+            for path in paths:
+                try:
+                    mtimes[path] = (kind, os.stat(path).st_mtime_ns)
+                except FileNotFoundError:
+                    mtimes[path] = (kind, None)
+        return mtimes
+
+    def check(self):
+        """Apply whatever changed since the last check; returns the kinds"""
+        mtimes = self._mtimes()
+        kinds = {
+            kind
+            for path, (kind, mtime) in mtimes.items()
+            if self.mtimes[path][1] != mtime
+        }
+        self.mtimes = mtimes
+        if not kinds:
+            return kinds
+
+        start = time.perf_counter()
+        try:
+            with self.lock:
+                if kinds & {"dataset", "templates"}:
+                    if "templates" in kinds:
+                        importlib.reload(visual_tierlist)
+                    self.state.load()
+                    event = {"type": "reload"}
+                else:
+                    fragments = self.state.update_roles()
+                    regions = self.state.region_payload
+                    event = {
+                        "type": "fragments",
+                        "fragments": fragments,
+                        "regions": json.dumps(regions, separators=(",", ":")),
+                    }
+        except (ValueError, SyntaxError) as e:
+            # Usually a file caught half-saved; the next save is picked up
+            print(f"Skipped update ({', '.join(sorted(kinds))}): {e}")
+            return kinds
+
+        self.events.publish(event)
+        elapsed = (time.perf_counter() - start) * 1000
+        if event["type"] == "fragments":
+            detail = f"{len(event['fragments'])} fragments"
+        else:
+            detail = "full reload"
+        print(f"Updated {', '.join(sorted(kinds))} in {elapsed:.0f} ms ({detail})")
+        return kinds
+
+    def run(self, stop=None, poll_seconds=POLL_SECONDS):
+        stop = stop or threading.Event()
+        while not stop.wait(poll_seconds):
+            self.check()
+
+
+def watch(host=HOST, port=PORT):
+    """Serve the tier list with live reload until interrupted"""
+    state = SiteState()
+    events = EventLog()
+    lock = threading.Lock()
+    server = make_server(state, events, lock, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Watching for changes; preview on http://{host}:{server.server_port}")
+    try:
+        Watcher(state, events, lock).run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    watch()